@@ -0,0 +1,126 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterable, Optional
+
+from src.metrics import MetricsRecorder
+
+# 等待时间记录到 MetricsRecorder 中的名称，与接口路径分开统计，不混进请求延迟
+LEASE_WAIT = "account_pool:lease_wait"
+THROTTLE_WAIT = "account_pool:throttle_wait"
+
+
+class _AccountState:
+    """单个账号的令牌桶和在途数"""
+    __slots__ = ("account", "tokens", "updated", "in_flight")
+
+    def __init__(self, account: dict, burst: float):
+        self.account = account
+        self.tokens = burst
+        self.updated = time.perf_counter()
+        self.in_flight = 0
+
+
+class AccountLease:
+    """
+    一次租用：流程结束前账号归当前虚拟用户使用。
+    在 lease 范围内 AsyncApiClient 每发一个请求都会先调用 throttle()，按账号限速。
+    """
+
+    def __init__(self, pool: "AccountPool", state: _AccountState, wait_time: float):
+        self.pool = pool
+        self._state = state
+        self.wait_time = wait_time
+
+    @property
+    def account(self) -> dict:
+        return self._state.account
+
+    async def throttle(self) -> float:
+        """消耗该账号的一个令牌，没有令牌时等待，返回等待的秒数"""
+        rate = self.pool.rate_per_account
+        if rate is None:
+            return 0.0
+        state = self._state
+        start = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            state.tokens = min(self.pool.burst, state.tokens + (now - state.updated) * rate)
+            state.updated = now
+            if state.tokens >= 1:
+                state.tokens -= 1
+                break
+            await asyncio.sleep((1 - state.tokens) / rate)
+        waited = time.perf_counter() - start
+        if self.pool.metrics is not None:
+            self.pool.metrics.record_wait(THROTTLE_WAIT, waited)
+        return waited
+
+
+_current_lease: ContextVar[Optional[AccountLease]] = ContextVar("current_lease", default=None)
+
+
+def current_lease() -> Optional[AccountLease]:
+    return _current_lease.get()
+
+
+class AccountPool:
+    """
+    账号租用池（asyncio），用有限的测试账号长时间压测：
+        async with pool.lease() as lease:
+            await scenario(lease.account)
+    - 每个账号同时最多被 max_concurrency_per_account 个虚拟用户租用，没有空闲账号时排队（先到先得）
+    - rate_per_account 限制单个账号每秒请求数（令牌桶，允许 burst 个突发），None 表示不限速
+    - 归还的账号排到队尾，轮流使用，避免少数账号成为热点
+    - 传入 metrics 时分别记录等待租用和等待令牌的时间（account_pool:lease_wait / account_pool:throttle_wait），
+      记在 metrics 的等待时间一节（record_wait），不混进按接口的统计，请求延迟里也不包含这两部分
+    """
+
+    def __init__(self, accounts: Iterable[dict], max_concurrency_per_account: int = 1,
+                 rate_per_account: Optional[float] = None, burst: float = 1.0,
+                 metrics: Optional[MetricsRecorder] = None):
+        if max_concurrency_per_account < 1:
+            raise ValueError("max_concurrency_per_account 至少为 1")
+        self.max_concurrency_per_account = max_concurrency_per_account
+        self.rate_per_account = rate_per_account
+        self.burst = max(1.0, burst)
+        self.metrics = metrics
+        self._states = [_AccountState(account, self.burst) for account in accounts]
+        if not self._states:
+            raise ValueError("accounts 不能为空")
+        self._idle: Optional[asyncio.Queue] = None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _queue(self) -> asyncio.Queue:
+        # 队列在第一次租用时创建，绑定到当前事件循环
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.max_concurrency_per_account):
+                for state in self._states:
+                    self._idle.put_nowait(state)
+        return self._idle
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[AccountLease]:
+        idle = self._queue()
+        start = time.perf_counter()
+        state = await idle.get()
+        wait_time = time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.record_wait(LEASE_WAIT, wait_time)
+        state.in_flight += 1
+        lease = AccountLease(self, state, wait_time)
+        token = _current_lease.set(lease)
+        try:
+            yield lease
+        finally:
+            _current_lease.reset(token)
+            state.in_flight -= 1
+            idle.put_nowait(state)
+
+    def in_flight(self) -> Dict[str, int]:
+        """每个账号当前的在途数（按 userName）"""
+        return {state.account.get("userName"): state.in_flight for state in self._states}
@@ -0,0 +1,213 @@
+import asyncio
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config_loader import ROOT, load_config
+
+# CSV 里读出来的都是字符串，这些字段按 int 转换，与 config.yaml 中的类型保持一致
+DEFAULT_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "order_index": int,
+    "expected_login_code": int,
+}
+
+FILE_SUFFIXES = (".csv", ".jsonl", ".yaml", ".yml")
+
+
+class AccountSource(ABC):
+    """
+    账号数据源基类：
+    - 每次 for 循环都重新从头流式读取，不把全部账号放进内存
+    - 支持 async for，供异步并发测试边读边用
+    - iter_offsets 流式读一遍，同时给出每个账号的位置；read_at 按位置直接读出一个账号（文件源 seek 到对应字节），
+      pytest 参数化只保存位置，用例按任意顺序执行（xdist、-k、重跑）都不需要从头重读
+    子类实现 _iter_records、iter_offsets、read_at。
+    """
+
+    # async for 时每读多少条让出一次事件循环，避免大文件读取卡住其他协程
+    YIELD_EVERY = 100
+
+    @abstractmethod
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        """按顺序流式读取全部账号"""
+
+    @abstractmethod
+    def iter_offsets(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """按顺序流式读取全部账号，同时给出每个账号的位置（传给 read_at）"""
+
+    @abstractmethod
+    def read_at(self, offset: int) -> Dict[str, Any]:
+        """读取 iter_offsets 给出的位置上的账号"""
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self._iter_records()
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        for i, record in enumerate(self._iter_records(), 1):
+            yield record
+            if i % self.YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+
+    @staticmethod
+    def record_id(record: Dict[str, Any]) -> str:
+        """pytest 参数化用例的 id"""
+        return str(record.get("userName"))
+
+
+class YamlAccountSource(AccountSource):
+    """config.yaml（或其他 YAML 文件）里的账号列表，解析结果由 config_loader 缓存；位置即列表下标"""
+
+    def __init__(self, key: str, path: Optional[str] = None):
+        self.key = key
+        self.path = path
+
+    def _records(self) -> List[Dict[str, Any]]:
+        return load_config(self.path).get(self.key) or []
+
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._records())
+
+    def iter_offsets(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        return enumerate(self._records())
+
+    def read_at(self, offset: int) -> Dict[str, Any]:
+        return self._records()[offset]
+
+
+class CsvAccountSource(AccountSource):
+    """CSV 文件，第一行为表头，逐行读取；位置为每行数据在文件中的字节偏移"""
+
+    def __init__(self, path: str, converters: Optional[Dict[str, Callable[[str], Any]]] = None,
+                 encoding: str = "utf-8"):
+        self.path = path
+        self.converters = DEFAULT_CONVERTERS if converters is None else converters
+        self.encoding = encoding
+        self._header: Optional[List[str]] = None
+
+    def _convert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        for name, convert in self.converters.items():
+            if row.get(name) not in (None, ""):
+                row[name] = convert(row[name])
+        return row
+
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, newline="", encoding=self.encoding) as f:
+            for row in csv.DictReader(f):
+                yield self._convert(row)
+
+    @staticmethod
+    def _lines(f, position: List[int], encoding: str) -> Iterator[str]:
+        """逐行交给 csv.reader，position[0] 始终是下一行的起始偏移（csv.reader 不会多读）"""
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            position[0] = f.tell()
+            yield line.decode(encoding)
+
+    def iter_offsets(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with open(self.path, "rb") as f:
+            position = [0]
+            reader = csv.reader(self._lines(f, position, self.encoding))
+            header = next(reader, None)
+            if header is None:
+                return
+            self._header = header
+            while True:
+                offset = position[0]
+                values = next(reader, None)
+                if values is None:
+                    return
+                # 与 DictReader 一致：空行跳过
+                if values:
+                    yield offset, self._convert(dict(zip(header, values)))
+
+    def _read_header(self) -> List[str]:
+        if self._header is None:
+            with open(self.path, newline="", encoding=self.encoding) as f:
+                self._header = next(csv.reader(f), [])
+        return self._header
+
+    def read_at(self, offset: int) -> Dict[str, Any]:
+        header = self._read_header()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            values = next(csv.reader(self._lines(f, [offset], self.encoding)), None)
+        if not values:
+            raise IndexError(f"{self.path} 偏移 {offset} 处没有账号")
+        return self._convert(dict(zip(header, values)))
+
+
+class JsonlAccountSource(AccountSource):
+    """JSON Lines 文件，每行一个账号对象，空行跳过；位置为每行在文件中的字节偏移"""
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, encoding=self.encoding) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def iter_offsets(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with open(self.path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    return
+                line = line.decode(self.encoding).strip()
+                if line:
+                    yield offset, json.loads(line)
+
+    def read_at(self, offset: int) -> Dict[str, Any]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            line = f.readline().decode(self.encoding).strip()
+        if not line:
+            raise IndexError(f"{self.path} 偏移 {offset} 处没有账号")
+        return json.loads(line)
+
+
+def open_account_source(name: str, key: str = "accounts") -> AccountSource:
+    """
+    根据名称创建账号数据源：
+    - 以 .csv / .jsonl / .yaml / .yml 结尾：当作文件路径（相对路径以 project_interface 为根），
+      YAML 文件取其中 key 对应的列表
+    - 其他：当作 config.yaml 中的字段名，例如 "accounts"、"valid_accounts"
+    """
+    if not name.endswith(FILE_SUFFIXES):
+        return YamlAccountSource(name)
+    path = name if os.path.isabs(name) else os.path.join(ROOT, name)
+    if name.endswith(".csv"):
+        return CsvAccountSource(path)
+    if name.endswith(".jsonl"):
+        return JsonlAccountSource(path)
+    return YamlAccountSource(key, path)
+
+
+async def for_each_account(source: AccountSource, func: Callable[[Dict[str, Any]], Awaitable[None]],
+                           concurrency: int = 100) -> None:
+    """
+    边读账号边执行 func，同时最多 concurrency 个在途，任意一个失败时取消其余并抛出异常。
+    """
+    pending = set()
+    try:
+        async for account in source:
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            pending.add(asyncio.create_task(func(account)))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,20 +1,262 @@
+import time
+import json as stdlib_json
+import logging
+import asyncio
+import contextvars
+import itertools
+import threading
 import requests
-from typing import Optional, Dict, Any
+import httpx
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, as_completed
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterable, Iterator, AsyncIterable, AsyncIterator, Union
+from requests.adapters import HTTPAdapter
+from src.metrics import MetricsRecorder
+from src.login_cache import LoginKeyCache
+from src.deadline import DeadlineExceeded, current_deadline, request_timeout
+from src.account_pool import current_lease
 
-class ApiClient:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+# 对冲请求：至少积累这么多样本后才用观测到的 p95 作为对冲等待时间
+HEDGE_MIN_SAMPLES = 20
+
+# 服务端拒绝 loginKey（未登录/已失效）时返回的状态码，HTTP 状态码或响应体里的 code 命中任意一个即视为被拒绝
+LOGIN_REJECTED_CODES = (401, 403)
+
+
+def is_login_rejected(status_code: int, body: Any) -> bool:
+    if status_code in LOGIN_REJECTED_CODES:
+        return True
+    return isinstance(body, dict) and body.get("code") in LOGIN_REJECTED_CODES
+
+
+# ---------- JSON 编解码 ----------
+# 字段结构：只解码断言需要的字段，None 表示叶子字段，dict 表示嵌套对象
+LOGIN_FIELDS = {"code": None, "message": None, "data": {"loginKey": None, "message": None}}
+ORDER_FIELDS = {"code": None, "message": None, "data": {"reserveOrder": {"innerOrderNo": None}}}
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+
+def _project(data: Any, fields: Dict[str, Any]) -> Any:
+    """按字段结构从完整解码的结果里挑出需要的字段"""
+    if not isinstance(data, dict):
+        return data
+    result = {}
+    for key, sub_fields in fields.items():
+        if key in data:
+            value = data[key]
+            result[key] = value if sub_fields is None else _project(value, sub_fields)
+    return result
+
+
+class JsonCodec:
+    """
+    标准库 json 编解码，也是其他编解码器的基类：
+    - dumps: 对象 -> bytes（紧凑格式，保留中文）
+    - loads: bytes -> 对象
+    - decode: 只返回 fields 指定的字段；标准库和 orjson 需要完整解码后再挑选
+    """
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return stdlib_json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return stdlib_json.loads(data)
+
+    def decode(self, data: bytes, fields: Optional[Dict[str, Any]] = None) -> Any:
+        obj = self.loads(data)
+        return obj if fields is None else _project(obj, fields)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    """msgspec 可以按类型定义只解码需要的字段，跳过其余内容，大响应体时最省 CPU"""
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._partial_decoders: Dict[int, Any] = {}
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self._decoder.decode(data)
+
+    @staticmethod
+    def _struct_type(fields: Dict[str, Any], name: str = "Partial"):
+        # 字段结构 -> msgspec.Struct 类型；缺失的字段为 UNSET，to_builtins 时会被去掉，与完整解码的结果一致
+        annotations = []
+        for key, sub_fields in fields.items():
+            if sub_fields is None:
+                annotations.append((key, Any, msgspec.UNSET))
+            else:
+                sub_type = MsgspecCodec._struct_type(sub_fields, f"{name}_{key}")
+                annotations.append((key, Union[sub_type, None, msgspec.UnsetType], msgspec.UNSET))
+        return msgspec.defstruct(name, annotations)
+
+    def decode(self, data: bytes, fields: Optional[Dict[str, Any]] = None) -> Any:
+        if fields is None:
+            return self.loads(data)
+        decoder = self._partial_decoders.get(id(fields))
+        if decoder is None:
+            decoder = self._partial_decoders[id(fields)] = msgspec.json.Decoder(self._struct_type(fields))
+        try:
+            return msgspec.to_builtins(decoder.decode(data))
+        except msgspec.ValidationError:
+            # 响应结构与预期不符（例如顶层不是对象），退回完整解码
+            return _project(self.loads(data), fields)
+
+
+def default_codec() -> JsonCodec:
+    """
+    优先使用 msgspec（支持只解码部分字段），其次 orjson，都没有安装时用标准库 json
+    """
+    if msgspec is not None:
+        return MsgspecCodec()
+    if orjson is not None:
+        return OrjsonCodec()
+    return JsonCodec()
+
+
+@dataclass
+class OrderResult:
+    """批量下单时单个订单的结果：index 为订单在输入序列中的序号，失败时 error 为异常信息"""
+    index: int
+    inner_order_no: Optional[str]
+    latency: float
+    error: Optional[str] = None
+
+
+def _order_result(index: int, start: float, order_json: Optional[dict] = None,
+                  error: Optional[BaseException] = None) -> OrderResult:
+    latency = time.perf_counter() - start
+    if error is not None:
+        return OrderResult(index, None, latency, f"{type(error).__name__}: {error}")
+    reserve_order = (order_json.get("data") or {}).get("reserveOrder") or {}
+    inner_order_no = reserve_order.get("innerOrderNo")
+    if not inner_order_no:
+        return OrderResult(index, None, latency, f"订单返回缺少innerOrderNo: {order_json}")
+    return OrderResult(index, inner_order_no, latency)
+
+
+class _RequestPolicyMixin:
+    """
+    ApiClient / AsyncApiClient 共用的部分：对冲、时间预算相关的计数和等待时间计算。
+    使用方需要提供 counters、metrics、hedge_delay、codec、partial_decode 属性。
+    """
+
+    def decode(self, resp, fields: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        用客户端的编解码器解析响应体；partial_decode=True 时只解码 fields 指定的字段
+        """
+        if self.partial_decode and fields is not None:
+            return self.codec.decode(resp.content, fields)
+        return self.codec.loads(resp.content)
+
+    def _decode_order(self, resp) -> Any:
+        """解码下单响应（ORDER_FIELDS 含 code，同一个结果也用于判断 loginKey 是否被拒绝）；不是合法 JSON 时返回 None"""
+        try:
+            return self.decode(resp, ORDER_FIELDS)
+        except ValueError:
+            return None
+
+    def _log_login_response(self, resp):
+        # 只有开启 DEBUG 日志时才读取 resp.text，避免压测时每次都解码完整响应
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("登录接口返回：%s %s", resp.status_code, resp.text)
+
+    def _count(self, name: str):
+        self.counters[name] += 1
+        if self.metrics is not None:
+            self.metrics.incr(name)
+
+    def _raise_if_deadline_exceeded(self, error: Exception):
+        """请求超时且是因为时间预算用完，统一转成 DeadlineExceeded"""
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired():
+            self._count("deadlines_exceeded")
+            raise DeadlineExceeded(f"时间预算 {deadline.budget:.3f}s 已用完") from error
+
+    def _hedge_after(self, path: str, hedge_after: Optional[float]) -> float:
+        """对冲等待时间：显式传入优先，其次用该接口观测到的 p95，样本不足时用 hedge_delay"""
+        if hedge_after is not None:
+            return hedge_after
+        if self.metrics is not None:
+            p95 = self.metrics.percentile(path, 95, min_samples=HEDGE_MIN_SAMPLES)
+            if p95 is not None:
+                return p95 / 1_000_000
+        return self.hedge_delay
+
+
+class ApiClient(_RequestPolicyMixin):
     """
     简单API客户端：
     - 管理base_url
     - 请求封装get/post,自动带上loginKey
     - 登录接口获取 loginkey
+    - 传入 metrics 时按接口路径记录每个请求的耗时、错误数和字节数
+    - 传入 login_cache 时 ensure_login 复用缓存的 loginKey，被服务端拒绝时自动重新登录
+    - 每个请求默认 timeout 秒超时；在 Deadline 范围内取剩余预算和默认超时中较小的
+    - get(..., hedge=True) 对幂等读请求做对冲：超过观测到的 p95 还没返回就再发一个，取先返回的
+    - 请求体和响应体用 codec 编解码（默认自动选择 msgspec/orjson/标准库），
+      partial_decode=True 时 login/create_order 只解码断言需要的字段
+    - 传入 recorder（TrafficRecorder）时把每个请求追加写入录制文件，之后可以用 TrafficReplayer 回放
+    - pool_maxsize 为连接池大小，create_orders 的并发数较大时同时调大
     """
 
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, metrics: Optional[MetricsRecorder] = None,
+                 login_cache: Optional[LoginKeyCache] = None,
+                 timeout: Optional[float] = 10.0, hedge_delay: float = 0.2,
+                 codec: Optional[JsonCodec] = None, partial_decode: bool = False, recorder=None,
+                 pool_maxsize: int = 10):
         self.base_url = base_url.rstrip('/')
+        self.codec = codec or default_codec()
+        self.partial_decode = partial_decode
         self.session = requests.Session()
+        # 连接池在创建 session 时一次定好大小；create_orders 的并发数超过它时多出的连接用完即丢弃
+        self.pool_maxsize = pool_maxsize
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.login_key: Optional[str] = None
+        self.metrics = metrics
+        self.recorder = recorder
+        self.login_cache = login_cache
+        self.timeout = timeout
+        # 样本不足时的对冲等待秒数
+        self.hedge_delay = hedge_delay
+        self.counters: Dict[str, int] = {"hedges_sent": 0, "hedges_won": 0, "deadlines_exceeded": 0}
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._credentials: Optional[tuple] = None
+        # create_orders 的多个线程共用本实例：重新登录和更换 loginKey 串行执行
+        self._login_lock = threading.RLock()
+        # 最近一次真正调用登录接口的解码结果（命中 loginKey 缓存时保持 None）
+        self.login_response: Optional[Dict] = None
         self.session.headers.update({
-            "content-type":"application/json; charset=utf-8"
+            "content-type": JSON_CONTENT_TYPE
         })
 
     def _full_url(self, path: str) -> str:
@@ -23,33 +265,497 @@ class ApiClient:
         return f"{self.base_url}/{path}"
 
     def set_login_key(self, login_key: str):
-        self.login_key = login_key
-        self.session.headers.update({"loginKey": login_key})
+        # 复制后整体替换 session.headers，其他线程正在组装的请求读到的是完整的旧 headers 或新 headers
+        with self._login_lock:
+            headers = self.session.headers.copy()
+            headers["loginKey"] = login_key
+            self.session.headers = headers
+            self.login_key = login_key
+
+    @staticmethod
+    def _login_headers(login_key: Optional[str]) -> Optional[Dict[str, str]]:
+        return {"loginKey": login_key} if login_key else None
+
+    def close(self):
+        self.session.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+
+    def _timeout(self, default: Optional[float]) -> Optional[float]:
+        try:
+            return request_timeout(default)
+        except DeadlineExceeded:
+            self._count("deadlines_exceeded")
+            raise
 
-    def get(self, path: str, **kwargs) -> requests.Response:
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
         url = self._full_url(path)
-        return self.session.get(url, **kwargs)
+        if kwargs.get("json") is not None:
+            kwargs["data"] = self.codec.dumps(kwargs.pop("json"))
+        kwargs["timeout"] = self._timeout(kwargs.get("timeout", self.timeout))
+        start = time.perf_counter()
+        wall_start = time.time()
+        try:
+            resp = self.session.request(method, url, **kwargs)
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record(path, time.perf_counter() - start, error=True)
+            if self.recorder is not None:
+                headers = dict(self.session.headers, **(kwargs.get("headers") or {}))
+                self.recorder.record(method, path, headers, kwargs.get("data"), wall_start,
+                                     time.perf_counter() - start, error=type(e).__name__)
+            # 读超时有时会被 requests 包装成 ConnectionError，两种都检查时间预算
+            if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+                self._raise_if_deadline_exceeded(e)
+            raise
+        elapsed = time.perf_counter() - start
+        body = resp.request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if self.metrics is not None:
+            self.metrics.record(path, elapsed, error=resp.status_code >= 400,
+                                bytes_sent=len(body), bytes_received=len(resp.content))
+        if self.recorder is not None:
+            self.recorder.record(method, path, dict(resp.request.headers), body, wall_start, elapsed,
+                                 resp.status_code, resp.content)
+        return resp
+
+    def _hedged_request(self, method: str, path: str, hedge_after: Optional[float], **kwargs) -> requests.Response:
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="api-hedge")
+
+        def submit():
+            # 线程池不会继承 contextvars，这里带上当前上下文，让 Deadline 在对冲请求里同样生效
+            return self._hedge_executor.submit(contextvars.copy_context().run,
+                                               self._request, method, path, **kwargs)
+
+        primary = submit()
+        done, _ = wait([primary], timeout=self._hedge_after(path, hedge_after))
+        futures = [primary]
+        if not done:
+            self._count("hedges_sent")
+            futures.append(submit())
+
+        error = None
+        for future in as_completed(futures):
+            try:
+                resp = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is not primary:
+                self._count("hedges_won")
+            return resp
+        raise error
+
+    def get(self, path: str, hedge: bool = False, hedge_after: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET 请求。hedge=True 时启用对冲（只用于幂等的读请求），
+        hedge_after 为发出第二个请求前的等待秒数，不传则使用观测到的 p95。
+        """
+        if hedge:
+            return self._hedged_request("GET", path, hedge_after, **kwargs)
+        return self._request("GET", path, **kwargs)
 
     def post(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
-        url = self._full_url(path)
-        return self.session.post(url, json=json, **kwargs)
+        return self._request("POST", path, json=json, **kwargs)
 
 
     #业务接口测试
     def login(self,username,password):
         payload = {"userName": username, "password": password}
         resp = self.post("/api/admin/admin-user/login", json=payload)
-        print("登录接口返回：", resp.status_code, resp.text)  # 调试用
+        self._log_login_response(resp)  # 调试用
         resp.raise_for_status()
-        data = resp.json()
-        login_key = data.get("data",{}).get("loginKey")
+        data = self.decode(resp, LOGIN_FIELDS)
+        self.login_response = data
+        login_key = (data.get("data") or {}).get("loginKey")
         if login_key:
             self.set_login_key(login_key)
         return resp
 
+    def ensure_login(self, username, password) -> Optional[str]:
+        """
+        确保已登录：有 login_cache 时优先用缓存的 loginKey，没有才真正调用登录接口。
+        返回 loginKey（登录失败时为 None）。
+        """
+        self._credentials = (username, password)
+        if self.login_cache is None:
+            self.login(username, password)
+            return self.login_key
+
+        def do_login():
+            self.login(username, password)
+            return self.login_key
+
+        login_key = self.login_cache.get_or_login(self.base_url, username, password, do_login)
+        if login_key:
+            self.set_login_key(login_key)
+        return login_key
+
+    def _relogin_if_rejected(self, resp: requests.Response, body: Any, login_key: Optional[str] = None) -> bool:
+        """
+        loginKey 被服务端拒绝时作废缓存并重新登录，返回是否需要重发请求。
+        body 为调用方已经解码好的响应（至少包含 code），这里不再重复解码；
+        login_key 为这次请求实际携带的 loginKey（默认当前的 loginKey）。
+        多个线程同时被拒绝时只有第一个重新登录，其余线程发现 loginKey 已经换过就直接重发。
+        """
+        if self.login_cache is None or self._credentials is None:
+            return False
+        if not is_login_rejected(resp.status_code, body):
+            return False
+        with self._login_lock:
+            rejected = self.login_key if login_key is None else login_key
+            if self.login_key is not None and self.login_key != rejected:
+                return True
+            username, password = self._credentials
+            self.login_cache.invalidate(self.base_url, username, password, rejected)
+            return self.ensure_login(username, password) is not None
+
     def create_order(self,order_data):
-        resp = self.post("/api/admin/reserveOrder/create",json=order_data)
+        """
+        创建订单。order_data 可以是 dict，也可以是 PayloadTemplate.render() 生成的 bytes（直接作为请求体发送）
+        """
+        if isinstance(order_data, (bytes, bytearray)):
+            body = {"data": order_data}
+        else:
+            body = {"json": order_data}
+        # loginKey 随请求单独传入：create_orders 的其他线程重新登录时，这个请求和重发判断用的是同一个 loginKey
+        login_key = self.login_key
+        resp = self.post("/api/admin/reserveOrder/create", headers=self._login_headers(login_key), **body)
+        data = self._decode_order(resp)
+        if self._relogin_if_rejected(resp, data, login_key):
+            resp = self.post("/api/admin/reserveOrder/create", headers=self._login_headers(self.login_key), **body)
+            data = self._decode_order(resp)
         resp.raise_for_status()
-        return resp.json()
+        if data is None:
+            # 状态码正常但响应体不是合法 JSON：按原样解码一次，抛出解码错误
+            return self.decode(resp, ORDER_FIELDS)
+        return data
+
+    def _create_order_result(self, index: int, order_data) -> OrderResult:
+        start = time.perf_counter()
+        try:
+            return _order_result(index, start, self.create_order(order_data))
+        except Exception as e:
+            return _order_result(index, start, error=e)
+
+    def create_orders(self, payloads: Iterable[Union[dict, bytes]], concurrency: int = 10) -> Iterator[OrderResult]:
+        """
+        批量下单（流式）：
+        - 按需从 payloads（可以是生成器）取数据，同时最多 concurrency 个请求在途
+        - 每完成一个就 yield 一个 OrderResult（完成顺序，不是输入顺序），失败不会中断后续订单
+        - 不把全部 payload 或结果放进列表，适合一次生成几万单
+        - 连接池大小由构造参数 pool_maxsize 决定，concurrency 较大时创建 ApiClient 时一并调大
+        """
+        if concurrency > self.pool_maxsize:
+            logger.warning("create_orders 并发数 %s 大于连接池大小 %s，多出的连接会被反复创建丢弃",
+                           concurrency, self.pool_maxsize)
+
+        source = enumerate(payloads)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {executor.submit(self._create_order_result, index, data)
+                       for index, data in itertools.islice(source, concurrency)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                # 完成几个就补几个，保持在途数量不超过 concurrency
+                for index, data in itertools.islice(source, len(done)):
+                    pending.add(executor.submit(self._create_order_result, index, data))
+                for future in done:
+                    yield future.result()
+
+
+def create_async_http_client(max_connections: int = 1000,
+                             max_keepalive_connections: int = 200,
+                             keepalive_expiry: float = 30.0,
+                             http2: bool = False,
+                             timeout: float = 10.0) -> httpx.AsyncClient:
+    """
+    创建一个带连接池的 httpx.AsyncClient，供多个 AsyncApiClient 共享：
+    - max_connections: 连接池最大连接数（同时在途的请求上限）
+    - max_keepalive_connections: 空闲时保留的长连接数
+    - keepalive_expiry: 空闲长连接保留秒数
+    - http2: 是否启用 HTTP/2（需要安装 h2，即 pip install httpx[http2]）
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=http2,
+        timeout=timeout,
+        headers={"content-type": JSON_CONTENT_TYPE},
+    )
+
+
+class AsyncApiClient(_RequestPolicyMixin):
+    """
+    ApiClient 的异步版本，接口保持一致（login / set_login_key / create_order / get / post）：
+    - 底层使用 httpx.AsyncClient，多个 AsyncApiClient 可以共享同一个连接池
+    - loginKey 保存在实例自己的 headers 里，不写到共享的 client 上，避免多个用户互相覆盖
+    - 没有传入 client 时自己创建一个，并在 aclose() 时关闭
+    - 传入 metrics 时按接口路径记录每个请求的耗时、错误数和字节数
+    - 传入 login_cache 时 ensure_login 复用缓存的 loginKey，被服务端拒绝时自动重新登录
+    - 在 Deadline 范围内每个请求的超时取剩余预算和 client 默认超时中较小的，整个请求的总耗时也不超过剩余预算
+    - get(..., hedge=True) 对幂等读请求做对冲：超过观测到的 p95 还没返回就再发一个，取先返回的
+    - 编解码与 ApiClient 相同（codec / partial_decode）
+    - 在 AccountPool.lease() 范围内每个请求发出前先按账号限速，等待时间不计入请求延迟
+    - 传入 recorder 时与 ApiClient 一样录制每个请求
+    """
+
+    def __init__(self, base_url: str, client: Optional[httpx.AsyncClient] = None,
+                 metrics: Optional[MetricsRecorder] = None,
+                 login_cache: Optional[LoginKeyCache] = None,
+                 hedge_delay: float = 0.2, codec: Optional[JsonCodec] = None,
+                 partial_decode: bool = False, recorder=None, **client_kwargs):
+        self.base_url = base_url.rstrip('/')
+        self.codec = codec or default_codec()
+        self.partial_decode = partial_decode
+        self.metrics = metrics
+        self.recorder = recorder
+        self.login_cache = login_cache
+        self.hedge_delay = hedge_delay
+        self.counters: Dict[str, int] = {"hedges_sent": 0, "hedges_won": 0, "deadlines_exceeded": 0}
+        self._credentials: Optional[tuple] = None
+        # 最近一次真正调用登录接口的解码结果（命中 loginKey 缓存时保持 None）
+        self.login_response: Optional[Dict] = None
+        self._owns_client = client is None
+        self.client = client if client is not None else create_async_http_client(**client_kwargs)
+        self.login_key: Optional[str] = None
+        # 请求体由 codec 编码后以 content= 发送，Content-Type 放在实例自己的 headers 里，
+        # 传入的 client 不是 create_async_http_client 创建的也能带上
+        self.headers: Dict[str, str] = {"content-type": JSON_CONTENT_TYPE}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """只关闭自己创建的 client，共享的 client 由创建者负责关闭"""
+        if self._owns_client:
+            await self.client.aclose()
+
+    def _full_url(self, path: str) -> str:
+        if path.startswith('/'):
+            return f"{self.base_url}{path}"
+        return f"{self.base_url}/{path}"
+
+    def _merge_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        if not headers:
+            return self.headers
+        merged = dict(self.headers)
+        merged.update(headers)
+        return merged
+
+    def set_login_key(self, login_key: str):
+        self.login_key = login_key
+        self.headers["loginKey"] = login_key
+
+    def _timeout(self, default):
+        if current_deadline() is None:
+            return default
+        try:
+            timeout = request_timeout(self.client.timeout.read if default is httpx.USE_CLIENT_DEFAULT else default)
+        except DeadlineExceeded:
+            self._count("deadlines_exceeded")
+            raise
+        return timeout
+
+    async def _request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                       **kwargs) -> httpx.Response:
+        url = self._full_url(path)
+        headers = self._merge_headers(headers)
+        if kwargs.get("json") is not None:
+            kwargs["content"] = self.codec.dumps(kwargs.pop("json"))
+        lease = current_lease()
+        if lease is not None:
+            await lease.throttle()
+        kwargs["timeout"] = self._timeout(kwargs.get("timeout", httpx.USE_CLIENT_DEFAULT))
+        deadline = current_deadline()
+        start = time.perf_counter()
+        wall_start = time.time()
+        try:
+            request = self.client.request(method, url, headers=headers, **kwargs)
+            if deadline is None:
+                resp = await request
+            else:
+                # httpx 的 timeout 按单次读取计时，这里再用剩余预算限制整个请求
+                try:
+                    resp = await asyncio.wait_for(request, deadline.remaining())
+                except asyncio.TimeoutError as e:
+                    self._count("deadlines_exceeded")
+                    raise DeadlineExceeded(f"时间预算 {deadline.budget:.3f}s 已用完") from e
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record(path, time.perf_counter() - start, error=True)
+            if self.recorder is not None:
+                self.recorder.record(method, path, headers, kwargs.get("content"), wall_start,
+                                     time.perf_counter() - start, error=type(e).__name__)
+            if isinstance(e, httpx.TimeoutException):
+                self._raise_if_deadline_exceeded(e)
+            raise
+        elapsed = time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.record(path, elapsed, error=resp.status_code >= 400,
+                                bytes_sent=len(resp.request.content), bytes_received=len(resp.content))
+        if self.recorder is not None:
+            self.recorder.record(method, path, dict(resp.request.headers), resp.request.content, wall_start,
+                                 elapsed, resp.status_code, resp.content)
+        return resp
+
+    async def _hedged_request(self, method: str, path: str, hedge_after: Optional[float], **kwargs) -> httpx.Response:
+        primary = asyncio.create_task(self._request(method, path, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=self._hedge_after(path, hedge_after))
+        pending = {primary}
+        if not done:
+            self._count("hedges_sent")
+            pending.add(asyncio.create_task(self._request(method, path, **kwargs)))
+
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is not primary:
+                        self._count("hedges_won")
+                    return task.result()
+            raise error
+        finally:
+            # 取消还没返回的那个请求
+            for task in pending:
+                task.cancel()
+
+    async def get(self, path: str, headers: Optional[Dict[str, str]] = None, hedge: bool = False,
+                  hedge_after: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        GET 请求。hedge=True 时启用对冲（只用于幂等的读请求），
+        hedge_after 为发出第二个请求前的等待秒数，不传则使用观测到的 p95。
+        """
+        if hedge:
+            return await self._hedged_request("GET", path, hedge_after, headers=headers, **kwargs)
+        return await self._request("GET", path, headers=headers, **kwargs)
+
+    async def post(self, path: str, json: Optional[Dict[str, Any]] = None,
+                   headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+        return await self._request("POST", path, json=json, headers=headers, **kwargs)
+
+
+    #业务接口测试
+    async def login(self, username, password):
+        payload = {"userName": username, "password": password}
+        resp = await self.post("/api/admin/admin-user/login", json=payload)
+        self._log_login_response(resp)
+        resp.raise_for_status()
+        data = self.decode(resp, LOGIN_FIELDS)
+        self.login_response = data
+        login_key = (data.get("data") or {}).get("loginKey")
+        if login_key:
+            self.set_login_key(login_key)
+        return resp
+
+    async def ensure_login(self, username, password) -> Optional[str]:
+        """
+        确保已登录：有 login_cache 时优先用缓存的 loginKey，
+        同一账号的并发调用共享同一次登录。返回 loginKey（登录失败时为 None）。
+        """
+        self._credentials = (username, password)
+        if self.login_cache is None:
+            await self.login(username, password)
+            return self.login_key
+
+        async def do_login():
+            await self.login(username, password)
+            return self.login_key
+
+        login_key = await self.login_cache.aget_or_login(self.base_url, username, password, do_login)
+        if login_key:
+            self.set_login_key(login_key)
+        return login_key
+
+    async def _relogin_if_rejected(self, resp: httpx.Response, body: Any) -> bool:
+        """
+        loginKey 被服务端拒绝时作废缓存并重新登录，返回是否需要重发请求。
+        body 为调用方已经解码好的响应（至少包含 code），这里不再重复解码。
+        """
+        if self.login_cache is None or self._credentials is None:
+            return False
+        if not is_login_rejected(resp.status_code, body):
+            return False
+        username, password = self._credentials
+        self.login_cache.invalidate(self.base_url, username, password, self.login_key)
+        return await self.ensure_login(username, password) is not None
+
+    async def create_order(self, order_data):
+        """
+        创建订单。order_data 可以是 dict，也可以是 PayloadTemplate.render() 生成的 bytes（直接作为请求体发送）
+        """
+        if isinstance(order_data, (bytes, bytearray)):
+            body = {"content": order_data}
+        else:
+            body = {"json": order_data}
+        resp = await self.post("/api/admin/reserveOrder/create", **body)
+        data = self._decode_order(resp)
+        if await self._relogin_if_rejected(resp, data):
+            resp = await self.post("/api/admin/reserveOrder/create", **body)
+            data = self._decode_order(resp)
+        resp.raise_for_status()
+        if data is None:
+            # 状态码正常但响应体不是合法 JSON：按原样解码一次，抛出解码错误
+            return self.decode(resp, ORDER_FIELDS)
+        return data
+
+    async def _create_order_result(self, index: int, order_data) -> OrderResult:
+        start = time.perf_counter()
+        try:
+            return _order_result(index, start, await self.create_order(order_data))
+        except Exception as e:
+            return _order_result(index, start, error=e)
+
+    async def create_orders(self, payloads: Union[Iterable[Union[dict, bytes]], AsyncIterable[Union[dict, bytes]]],
+                            concurrency: int = 100) -> AsyncIterator[OrderResult]:
+        """
+        批量下单（流式，异步版本）：
+        - payloads 可以是普通迭代器/生成器，也可以是异步生成器，按需读取
+        - 同时最多 concurrency 个请求在途，每完成一个就 yield 一个 OrderResult
+        """
+        if isinstance(payloads, AsyncIterable):
+            source = payloads.__aiter__()
+        else:
+            source = _aiter_sync(payloads)
+
+        index = 0
+        exhausted = False
+        pending = set()
+        try:
+            while True:
+                # 补满在途请求
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        data = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.create_task(self._create_order_result(index, data)))
+                    index += 1
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # 调用方提前停止迭代时，取消还在途的请求
+            for task in pending:
+                task.cancel()
 
 
+async def _aiter_sync(iterable: Iterable) -> AsyncIterator:
+    for item in iterable:
+        yield item
@@ -0,0 +1,94 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+import yaml
+
+# 有 libyaml 时用 C 实现的 Loader，解析速度快一个数量级；没有则退回纯 Python 实现
+try:
+    _YamlLoader = yaml.CSafeLoader
+except AttributeError:
+    _YamlLoader = yaml.SafeLoader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG_PATH = os.path.join(ROOT, "config", "config.yaml")
+
+
+class _CacheEntry:
+    __slots__ = ("stat_key", "digest", "data")
+
+    def __init__(self, stat_key, digest: str, data: Dict[str, Any]):
+        self.stat_key = stat_key
+        self.digest = digest
+        self.data = data
+
+
+# 进程内缓存：文件路径 -> 解析结果
+_cache: Dict[str, _CacheEntry] = {}
+
+# 本进程实际解析 YAML 的次数（用于确认 xdist worker 使用了主进程的快照）
+_parse_count = 0
+
+
+def _stat_key(path: str):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    加载 config.yaml（全项目唯一的入口，conftest.py / testdata.py 都从这里取）：
+    - 文件的修改时间和大小没变时直接返回缓存，不读文件
+    - 修改时间变了但内容 hash 没变（例如 touch、重新 checkout），也不重新解析
+    - 返回的字典在调用方之间共享，只读使用，不要修改
+    """
+    path = os.path.abspath(path or DEFAULT_CONFIG_PATH)
+    stat_key = _stat_key(path)
+    entry = _cache.get(path)
+    if entry is not None and entry.stat_key == stat_key:
+        return entry.data
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha1(raw).hexdigest()
+    if entry is not None and entry.digest == digest:
+        entry.stat_key = stat_key
+        return entry.data
+
+    global _parse_count
+    _parse_count += 1
+    data = yaml.load(raw.decode("utf-8"), Loader=_YamlLoader) or {}
+    _cache[path] = _CacheEntry(stat_key, digest, data)
+    return data
+
+
+def snapshot(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    生成配置快照（只含基础类型，可以通过 xdist 的 workerinput 传给 worker 进程），
+    worker 用 install_snapshot 装入后，收集用例时不需要再解析 YAML。
+    """
+    path = os.path.abspath(path or DEFAULT_CONFIG_PATH)
+    data = load_config(path)
+    entry = _cache[path]
+    return {"path": path, "stat_key": list(entry.stat_key), "digest": entry.digest, "data": data}
+
+
+def install_snapshot(snap: Dict[str, Any]) -> bool:
+    """
+    装入主进程传来的配置快照。文件在此期间被修改过（修改时间或大小不一致）时忽略快照，
+    返回是否装入成功。
+    """
+    path = snap["path"]
+    try:
+        stat_key = _stat_key(path)
+    except OSError:
+        return False
+    if list(stat_key) != list(snap["stat_key"]):
+        return False
+    _cache[path] = _CacheEntry(stat_key, snap["digest"], snap["data"])
+    return True
+
+
+def parse_count() -> int:
+    """返回本进程解析 YAML 的次数"""
+    return _parse_count
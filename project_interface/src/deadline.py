@@ -0,0 +1,71 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """整个流程的时间预算已用完"""
+
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("current_deadline", default=None)
+
+
+class Deadline:
+    """
+    跨多个请求的时间预算（秒），例如 登录 + 下单 必须在 2 秒内完成：
+        with Deadline(2.0):
+            client.ensure_login(...)
+            client.create_order(...)
+    - 预算从进入 with 时开始计算（创建后晚些再进入不会少算）
+    - 作用范围内 ApiClient / AsyncApiClient 的每个请求超时都取 min(客户端默认超时, 剩余预算)，见 request_timeout
+    - AsyncApiClient 用剩余预算限制整个请求的总耗时；ApiClient（requests）只能限制单次连接 / 读取，
+      服务端持续慢慢返回数据时单个请求可能超出预算，请求结束后的下一个请求会直接抛 DeadlineExceeded
+    - 预算用完后再发请求直接抛 DeadlineExceeded，不再等待
+    - 基于 contextvars，asyncio 的每个任务各自独立；嵌套时取更早到期的那个
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        # 进入 with 时才确定到期时间
+        self.expires_at: Optional[float] = None
+        self._token = None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return self.budget
+        return self.expires_at - time.perf_counter()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def __enter__(self) -> "Deadline":
+        self.expires_at = time.perf_counter() + self.budget
+        outer = _current_deadline.get()
+        if outer is not None and outer.expires_at < self.expires_at:
+            self.expires_at = outer.expires_at
+        self._token = _current_deadline.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_deadline.reset(self._token)
+        self._token = None
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def request_timeout(default: Optional[float]) -> Optional[float]:
+    """
+    计算本次请求的超时：没有 Deadline 时用默认值，有则取剩余预算和默认值中较小的。
+    预算已用完时抛 DeadlineExceeded。
+    返回值作为 timeout 传给 requests / httpx，它们按单次连接、单次读取计时，不是整个请求的总耗时上限；
+    需要限制总耗时时由调用方另外控制（AsyncApiClient 用 asyncio.wait_for）。
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"时间预算 {deadline.budget:.3f}s 已用完")
+    return remaining if default is None else min(default, remaining)
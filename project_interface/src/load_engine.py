@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from src.account_pool import AccountPool
+from src.client_use import AsyncApiClient
+from src.deadline import Deadline
+from src.login_cache import LoginKeyCache
+from src.metrics import LatencyHistogram, MetricsRecorder
+
+
+# 场景函数：接收一个账号，执行一次完整流程（例如 登录 + 下单）
+Scenario = Callable[[dict], Awaitable[None]]
+
+
+def arrival_offsets(target_rps: float, ramp_up: float, duration: float) -> Iterable[float]:
+    """
+    按开放模型生成每个请求的计划开始时间（相对压测开始的秒数）：
+    - ramp_up 秒内到达速率从 0 线性增加到 target_rps
+    - 之后以 target_rps 保持 duration 秒
+    第 i 个请求的时间由累计到达数 N(t)=i 反推，保证速率曲线精确。
+    """
+    if target_rps <= 0:
+        return
+    ramp_count = target_rps * ramp_up / 2
+    total = int(ramp_count + target_rps * duration)
+    for i in range(total):
+        if i < ramp_count:
+            yield math.sqrt(2 * ramp_up * i / target_rps)
+        else:
+            yield ramp_up + (i - ramp_count) / target_rps
+
+
+@dataclass
+class LoadResult:
+    """
+    一次压测的结果：
+    - latencies: 从“计划开始时间”算起的耗时，包含排队等待，避免协调遗漏
+    - service_times: 从真正发出请求算起的耗时，只反映服务端处理时间
+    两者都用直方图记录，内存占用与请求数无关。
+    """
+    scheduled: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    latencies: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service_times: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, latency: float, service_time: float, error: Optional[BaseException] = None):
+        self.latencies.record_seconds(latency)
+        self.service_times.record_seconds(service_time)
+        if error is None:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def merge(self, other: "LoadResult"):
+        self.scheduled += other.scheduled
+        self.succeeded += other.succeeded
+        self.failed += other.failed
+        self.elapsed = max(self.elapsed, other.elapsed)
+        self.latencies.merge(other.latencies)
+        self.service_times.merge(other.service_times)
+        for name, count in other.errors.items():
+            self.errors[name] = self.errors.get(name, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scheduled": self.scheduled,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "latencies": self.latencies.to_dict(),
+            "service_times": self.service_times.to_dict(),
+            "errors": dict(self.errors),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LoadResult":
+        return cls(
+            scheduled=data["scheduled"],
+            succeeded=data["succeeded"],
+            failed=data["failed"],
+            elapsed=data["elapsed"],
+            latencies=LatencyHistogram.from_dict(data["latencies"]),
+            service_times=LatencyHistogram.from_dict(data["service_times"]),
+            errors=dict(data["errors"]),
+        )
+
+    def summary(self) -> Dict[str, float]:
+        """吞吐量以及延迟百分位数（毫秒）"""
+        completed = self.succeeded + self.failed
+        return {
+            "scheduled": self.scheduled,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "throughput": completed / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": self.latencies.percentile(50) / 1000,
+            "p90_ms": self.latencies.percentile(90) / 1000,
+            "p99_ms": self.latencies.percentile(99) / 1000,
+            "p99.9_ms": self.latencies.percentile(99.9) / 1000,
+            "max_ms": self.latencies.max / 1000,
+            "service_p50_ms": self.service_times.percentile(50) / 1000,
+            "service_p99_ms": self.service_times.percentile(99) / 1000,
+        }
+
+
+class LoadEngine:
+    """
+    开放模型压测引擎：
+    - 按目标到达速率（target_rps）调度请求，支持 ramp_up 预热和 duration 保持时长
+    - max_concurrency 限制同时在途的流程数；达到上限时后续请求排队，
+      排队时间计入延迟（延迟从计划开始时间计算），这样后端变慢时不会被“协调遗漏”掩盖
+    - accounts 传入 AccountPool 时每个流程先租用账号，按账号限制并发和请求速率（长时间压测用）；
+      等待租用的时间计入延迟，不计入 service_times
+    """
+
+    def __init__(self, scenario: Scenario, accounts: Union[List[dict], AccountPool], target_rps: float,
+                 ramp_up: float = 0.0, duration: float = 10.0, max_concurrency: int = 100):
+        if not accounts:
+            raise ValueError("accounts 不能为空")
+        self.scenario = scenario
+        self.accounts = accounts
+        self.target_rps = target_rps
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.max_concurrency = max_concurrency
+
+    async def _run_one(self, account: Optional[dict], scheduled_at: float, semaphore: asyncio.Semaphore,
+                       result: LoadResult):
+        started = time.perf_counter()
+        error = None
+        try:
+            if account is None:
+                async with self.accounts.lease() as lease:
+                    started = time.perf_counter()
+                    await self.scenario(lease.account)
+            else:
+                await self.scenario(account)
+        except Exception as e:
+            error = e
+        finally:
+            finished = time.perf_counter()
+            semaphore.release()
+            result.record(finished - scheduled_at, finished - started, error)
+
+    async def run(self) -> LoadResult:
+        result = LoadResult()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 账号池在 _run_one 里租用账号，这里不分配
+        pooled = isinstance(self.accounts, AccountPool)
+        accounts = itertools.repeat(None) if pooled else itertools.cycle(self.accounts)
+        tasks = set()
+        begin = time.perf_counter()
+
+        for offset in arrival_offsets(self.target_rps, self.ramp_up, self.duration):
+            scheduled_at = begin + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # 达到并发上限时在这里排队，耗时仍从 scheduled_at 开始计算
+            await semaphore.acquire()
+            result.scheduled += 1
+            task = asyncio.create_task(self._run_one(next(accounts), scheduled_at, semaphore, result))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        result.elapsed = time.perf_counter() - begin
+        return result
+
+
+def login_and_order_scenario(base_url: str, http_client, payload_factory: Callable[[dict], Any],
+                             metrics: Optional[MetricsRecorder] = None,
+                             login_cache: Optional[LoginKeyCache] = None,
+                             flow_deadline: Optional[float] = None) -> Scenario:
+    """
+    生成 登录 -> 下单 流程的场景函数，所有虚拟用户共享同一个 httpx 连接池。
+    :param payload_factory: 根据账号生成订单数据（dict 或 bytes），例如 lambda acc: get_order_body_by_index(acc["order_index"])
+    :param metrics: 传入时按接口记录每个请求的延迟
+    :param login_cache: 传入时复用缓存的 loginKey，压测流量只包含下单，不被登录请求干扰
+    :param flow_deadline: 整个 登录 + 下单 流程的时间预算（秒），超出抛 DeadlineExceeded
+    """
+    async def scenario(account: dict):
+        if flow_deadline is None:
+            await run_flow(account)
+        else:
+            with Deadline(flow_deadline):
+                await run_flow(account)
+
+    async def run_flow(account: dict):
+        client = AsyncApiClient(base_url, client=http_client, metrics=metrics, login_cache=login_cache,
+                                partial_decode=True)
+        await client.ensure_login(account["userName"], account["password"])
+        if not client.login_key:
+            raise RuntimeError(f"{account['userName']} 登录成功但未返回 loginKey")
+        order_json = await client.create_order(payload_factory(account))
+        reserve_order = (order_json.get("data") or {}).get("reserveOrder") or {}
+        if not reserve_order.get("innerOrderNo"):
+            raise RuntimeError(f"{account['userName']} 订单返回缺少innerOrderNo: {order_json}")
+
+    return scenario
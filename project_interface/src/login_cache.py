@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _acquire_file_lock(lock_path: str):
+    """拿到跨进程文件锁，返回需要传给 _release_file_lock 的文件对象"""
+    f = open(lock_path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            # LK_LOCK 最多重试 10 秒，这里循环直到拿到锁
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def _release_file_lock(f):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
+
+
+def _release_when_acquired(task: "asyncio.Future"):
+    """等锁的协程被取消后，线程稍后才拿到锁时的回调：直接释放"""
+    if not task.cancelled() and task.exception() is None:
+        _release_file_lock(task.result())
+
+
+class _LoginCancelled(Exception):
+    """正在进行的异步登录被取消：通知等待同一账号的协程由下一个接手登录（不把 CancelledError 传给它们）"""
+
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """跨进程文件锁（pytest-xdist 的多个 worker 之间互斥），POSIX 用 fcntl，Windows 用 msvcrt"""
+    f = _acquire_file_lock(lock_path)
+    try:
+        yield
+    finally:
+        _release_file_lock(f)
+
+
+class LoginKeyCache:
+    """
+    loginKey 磁盘缓存：
+    - 按 base_url + 账号 + 密码摘要 缓存，带 TTL，过期后重新登录（密码改了或写错时不会命中旧的 loginKey）
+    - 每个账号一个 JSON 文件，写入用临时文件 + os.replace，读到的永远是完整内容
+    - 登录时持有账号级文件锁（异步版本在线程里等锁，不阻塞事件循环），多个 xdist worker 同时要同一个账号只会登录一次
+    - 同一进程内并发请求同一个账号时共享一次正在进行的登录
+    - 只有服务端拒绝（invalidate）或 TTL 过期时才会重新登录
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = 1800.0):
+        self.cache_dir = str(cache_dir)
+        self.ttl = ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._memory: Dict[str, Dict] = {}
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._thread_locks_guard = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def cache_key(base_url: str, username: str, password: str) -> str:
+        password_digest = hashlib.sha256(str(password).encode("utf-8")).hexdigest()
+        return hashlib.sha1(f"{base_url.rstrip('/')}|{username}|{password_digest}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.lock")
+
+    def _valid(self, entry: Optional[Dict]) -> bool:
+        return bool(entry) and entry.get("expires_at", 0) > time.time()
+
+    def _read(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if not self._valid(entry):
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if not self._valid(entry):
+                return None
+            self._memory[key] = entry
+        return entry["loginKey"]
+
+    def _write(self, key: str, login_key: str):
+        entry = {"loginKey": login_key, "expires_at": time.time() + self.ttl}
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+        self._memory[key] = entry
+
+    def _thread_lock(self, key: str) -> threading.Lock:
+        with self._thread_locks_guard:
+            lock = self._thread_locks.get(key)
+            if lock is None:
+                lock = self._thread_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, base_url: str, username: str, password: str) -> Optional[str]:
+        """只查缓存，不登录；没有或已过期返回 None"""
+        return self._read(self.cache_key(base_url, username, password))
+
+    def invalidate(self, base_url: str, username: str, password: str, login_key: Optional[str] = None):
+        """
+        服务端拒绝 loginKey 时调用，删除缓存。
+        传入 login_key 时只有缓存中的值与它相同才删除，避免把别人刚刷新的新 key 删掉。
+        """
+        key = self.cache_key(base_url, username, password)
+        with _file_lock(self._lock_path(key)):
+            current = self._read(key)
+            if login_key is not None and current is not None and current != login_key:
+                return
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get_or_login(self, base_url: str, username: str, password: str,
+                     login_fn: Callable[[], Optional[str]]) -> Optional[str]:
+        """
+        同步版本：缓存命中直接返回，否则调用 login_fn() 登录并写入缓存。
+        线程锁 + 文件锁保证同一账号同时只有一个登录在进行。
+        """
+        key = self.cache_key(base_url, username, password)
+        login_key = self._read(key)
+        if login_key:
+            return login_key
+        with self._thread_lock(key), _file_lock(self._lock_path(key)):
+            # 拿到锁后再查一次，其他线程/进程可能已经登录过了
+            login_key = self._read(key)
+            if login_key:
+                return login_key
+            login_key = login_fn()
+            if login_key:
+                self._write(key, login_key)
+            return login_key
+
+    async def aget_or_login(self, base_url: str, username: str, password: str,
+                            login_fn: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """
+        异步版本：同一事件循环里并发请求同一账号时，只有第一个真正登录，其余等待同一个结果；
+        第一个登录的协程被取消时，等待者中的下一个接手登录，其余继续等待它的结果。
+        跨进程和同步版本一样持有账号级文件锁（在线程里等锁，不阻塞事件循环），拿到锁后再查一次缓存。
+        文件读写很小，直接在事件循环里做。
+        """
+        key = self.cache_key(base_url, username, password)
+        login_key = self._read(key)
+        if login_key:
+            return login_key
+
+        future = self._inflight.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LoginCancelled:
+                # 登录的协程被取消（登录可能已经完成并写入缓存），再查一次缓存，没有则由当前协程接手
+                login_key = self._read(key)
+                if login_key:
+                    return login_key
+                future = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            lock_task = asyncio.ensure_future(asyncio.to_thread(_acquire_file_lock, self._lock_path(key)))
+            try:
+                lock_file = await asyncio.shield(lock_task)
+            except asyncio.CancelledError:
+                # 线程里的等锁无法中断，拿到锁后立即释放，避免锁文件一直被占用
+                lock_task.add_done_callback(_release_when_acquired)
+                raise
+            try:
+                # 拿到锁后再查一次，其他进程可能已经登录过了
+                login_key = self._read(key)
+                if not login_key:
+                    login_key = await login_fn()
+                    if login_key:
+                        self._write(key, login_key)
+            finally:
+                _release_file_lock(lock_file)
+            future.set_result(login_key)
+            return login_key
+        except asyncio.CancelledError:
+            # 只取消当前协程，等待者收到 _LoginCancelled 后接手登录
+            future.set_exception(_LoginCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时取一下异常，避免 “exception was never retrieved” 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
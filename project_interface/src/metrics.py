@@ -0,0 +1,272 @@
+import threading
+from typing import Any, Dict, Optional
+
+
+# 每个数量级（2 的幂）内的子桶位数：2^10 个子桶，相对误差约 0.1%
+SUB_BUCKET_BITS = 10
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+
+def _bucket_index(value: int) -> int:
+    """
+    HDR 风格的对数-线性分桶：
+    - 小于 2*SUB_BUCKET_COUNT 的值每个整数一个桶（精确）
+    - 更大的值按 2 的幂分段，每段再均分为 SUB_BUCKET_COUNT 个子桶
+    只用到位运算，记录一次的开销是常数级。
+    """
+    if value < 2 * SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKET_COUNT + ((value >> shift) - SUB_BUCKET_COUNT)
+
+
+def _bucket_value(index: int) -> int:
+    """桶的代表值（桶内上界），用于计算百分位数"""
+    if index < 2 * SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_COUNT - 1
+    sub = index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+    return ((sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    低开销的延迟直方图（单位：微秒）：
+    - 稀疏字典存桶计数，内存只与出现过的延迟种类有关，与请求数无关
+    - 支持 merge 合并多个任务/进程的结果，支持 to_dict/from_dict 跨进程传输
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self.sum = 0
+
+    def record(self, value_us: int):
+        if value_us < 0:
+            value_us = 0
+        index = _bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if self.total == 0 or value_us < self.min:
+            self.min = value_us
+        if value_us > self.max:
+            self.max = value_us
+        self.total += 1
+        self.sum += value_us
+
+    def record_seconds(self, seconds: float):
+        self.record(int(seconds * 1_000_000))
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.total == 0:
+            return
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.min = other.min if self.total == 0 else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        self.sum += other.sum
+
+    def percentile(self, pct: float) -> int:
+        """返回百分位数（微秒），例如 percentile(99.9)"""
+        if self.total == 0:
+            return 0
+        target = max(1, int(pct / 100 * self.total + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(_bucket_value(index), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": dict(self.counts), "total": self.total, "min": self.min, "max": self.max, "sum": self.sum}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        hist = cls()
+        # JSON 传输后字典的 key 会变成字符串，这里统一转回 int
+        hist.counts = {int(k): v for k, v in data["counts"].items()}
+        hist.total = data["total"]
+        hist.min = data["min"]
+        hist.max = data["max"]
+        hist.sum = data["sum"]
+        return hist
+
+
+class EndpointStats:
+    """单个接口的统计：延迟直方图 + 错误数 + 收发字节数"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def merge(self, other: "EndpointStats"):
+        self.histogram.merge(other.histogram)
+        self.errors += other.errors
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "histogram": self.histogram.to_dict(),
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EndpointStats":
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.errors = data["errors"]
+        stats.bytes_sent = data["bytes_sent"]
+        stats.bytes_received = data["bytes_received"]
+        return stats
+
+
+class MetricsRecorder:
+    """
+    按接口路径（例如 /api/admin/admin-user/login）汇总请求指标。
+    ApiClient / AsyncApiClient 传入 metrics 后，每个请求都会自动记录到这里。
+    多个任务或进程各自记录，结束时用 merge 合并成一份报告。
+    counters 记录与具体接口无关的计数，例如 hedges_sent / hedges_won。
+    waits 记录不属于任何接口的等待时间（例如账号池的等待租用 / 等待限速），单独成节，不混进接口报告。
+    ApiClient.create_orders 等会在多个线程里同时记录，读写都持有同一把锁。
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.waits: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.RLock()
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record(self, endpoint: str, seconds: float, error: bool = False,
+               bytes_sent: int = 0, bytes_received: int = 0):
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats.histogram.record(int(seconds * 1_000_000))
+            if error:
+                stats.errors += 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_wait(self, name: str, seconds: float):
+        """记录一次等待时间（不是请求，不计入接口统计）"""
+        with self._lock:
+            hist = self.waits.get(name)
+            if hist is None:
+                hist = self.waits[name] = LatencyHistogram()
+            hist.record_seconds(seconds)
+
+    @staticmethod
+    def _snapshot(hist: Optional[LatencyHistogram]) -> LatencyHistogram:
+        copy = LatencyHistogram()
+        if hist is not None:
+            copy.merge(hist)
+        return copy
+
+    def wait_histogram(self, name: str) -> LatencyHistogram:
+        """持锁复制一份等待时间的直方图返回，之后的记录不影响它；没有记录时返回空直方图"""
+        with self._lock:
+            return self._snapshot(self.waits.get(name))
+
+    def histogram(self, endpoint: str) -> LatencyHistogram:
+        """持锁复制一份接口的直方图返回，之后的记录不影响它；没有记录时返回空直方图，不会把接口加进报告"""
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            return self._snapshot(stats.histogram if stats is not None else None)
+
+    def percentile(self, endpoint: str, pct: float, min_samples: int = 1) -> Optional[int]:
+        """接口的百分位数（微秒）；还没有记录或样本数少于 min_samples 时返回 None"""
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None or stats.histogram.total < min_samples:
+                return None
+            return stats.histogram.percentile(pct)
+
+    def merge(self, other: "MetricsRecorder"):
+        other_dict = other.to_dict()
+        with self._lock:
+            for endpoint, data in other_dict["endpoints"].items():
+                self._stats(endpoint).merge(EndpointStats.from_dict(data))
+            for name, value in other_dict["counters"].items():
+                self.incr(name, value)
+            for name, data in other_dict["waits"].items():
+                self.waits.setdefault(name, LatencyHistogram()).merge(LatencyHistogram.from_dict(data))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "endpoints": {endpoint: stats.to_dict() for endpoint, stats in self.endpoints.items()},
+                "counters": dict(self.counters),
+                "waits": {name: hist.to_dict() for name, hist in self.waits.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MetricsRecorder":
+        recorder = cls()
+        recorder.endpoints = {endpoint: EndpointStats.from_dict(d) for endpoint, d in data["endpoints"].items()}
+        recorder.counters = dict(data.get("counters", {}))
+        recorder.waits = {name: LatencyHistogram.from_dict(d) for name, d in data.get("waits", {}).items()}
+        return recorder
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """每个接口的 count/errors/bytes 以及 p50/p90/p99/p99.9（毫秒）"""
+        result = {}
+        with self._lock:
+            endpoints = {endpoint: EndpointStats.from_dict(stats.to_dict()) for endpoint, stats in self.endpoints.items()}
+        for endpoint, stats in endpoints.items():
+            hist = stats.histogram
+            result[endpoint] = {
+                "count": hist.total,
+                "errors": stats.errors,
+                "bytes_sent": stats.bytes_sent,
+                "bytes_received": stats.bytes_received,
+                "mean_ms": hist.mean() / 1000,
+                "p50_ms": hist.percentile(50) / 1000,
+                "p90_ms": hist.percentile(90) / 1000,
+                "p99_ms": hist.percentile(99) / 1000,
+                "p99.9_ms": hist.percentile(99.9) / 1000,
+                "max_ms": hist.max / 1000,
+            }
+        return result
+
+    def format_report(self) -> str:
+        lines = []
+        for endpoint, row in self.report().items():
+            lines.append(
+                f"{endpoint}: count={row['count']} errors={row['errors']} "
+                f"p50={row['p50_ms']:.1f}ms p90={row['p90_ms']:.1f}ms "
+                f"p99={row['p99_ms']:.1f}ms p99.9={row['p99.9_ms']:.1f}ms max={row['max_ms']:.1f}ms "
+                f"sent={row['bytes_sent']}B recv={row['bytes_received']}B"
+            )
+        if self.counters:
+            lines.append(" ".join(f"{name}={value}" for name, value in sorted(self.counters.items())))
+        with self._lock:
+            waits = {name: LatencyHistogram.from_dict(hist.to_dict()) for name, hist in self.waits.items()}
+        if waits:
+            lines.append("等待时间（不含在接口耗时内）:")
+            for name, hist in sorted(waits.items()):
+                lines.append(
+                    f"  {name}: count={hist.total} p50={hist.percentile(50) / 1000:.1f}ms "
+                    f"p99={hist.percentile(99) / 1000:.1f}ms max={hist.max / 1000:.1f}ms"
+                )
+        return "\n".join(lines)
+
@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+LOGIN_PATH = "/api/admin/admin-user/login"
+ORDER_PATH = "/api/admin/reserveOrder/create"
+
+_REASONS = {200: b"OK", 400: b"Bad Request", 404: b"Not Found", 431: b"Request Header Fields Too Large",
+            500: b"Internal Server Error"}
+
+
+class LatencyModel:
+    """
+    模拟接口耗时，distribution 支持：
+    - constant: 固定 mean_ms
+    - uniform: 在 [min_ms, max_ms] 之间均匀分布
+    - exponential: 均值为 mean_ms 的指数分布
+    - lognormal: 中位数为 mean_ms、形状参数 sigma 的对数正态分布（长尾，最接近真实接口）
+    """
+
+    def __init__(self, distribution: str = "constant", mean_ms: float = 0.0, min_ms: float = 0.0,
+                 max_ms: float = 0.0, sigma: float = 0.5):
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.sigma = sigma
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "LatencyModel":
+        return cls(**(cfg or {}))
+
+    def sample(self) -> float:
+        """返回一次请求的耗时（秒）"""
+        if self.distribution == "uniform":
+            ms = random.uniform(self.min_ms, self.max_ms)
+        elif self.distribution == "exponential":
+            ms = random.expovariate(1 / self.mean_ms) if self.mean_ms > 0 else 0.0
+        elif self.distribution == "lognormal":
+            ms = random.lognormvariate(0, self.sigma) * self.mean_ms
+        else:
+            ms = self.mean_ms
+        return ms / 1000
+
+
+class RouteConfig:
+    """单个接口的模拟配置：耗时分布 + 错误率（按比例返回 HTTP 500）"""
+
+    def __init__(self, latency: Optional[Dict[str, Any]] = None, error_rate: float = 0.0):
+        self.latency = LatencyModel.from_config(latency)
+        self.error_rate = error_rate
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class MockAdminServer:
+    """
+    登录和预报下单接口的本地替身服务（纯 asyncio，单核即可支撑高 RPS）：
+    - POST /api/admin/admin-user/login: 账号密码匹配时返回 data.loginKey，否则 data.message=账号或密码错误
+    - POST /api/admin/reserveOrder/create: loginKey 有效时返回 data.reserveOrder.innerOrderNo，否则 code=401
+    - 每个账号最多保留 max_keys_per_user 个有效 loginKey，再次登录时最早的失效（默认 1：重新登录后旧的 loginKey 作废）
+    响应结构与测试断言的字段保持一致（code / message / data.loginKey / data.reserveOrder.innerOrderNo）。
+    """
+
+    def __init__(self, accounts: Iterable[Dict[str, Any]] = (), host: str = "127.0.0.1", port: int = 0,
+                 routes: Optional[Dict[str, Dict[str, Any]]] = None, max_keys_per_user: int = 1):
+        self.host = host
+        self.port = port
+        # 只有预期登录成功的账号才能登录，其余账号返回“账号或密码错误”
+        self.credentials = {
+            (acc["userName"], acc["password"])
+            for acc in accounts
+            if acc.get("expected_data_message", "OK") == "OK"
+        }
+        routes = routes or {}
+        self.routes = {
+            LOGIN_PATH: RouteConfig(**routes.get("login", {})),
+            ORDER_PATH: RouteConfig(**routes.get("create_order", {})),
+        }
+        self.max_keys_per_user = max_keys_per_user
+        # loginKey -> 账号，以及每个账号按登录先后排列的有效 loginKey（数量有上限，长时间压测内存不会一直增长）
+        self.login_keys: Dict[str, str] = {}
+        self._user_keys: Dict[str, Deque[str]] = {}
+        self._order_seq = itertools.count(1)
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], port: Optional[int] = None,
+                    accounts: Optional[Iterable[Dict[str, Any]]] = None) -> "MockAdminServer":
+        """accounts 不传时使用 config.yaml 中的 accounts + valid_accounts"""
+        mock_cfg = config.get("mock_server", {})
+        if accounts is None:
+            accounts = list(config.get("accounts", [])) + list(config.get("valid_accounts", []))
+        return cls(
+            accounts,
+            host=mock_cfg.get("host", "127.0.0.1"),
+            port=mock_cfg.get("port", 0) if port is None else port,
+            routes=mock_cfg.get("routes"),
+            max_keys_per_user=mock_cfg.get("max_keys_per_user", 1),
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ---------- 业务接口 ----------
+    def _handle_login(self, body: bytes) -> Tuple[int, bytes]:
+        payload = json.loads(body or b"{}")
+        if not isinstance(payload, dict):
+            return 400, _dumps({"code": 400, "message": "请求体必须是JSON对象"})
+        user = (payload.get("userName"), payload.get("password"))
+        if user not in self.credentials:
+            return 200, _dumps({"code": 200, "message": "请求成功", "data": {"message": "账号或密码错误"}})
+        login_key = uuid.uuid4().hex
+        self.login_keys[login_key] = user[0]
+        keys = self._user_keys.setdefault(user[0], deque())
+        keys.append(login_key)
+        while len(keys) > self.max_keys_per_user:
+            self.login_keys.pop(keys.popleft(), None)
+        return 200, _dumps({"code": 200, "message": "请求成功",
+                            "data": {"loginKey": login_key, "message": "OK"}})
+
+    def _handle_create_order(self, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        if headers.get("loginkey") not in self.login_keys:
+            return 200, _dumps({"code": 401, "message": "未登录或登录已过期", "data": None})
+        inner_order_no = f"MOCK{next(self._order_seq):010d}"
+        return 200, _dumps({"code": 200, "message": "请求成功",
+                            "data": {"reserveOrder": {"innerOrderNo": inner_order_no}}})
+
+    async def _dispatch(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes]:
+        route = self.routes.get(path)
+        if method != "POST" or route is None:
+            return 404, _dumps({"code": 404, "message": "Not Found"})
+        delay = route.latency.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if route.error_rate and random.random() < route.error_rate:
+            return 500, _dumps({"code": 500, "message": "模拟服务端错误"})
+        try:
+            if path == LOGIN_PATH:
+                return self._handle_login(body)
+            return self._handle_create_order(headers)
+        except ValueError:
+            return 400, _dumps({"code": 400, "message": "请求体不是合法的JSON"})
+
+    # ---------- HTTP/1.1（keep-alive）----------
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool):
+        writer.write(
+            b"HTTP/1.1 %d %s\r\nContent-Type: application/json; charset=utf-8\r\n"
+            b"Content-Length: %d\r\nConnection: %s\r\n\r\n"
+            % (status, _REASONS.get(status, b"OK"), len(payload), b"keep-alive" if keep_alive else b"close")
+            + payload
+        )
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    # 请求头超过 StreamReader 的缓冲上限（默认 64KiB）：返回 431 后关闭连接
+                    await self._write_response(
+                        writer, 431, _dumps({"code": 431, "message": "请求头过大"}), False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                request_line = lines[0].split(" ")
+                headers = {}
+                for line in lines[1:]:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if len(request_line) != 3 or not request_line[2].startswith("HTTP/") or length < 0:
+                    # 请求行或 Content-Length 不合法：无法确定请求边界，返回 400 后关闭连接
+                    await self._write_response(writer, 400, _dumps({"code": 400, "message": "请求格式错误"}), False)
+                    break
+                method, path, version = request_line
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method, path.split("?", 1)[0], headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=4096)
+        # port=0 时由系统分配端口，这里取回真实端口
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ---------- 在后台线程运行（供同步 pytest fixture 使用）----------
+    def start_in_thread(self) -> str:
+        """在独立线程的事件循环里启动服务，返回 base_url"""
+        started = threading.Event()
+        error = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except Exception as e:
+                error.append(e)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            # 取消还挂着的 keep-alive 连接，关闭事件循环前让它们正常退出
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-admin-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if error:
+            raise error[0]
+        return self.base_url
+
+    def stop_thread(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main():
+    """命令行启动：python -m src.mock_server --port 18080"""
+    from src.config_loader import DEFAULT_CONFIG_PATH, load_config
+
+    parser = argparse.ArgumentParser(description="登录/预报下单接口的本地替身服务")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    server = MockAdminServer.from_config(config, port=args.port)
+
+    async def run():
+        await server.start()
+        print(f"Mock 服务已启动: {server.base_url}")
+        await server._server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
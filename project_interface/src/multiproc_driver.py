@@ -0,0 +1,169 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.account_pool import AccountPool
+from src.client_use import create_async_http_client
+from src.load_engine import LoadEngine, LoadResult, login_and_order_scenario
+from src.login_cache import LoginKeyCache
+from src.metrics import MetricsRecorder
+
+# 等待所有 worker 就绪的最长秒数（导入模块、建连接池都在这之前完成）
+BARRIER_TIMEOUT = 60
+
+
+@dataclass
+class WorkerPlan:
+    """单个 worker 进程分到的任务：账号（分片或共享）+ 按比例分摊的速率和并发"""
+    index: int
+    base_url: str
+    accounts: List[dict]
+    target_rps: float
+    ramp_up: float
+    duration: float
+    max_concurrency: int
+    flow_deadline: Optional[float]
+    login_cache_dir: Optional[str]
+    login_cache_ttl: float
+    account_pool: Optional[Dict[str, Any]] = None
+
+
+def shard_accounts(accounts: List[dict], processes: int, exclusive: bool = False) -> List[List[dict]]:
+    """
+    给每个进程分配账号：
+    - exclusive=False：每个进程都使用全部账号（各自从不同的账号开始轮换），进程数不受账号数限制
+    - exclusive=True：按轮询方式分片，同一个账号只会出现在一个进程里（账号池模式需要，
+      单账号的并发/速率限制才在全局成立）；账号数少于进程数时多出来的进程不分配账号（不会启动）
+    """
+    if exclusive:
+        shards = [accounts[i::processes] for i in range(processes)]
+        return [shard for shard in shards if shard]
+    return [accounts[i % len(accounts):] + accounts[:i % len(accounts)] for i in range(processes)]
+
+
+def _worker(plan: WorkerPlan, payload_factory: Callable[[dict], Any], barrier, results) -> None:
+    """
+    worker 进程入口：自己的事件循环 + 自己的 httpx 连接池，等所有 worker 就绪后同时开始压测，
+    结束后把结果和指标以 dict 形式放回主进程。
+    """
+    async def run() -> Tuple[LoadResult, MetricsRecorder]:
+        metrics = MetricsRecorder()
+        login_cache = None
+        if plan.login_cache_dir:
+            login_cache = LoginKeyCache(plan.login_cache_dir, ttl=plan.login_cache_ttl)
+        async with create_async_http_client(max_connections=plan.max_concurrency) as http_client:
+            scenario = login_and_order_scenario(
+                plan.base_url, http_client, payload_factory,
+                metrics=metrics, login_cache=login_cache, flow_deadline=plan.flow_deadline,
+            )
+            # 账号池模式下账号按进程分片，各进程的账号池互不重叠，单账号的并发和速率限制在全局仍然成立
+            accounts = plan.accounts
+            if plan.account_pool is not None:
+                accounts = AccountPool(plan.accounts, metrics=metrics, **plan.account_pool)
+            engine = LoadEngine(scenario, accounts, target_rps=plan.target_rps, ramp_up=plan.ramp_up,
+                                duration=plan.duration, max_concurrency=plan.max_concurrency)
+            # 阻塞等待放到线程里，避免卡住事件循环
+            await asyncio.to_thread(barrier.wait, BARRIER_TIMEOUT)
+            result = await engine.run()
+        return result, metrics
+
+    try:
+        result, metrics = asyncio.run(run())
+        results.put((plan.index, result.to_dict(), metrics.to_dict(), None))
+    except Exception as e:
+        results.put((plan.index, None, None, f"{type(e).__name__}: {e}"))
+
+
+class MultiProcessLoadDriver:
+    """
+    多进程压测驱动：单个事件循环只能用满一个核（JSON、TLS 都在这个核上），
+    这里启动多个进程，每个进程各自跑 LoadEngine，结束后合并直方图和计数。
+    - target_rps / max_concurrency 是总量，按进程数平均分摊，与账号数无关（账号比进程少时各进程共用账号）
+    - 所有 worker 用同一个 Barrier 同步开始时间
+    - payload_factory 会被传到子进程，必须是模块级函数（可以被 pickle）
+    - account_pool 为 AccountPool 的参数（max_concurrency_per_account / rate_per_account / burst），
+      传入时账号按进程分片（互不重叠），每个 worker 用自己的分片建账号池，此时进程数不超过账号数
+    """
+
+    def __init__(self, base_url: str, accounts: List[dict], payload_factory: Callable[[dict], Any],
+                 target_rps: float, ramp_up: float = 0.0, duration: float = 10.0,
+                 max_concurrency: int = 100, processes: Optional[int] = None,
+                 flow_deadline: Optional[float] = None, login_cache_dir: Optional[str] = None,
+                 login_cache_ttl: float = 1800.0, account_pool: Optional[Dict[str, Any]] = None):
+        if not accounts:
+            raise ValueError("accounts 不能为空")
+        self.base_url = base_url
+        self.accounts = accounts
+        self.payload_factory = payload_factory
+        self.target_rps = target_rps
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.max_concurrency = max_concurrency
+        self.processes = processes or os.cpu_count() or 1
+        self.flow_deadline = flow_deadline
+        self.login_cache_dir = login_cache_dir
+        self.login_cache_ttl = login_cache_ttl
+        self.account_pool = account_pool
+
+    def plans(self) -> List[WorkerPlan]:
+        shards = shard_accounts(self.accounts, self.processes, exclusive=self.account_pool is not None)
+        workers = len(shards)
+        return [
+            WorkerPlan(
+                index=i,
+                base_url=self.base_url,
+                accounts=shard,
+                target_rps=self.target_rps / workers,
+                ramp_up=self.ramp_up,
+                duration=self.duration,
+                max_concurrency=max(1, self.max_concurrency // workers),
+                flow_deadline=self.flow_deadline,
+                login_cache_dir=self.login_cache_dir,
+                login_cache_ttl=self.login_cache_ttl,
+                account_pool=self.account_pool,
+            )
+            for i, shard in enumerate(shards)
+        ]
+
+    def run(self) -> Tuple[LoadResult, MetricsRecorder]:
+        """启动所有 worker，等待结束，返回合并后的 LoadResult 和 MetricsRecorder"""
+        plans = self.plans()
+        # spawn 在 Windows / Linux 上行为一致，也避免 fork 继承父进程的事件循环和连接
+        ctx = multiprocessing.get_context("spawn")
+        barrier = ctx.Barrier(len(plans))
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(plan, self.payload_factory, barrier, results),
+                        name=f"load-worker-{plan.index}")
+            for plan in plans
+        ]
+        for proc in procs:
+            proc.start()
+
+        merged_result = LoadResult()
+        merged_metrics = MetricsRecorder()
+        errors: Dict[int, str] = {}
+        timeout = BARRIER_TIMEOUT + self.ramp_up + self.duration + 60
+        try:
+            for _ in plans:
+                try:
+                    index, result, metrics, error = results.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError("等待压测 worker 结果超时")
+                if error is not None:
+                    errors[index] = error
+                    continue
+                merged_result.merge(LoadResult.from_dict(result))
+                merged_metrics.merge(MetricsRecorder.from_dict(metrics))
+        finally:
+            for proc in procs:
+                proc.join(timeout=10)
+                if proc.is_alive():
+                    proc.terminate()
+
+        if errors:
+            raise RuntimeError(f"压测 worker 执行失败: {errors}")
+        return merged_result, merged_metrics
@@ -0,0 +1,75 @@
+import copy
+import json
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+
+def _dumps(value: Any) -> bytes:
+    """与模板相同的紧凑格式编码单个值"""
+    if type(value) is int:
+        return str(value).encode("ascii")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class PayloadTemplate:
+    """
+    预编译的 JSON 请求体模板：
+    - 编译时把整个 dict 编码一次，在需要动态变化的字段（slot）处切开，保存为若干段 bytes
+    - render 时只编码 slot 的值并拼接，不再 deepcopy 整个 dict，也不再重新编码整个请求体
+    - slot 用点号表示嵌套字段，例如 "receiveInfo.countryId"
+
+    用法：
+        template = PayloadTemplate(base_order_payload, ["productsId", "countryId", "userId"])
+        body = template.render({"productsId": 98, "countryId": 234, "userId": 8066})
+        api_client.create_order(body)   # bytes 直接作为请求体发送
+    """
+
+    def __init__(self, payload: Mapping[str, Any], slots: Sequence[str]):
+        self.slots: List[str] = list(slots)
+        self.defaults: Dict[str, Any] = {}
+
+        marked = copy.deepcopy(dict(payload))
+        markers = []
+        for i, slot in enumerate(self.slots):
+            parent, key = self._locate(marked, slot)
+            self.defaults[slot] = parent[key]
+            marker = f"\x00slot{i}\x00"
+            parent[key] = marker
+            markers.append(_dumps(marker))
+
+        encoded = _dumps(marked)
+        # 按 slot 在 JSON 中出现的先后顺序切分
+        positions = sorted((encoded.index(marker), i, marker) for i, marker in enumerate(markers))
+        self._chunks: List[bytes] = []
+        self._order: List[str] = []
+        cursor = 0
+        for pos, i, marker in positions:
+            self._chunks.append(encoded[cursor:pos])
+            self._order.append(self.slots[i])
+            cursor = pos + len(marker)
+        self._chunks.append(encoded[cursor:])
+
+    @staticmethod
+    def _locate(payload: Dict[str, Any], slot: str):
+        parent = payload
+        parts = slot.split(".")
+        for part in parts[:-1]:
+            parent = parent[part]
+        if parts[-1] not in parent:
+            raise KeyError(f"模板中不存在字段: {slot}")
+        return parent, parts[-1]
+
+    def render(self, values: Mapping[str, Any] = None) -> bytes:
+        """生成请求体 bytes，没有传入的 slot 使用模板里的原值"""
+        values = values or {}
+        chunks = self._chunks
+        parts = [chunks[0]]
+        for i, slot in enumerate(self._order):
+            value = values[slot] if slot in values else self.defaults[slot]
+            parts.append(_dumps(value))
+            parts.append(chunks[i + 1])
+        return b"".join(parts)
+
+    def render_offset(self, offset: int, slots: Iterable[str] = None) -> bytes:
+        """把指定 slot（默认全部）在原值基础上加 offset，适用于按序号生成测试数据"""
+        slots = self.slots if slots is None else slots
+        return self.render({slot: self.defaults[slot] + offset for slot in slots})
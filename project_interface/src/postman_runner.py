@@ -0,0 +1,423 @@
+import argparse
+import asyncio
+import copy
+import csv
+import importlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from src.client_use import create_async_http_client
+from src.metrics import MetricsRecorder
+
+logger = logging.getLogger(__name__)
+
+# {{变量名}}，变量名两侧允许空格
+_VARIABLE = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+# scripts 中集合级脚本使用的 key，其余 key 为请求名称（例如 "Login"）
+COLLECTION = "*"
+
+ScriptFn = Callable[["PostmanScope"], None]
+
+
+# ---------- pm.environment / pm.variables / pm.iterationData ----------
+class VariableScope:
+    """一个变量作用域（environment、iterationData、局部变量等），接口与 Postman 的同名对象一致"""
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None):
+        self.values: Dict[str, Any] = dict(values or {})
+
+    def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    def set(self, key: str, value: Any):
+        self.values[key] = value
+
+    def unset(self, key: str):
+        self.values.pop(key, None)
+
+    def has(self, key: str) -> bool:
+        return key in self.values
+
+    def toObject(self) -> Dict[str, Any]:
+        return dict(self.values)
+
+
+class ResolvedVariables(VariableScope):
+    """
+    pm.variables：set 写入局部变量，get 按 Postman 的优先级查找：
+    局部变量 > 迭代数据(data.csv) > 环境变量 > 集合变量
+    """
+
+    def __init__(self, *scopes: VariableScope):
+        super().__init__()
+        self.scopes = scopes
+
+    def get(self, key: str) -> Any:
+        for scope in (self,) + self.scopes:
+            if key in scope.values:
+                return scope.values[key]
+        return None
+
+    def has(self, key: str) -> bool:
+        return any(key in scope.values for scope in (self,) + self.scopes)
+
+    def replace_in(self, text: str) -> str:
+        """替换文本中的 {{变量}}，找不到的变量原样保留（与 Postman 一致）"""
+        def replace(match):
+            value = self.get(match.group(1))
+            return match.group(0) if value is None else str(value)
+        return _VARIABLE.sub(replace, text)
+
+
+# ---------- pm.expect ----------
+class Expectation:
+    """pm.expect(value) 的 Python 版本，常用断言对应 chai 的写法：to.eql / to.be.above / to.be.true ..."""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def to_eql(self, expected: Any) -> "Expectation":
+        assert self.value == expected, f"expected {self.value!r} to deeply equal {expected!r}"
+        return self
+
+    def to_be_above(self, n) -> "Expectation":
+        assert self.value > n, f"expected {self.value!r} to be above {n!r}"
+        return self
+
+    def to_be_true(self) -> "Expectation":
+        assert self.value is True, f"expected {self.value!r} to be true"
+        return self
+
+    def to_be_a(self, kind: type) -> "Expectation":
+        assert isinstance(self.value, kind) and not isinstance(self.value, bool), \
+            f"expected {self.value!r} to be a {kind.__name__}"
+        return self
+
+    def to_have_property(self, name: str) -> "Expectation":
+        assert isinstance(self.value, dict) and name in self.value, f"expected {self.value!r} to have property {name!r}"
+        return Expectation(self.value[name])
+
+
+# ---------- pm.request / pm.response ----------
+class PostmanRequest:
+    def __init__(self, name: str, method: str, url: str, headers: Dict[str, str], body: Optional[str]):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+    def header(self, name: str) -> Optional[str]:
+        """按名称取请求头（不区分大小写）"""
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+
+class PostmanResponse:
+    def __init__(self, code: int, headers: Dict[str, str], content: bytes, response_time: float):
+        self.code = code
+        self.headers = headers
+        self.content = content
+        self.response_time = response_time
+        self._json = None
+
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        if self._json is None:
+            self._json = json.loads(self.content)
+        return self._json
+
+
+@dataclass
+class AssertionResult:
+    name: str
+    passed: bool
+    error: Optional[str] = None
+
+
+class PostmanScope:
+    """
+    脚本里使用的 pm 对象（Python 版）：
+    pm.environment / pm.variables / pm.iterationData / pm.collectionVariables / pm.request / pm.response /
+    pm.test(name, fn) / pm.expect(value)
+    """
+
+    def __init__(self, variables: ResolvedVariables, iteration: int):
+        self.iterationData, self.environment, self.collectionVariables = variables.scopes
+        self.variables = variables
+        self.iteration = iteration
+        self.request: Optional[PostmanRequest] = None
+        self.response: Optional[PostmanResponse] = None
+        self.tests: List[AssertionResult] = []
+
+    def test(self, name: str, fn: Callable[[], Any]):
+        """执行一条断言，失败时记录错误，不中断后续脚本（与 Postman 一致）"""
+        try:
+            fn()
+        except Exception as e:
+            self.tests.append(AssertionResult(name, False, f"{type(e).__name__}: {e}"))
+        else:
+            self.tests.append(AssertionResult(name, True))
+
+    @staticmethod
+    def expect(value: Any) -> Expectation:
+        return Expectation(value)
+
+
+# ---------- 集合解析 ----------
+@dataclass
+class CollectionItem:
+    name: str
+    method: str
+    url: str
+    headers: List[Dict[str, Any]]
+    body: Optional[str]
+
+
+def _flatten_items(items: Iterable[Dict[str, Any]]) -> List[CollectionItem]:
+    """按集合中的顺序展开文件夹，得到请求列表"""
+    result = []
+    for item in items:
+        if "item" in item:
+            result.extend(_flatten_items(item["item"]))
+            continue
+        request = item["request"]
+        url = request["url"]["raw"] if isinstance(request["url"], dict) else request["url"]
+        body = request.get("body") or {}
+        result.append(CollectionItem(
+            name=item["name"],
+            method=request.get("method", "GET"),
+            url=url,
+            headers=[h for h in request.get("header", []) if not h.get("disabled")],
+            body=body.get("raw") if body.get("mode") == "raw" else None,
+        ))
+    return result
+
+
+def load_collection(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    return {
+        "name": collection.get("info", {}).get("name", ""),
+        "items": _flatten_items(collection.get("item", [])),
+        "variables": {v["key"]: v.get("value") for v in collection.get("variable", []) if not v.get("disabled")},
+    }
+
+
+def load_environment(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        environment = json.load(f)
+    return {v["key"]: v.get("value") for v in environment.get("values", []) if v.get("enabled", True)}
+
+
+def load_iteration_data(path: str, encoding: str = "utf-8-sig") -> List[Dict[str, str]]:
+    """data.csv：第一行为变量名，每行一次迭代（与 newman -d 一致）"""
+    with open(path, newline="", encoding=encoding) as f:
+        return list(csv.DictReader(f))
+
+
+# ---------- 运行结果 ----------
+@dataclass
+class RequestResult:
+    iteration: int
+    name: str
+    status: Optional[int]
+    elapsed: float
+    tests: List[AssertionResult] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def failed_tests(self) -> List[AssertionResult]:
+        return [t for t in self.tests if not t.passed]
+
+
+@dataclass
+class RunResult:
+    results: List[RequestResult] = field(default_factory=list)
+    iterations: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def failures(self) -> List[RequestResult]:
+        return [r for r in self.results if r.error or r.failed_tests]
+
+    def summary(self) -> Dict[str, Any]:
+        assertions = sum(len(r.tests) for r in self.results)
+        failed_assertions = sum(len(r.failed_tests) for r in self.results)
+        return {
+            "iterations": self.iterations,
+            "requests": len(self.results),
+            "failed_requests": sum(1 for r in self.results if r.error),
+            "assertions": assertions,
+            "failed_assertions": failed_assertions,
+            "elapsed": self.elapsed,
+        }
+
+    def format_failures(self) -> str:
+        lines = []
+        for r in self.failures:
+            if r.error:
+                lines.append(f"#{r.iteration} {r.name}: {r.error}")
+            for t in r.failed_tests:
+                lines.append(f"#{r.iteration} {r.name} [{t.name}]: {t.error}")
+        return "\n".join(lines)
+
+
+class PostmanRunner:
+    """
+    Postman 集合的 Python 运行器（替代 newman run -e environment.json -d data.csv）：
+    - 解析集合、环境和 data.csv，按 Postman 的优先级替换 {{变量}}
+    - 每次迭代按集合顺序依次发送请求，迭代之间并发执行（最多 concurrency 个），共享一个 httpx 连接池
+    - 每次迭代使用环境变量的独立副本，pm.environment.set 只影响本次迭代，迭代之间不会互相覆盖 loginKey
+    - 集合里的 JS 脚本不执行，由 scripts 提供等价的 Python 脚本：
+      {COLLECTION: {"prerequest": fn, "test": fn}, "Login": {"test": fn}, ...}，fn 接收 pm 对象；
+      执行顺序与 Postman 相同：集合 prerequest -> 请求 prerequest -> 发送 -> 集合 test -> 请求 test
+    - 每个请求按 URL 路径记录到 MetricsRecorder，报告格式与 pytest 接口测试一致
+    """
+
+    def __init__(self, collection: Dict[str, Any], environment: Optional[Dict[str, Any]] = None,
+                 scripts: Optional[Dict[str, Dict[str, ScriptFn]]] = None,
+                 metrics: Optional[MetricsRecorder] = None, timeout: float = 10.0):
+        self.collection = collection
+        self.environment = environment or {}
+        self.scripts = scripts or {}
+        self.metrics = metrics if metrics is not None else MetricsRecorder()
+        self.timeout = timeout
+
+    def _run_script(self, key: str, event: str, pm: PostmanScope):
+        fn = self.scripts.get(key, {}).get(event)
+        if fn is not None:
+            fn(pm)
+
+    def _build_request(self, item: CollectionItem, pm: PostmanScope) -> PostmanRequest:
+        resolve = pm.variables.replace_in
+        headers = {resolve(h["key"]): resolve(str(h.get("value", ""))) for h in item.headers}
+        body = resolve(item.body) if item.body is not None else None
+        url = resolve(item.url)
+        if "://" not in url:
+            url = "http://" + url
+        return PostmanRequest(item.name, item.method, url, headers, body)
+
+    async def _send(self, http_client, item: CollectionItem, pm: PostmanScope) -> RequestResult:
+        request = pm.request
+        path = urlsplit(request.url).path or "/"
+        start = time.perf_counter()
+        try:
+            resp = await http_client.request(
+                request.method, request.url, headers=request.headers,
+                content=request.body.encode("utf-8") if request.body else None,
+            )
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            self.metrics.record(path, elapsed, error=True)
+            return RequestResult(pm.iteration, item.name, None, elapsed, error=f"{type(e).__name__}: {e}")
+        elapsed = time.perf_counter() - start
+        self.metrics.record(path, elapsed, error=resp.status_code >= 400,
+                            bytes_sent=len(resp.request.content), bytes_received=len(resp.content))
+        pm.response = PostmanResponse(resp.status_code, dict(resp.headers), resp.content, elapsed)
+        return RequestResult(pm.iteration, item.name, resp.status_code, elapsed)
+
+    async def run_iteration(self, http_client, iteration: int, data: Dict[str, Any]) -> List[RequestResult]:
+        # 局部变量（pm.variables.set）在一次迭代内有效，与 Postman 集合运行一致
+        variables = ResolvedVariables(
+            VariableScope(data),
+            VariableScope(copy.deepcopy(self.environment)),
+            VariableScope(self.collection.get("variables")),
+        )
+        results = []
+        for item in self.collection["items"]:
+            pm = PostmanScope(variables, iteration)
+            try:
+                self._run_script(COLLECTION, "prerequest", pm)
+                self._run_script(item.name, "prerequest", pm)
+                pm.request = self._build_request(item, pm)
+            except Exception as e:
+                results.append(RequestResult(iteration, item.name, None, 0.0, error=f"prerequest 脚本出错: {e}"))
+                continue
+            result = await self._send(http_client, item, pm)
+            if pm.response is not None:
+                try:
+                    self._run_script(COLLECTION, "test", pm)
+                    self._run_script(item.name, "test", pm)
+                except Exception as e:
+                    result.error = f"test 脚本出错: {type(e).__name__}: {e}"
+            result.tests = pm.tests
+            logger.debug("#%d %s -> %s %.1fms", iteration, item.name, result.status, result.elapsed * 1000)
+            results.append(result)
+        return results
+
+    async def run(self, data: Optional[List[Dict[str, Any]]] = None, concurrency: int = 10,
+                  http_client=None) -> RunResult:
+        """
+        执行所有迭代。data 为 None 时只跑一次（没有迭代数据）。
+        http_client 不传时按 concurrency 创建连接池，结束时关闭。
+        """
+        rows = data if data else [{}]
+        semaphore = asyncio.Semaphore(concurrency)
+        run_result = RunResult(iterations=len(rows))
+
+        async def run_one(index: int, row: Dict[str, Any]) -> List[RequestResult]:
+            async with semaphore:
+                return await self.run_iteration(client, index, row)
+
+        begin = time.perf_counter()
+        client = http_client or create_async_http_client(max_connections=concurrency, timeout=self.timeout)
+        try:
+            for results in await asyncio.gather(*(run_one(i, row) for i, row in enumerate(rows, 1))):
+                run_result.results.extend(results)
+        finally:
+            if http_client is None:
+                await client.aclose()
+        run_result.elapsed = time.perf_counter() - begin
+        return run_result
+
+
+def load_scripts(module_name: str) -> Dict[str, Dict[str, ScriptFn]]:
+    """从模块的 SCRIPTS 变量加载脚本，例如 tests.postman_scripts"""
+    return getattr(importlib.import_module(module_name), "SCRIPTS")
+
+
+def main():
+    """
+    命令行运行（在 project_interface 目录下）：
+    python -m src.postman_runner ../project_postman/Team_Project.postman_collection.json \
+        -e ../project_postman/environment.json -d ../project_postman/data.csv -c 5
+    """
+    parser = argparse.ArgumentParser(description="Postman 集合的 Python 运行器（迭代并发执行）")
+    parser.add_argument("collection")
+    parser.add_argument("-e", "--environment")
+    parser.add_argument("-d", "--iteration-data")
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--scripts", default="tests.postman_scripts", help="提供 SCRIPTS 的模块")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    runner = PostmanRunner(
+        load_collection(args.collection),
+        load_environment(args.environment) if args.environment else None,
+        scripts=load_scripts(args.scripts) if args.scripts else None,
+        timeout=args.timeout,
+    )
+    data = load_iteration_data(args.iteration_data) if args.iteration_data else None
+    result = asyncio.run(runner.run(data, concurrency=args.concurrency))
+
+    print(f"运行结果: {result.summary()}")
+    print("接口耗时统计:\n" + runner.metrics.format_report())
+    if result.failures:
+        print("失败:\n" + result.format_failures())
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
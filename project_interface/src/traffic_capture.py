@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.client_use import create_async_http_client
+from src.load_engine import LoadResult
+from src.metrics import MetricsRecorder
+
+LOGIN_PATH = "/api/admin/admin-user/login"
+
+# 不记录的请求头（由 HTTP 客户端自动生成，回放时会重新生成）
+SKIP_HEADERS = {"content-length", "host", "connection", "accept-encoding", "accept", "user-agent"}
+
+# 会话令牌的来源：接口路径 -> 响应 JSON 中令牌字段的路径
+DEFAULT_TOKEN_FIELDS: Dict[str, Tuple[str, ...]] = {LOGIN_PATH: ("data", "loginKey")}
+
+
+class StatusMismatch(Exception):
+    """回放时响应状态码与录制时不一致"""
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(entry: Dict[str, Any]) -> Optional[bytes]:
+    if "body" in entry:
+        return entry["body"].encode("utf-8")
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return None
+
+
+class TrafficRecorder:
+    """
+    把 ApiClient / AsyncApiClient 发出的每个请求追加写入 JSON Lines 文件（只追加，不改写）：
+    - 每行一个请求：t(发出时的时间戳) / method / path / headers / body_sha1 / body / status / elapsed
+    - 相同请求体只在第一次出现时写 body，之后只写 body_sha1，回放时按 hash 还原
+    - keep_response_paths 中的接口（默认登录接口）额外保存响应体，回放时用来替换 loginKey
+    - 多线程安全；xdist 的多个 worker 可以写同一个文件（每行一次 write，按 t 排序回放）
+    """
+
+    def __init__(self, path: str, keep_response_paths: Sequence[str] = tuple(DEFAULT_TOKEN_FIELDS)):
+        self.path = path
+        self.keep_response_paths = set(keep_response_paths)
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self._seen_bodies = set()
+
+    def record(self, method: str, path: str, headers: Dict[str, str], body: Optional[bytes],
+               started: float, elapsed: float, status: Optional[int] = None,
+               response_body: Optional[bytes] = None, error: Optional[str] = None):
+        """started 为 time.time() 时间戳，elapsed 为秒"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        entry: Dict[str, Any] = {
+            "t": round(started, 6),
+            "method": method,
+            "path": path,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in SKIP_HEADERS},
+            "status": status,
+            "elapsed": round(elapsed, 6),
+        }
+        if body:
+            digest = hashlib.sha1(body).hexdigest()
+            entry["body_sha1"] = digest
+            with self._lock:
+                first = digest not in self._seen_bodies
+                self._seen_bodies.add(digest)
+            if first:
+                entry.update(_encode_body(body))
+        if response_body is not None and path in self.keep_response_paths:
+            entry["response"] = _encode_body(response_body)
+        if error is not None:
+            entry["error"] = error
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+@dataclass
+class CapturedRequest:
+    t: float
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: Optional[bytes]
+    status: Optional[int]
+    elapsed: float
+    response: Optional[bytes] = None
+
+
+def load_capture(path: str) -> List[CapturedRequest]:
+    """读取录制文件，还原按 hash 省略的请求体，按发出时间排序"""
+    bodies: Dict[str, bytes] = {}
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = _decode_body(entry)
+            digest = entry.get("body_sha1")
+            if digest is not None:
+                if body is None:
+                    body = bodies.get(digest)
+                else:
+                    bodies[digest] = body
+            records.append(CapturedRequest(
+                t=entry["t"],
+                method=entry["method"],
+                path=entry["path"],
+                headers=entry.get("headers") or {},
+                body=body,
+                status=entry.get("status"),
+                elapsed=entry.get("elapsed", 0.0),
+                response=_decode_body(entry["response"]) if "response" in entry else None,
+            ))
+    records.sort(key=lambda r: r.t)
+    return records
+
+
+def _extract(content: Optional[bytes], fields: Tuple[str, ...]) -> Optional[str]:
+    if not content:
+        return None
+    try:
+        value = json.loads(content)
+    except ValueError:
+        return None
+    for name in fields:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(name)
+    return value if isinstance(value, str) and value else None
+
+
+class TrafficReplayer:
+    """
+    把录制的流量重新发到任意 base_url：
+    - speed=1 按原始节奏回放，speed=10 把时间间隔压缩为 1/10，speed=0 不等待、尽快发出
+    - 会话令牌替换：录制时登录接口返回的 loginKey（旧值）在回放时对应新登录拿到的 loginKey（新值），
+      之后的请求头和请求体里出现旧值的地方替换为新值；用到旧值的请求会等对应的登录回放完成再发
+    - max_concurrency 限制同时在途的请求数，达到上限时排队，排队时间计入延迟（延迟从计划发出时间计算）
+    - 响应状态码与录制时不同计为失败（StatusMismatch）
+    录制时如果 loginKey 来自缓存（没有登录请求），回放前用 token_map 传入 旧值 -> 新值。
+    """
+
+    def __init__(self, base_url: str, speed: float = 1.0, max_concurrency: int = 100,
+                 metrics: Optional[MetricsRecorder] = None,
+                 token_fields: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 token_map: Optional[Dict[str, str]] = None, http_client=None):
+        self.base_url = base_url.rstrip("/")
+        self.speed = speed
+        self.max_concurrency = max_concurrency
+        self.metrics = metrics
+        self.token_fields = DEFAULT_TOKEN_FIELDS if token_fields is None else token_fields
+        self.token_map = dict(token_map or {})
+        self.http_client = http_client
+
+    def _offsets(self, records: List[CapturedRequest]) -> List[float]:
+        if not records or not self.speed:
+            return [0.0] * len(records)
+        t0 = records[0].t
+        return [(r.t - t0) / self.speed for r in records]
+
+    async def _substitute(self, record: CapturedRequest, tokens: Dict[str, "asyncio.Future"]):
+        """替换请求头/请求体里的旧令牌，对应的登录还没回放完时等待"""
+        headers = dict(record.headers)
+        body = record.body
+        for old, future in tokens.items():
+            in_headers = [k for k, v in headers.items() if old in v]
+            in_body = body is not None and old.encode("utf-8") in body
+            if not in_headers and not in_body:
+                continue
+            new = await future
+            for k in in_headers:
+                headers[k] = headers[k].replace(old, new)
+            if in_body:
+                body = body.replace(old.encode("utf-8"), new.encode("utf-8"))
+        return headers, body
+
+    async def _replay_one(self, client, record: CapturedRequest, scheduled_at: float,
+                          tokens: Dict[str, "asyncio.Future"], semaphore: asyncio.Semaphore,
+                          result: LoadResult):
+        started = time.perf_counter()
+        error = None
+        resp = None
+        old_token = _extract(record.response, self.token_fields.get(record.path, ()))
+        try:
+            # 等令牌时不占用并发名额，避免占满名额的请求都在等一个排不上队的登录
+            headers, body = await self._substitute(record, tokens)
+            async with semaphore:
+                started = time.perf_counter()
+                resp = await client.request(record.method, self.base_url + record.path,
+                                            headers=headers, content=body)
+            if record.status is not None and resp.status_code != record.status:
+                raise StatusMismatch(f"{record.method} {record.path}: {resp.status_code} != {record.status}")
+        except Exception as e:
+            error = e
+        finally:
+            finished = time.perf_counter()
+            result.record(finished - scheduled_at, finished - started, error)
+            if self.metrics is not None:
+                self.metrics.record(record.path, finished - started, error=error is not None,
+                                    bytes_sent=len(record.body or b""),
+                                    bytes_received=len(resp.content) if resp is not None else 0)
+            token_future = tokens.get(old_token) if old_token else None
+            if token_future is not None and not token_future.done():
+                # 登录回放失败时沿用旧令牌，后续请求会按失败统计
+                new = _extract(resp.content, self.token_fields[record.path]) if resp is not None else None
+                token_future.set_result(new or old_token)
+
+    def _token_futures(self, records: List[CapturedRequest]) -> Dict[str, "asyncio.Future"]:
+        loop = asyncio.get_running_loop()
+        tokens = {}
+        for old, new in self.token_map.items():
+            future = loop.create_future()
+            future.set_result(new)
+            tokens[old] = future
+        for record in records:
+            old = _extract(record.response, self.token_fields.get(record.path, ()))
+            if old and old not in tokens:
+                tokens[old] = loop.create_future()
+        return tokens
+
+    async def run(self, records: List[CapturedRequest]) -> LoadResult:
+        result = LoadResult()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tokens = self._token_futures(records)
+        client = self.http_client or create_async_http_client(max_connections=self.max_concurrency)
+        tasks = set()
+        begin = time.perf_counter()
+        try:
+            for record, offset in zip(records, self._offsets(records)):
+                scheduled_at = begin + offset
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                result.scheduled += 1
+                task = asyncio.create_task(self._replay_one(client, record, scheduled_at, tokens, semaphore, result))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            if self.http_client is None:
+                await client.aclose()
+        result.elapsed = time.perf_counter() - begin
+        return result
+
+
+def main():
+    """
+    回放录制的流量（在 project_interface 目录下）：
+    python -m src.traffic_capture traffic.jsonl --base-url http://127.0.0.1:18080 --speed 10
+    """
+    parser = argparse.ArgumentParser(description="回放 ApiClient 录制的流量")
+    parser.add_argument("capture")
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示不等待")
+    parser.add_argument("--max-concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    metrics = MetricsRecorder()
+    replayer = TrafficReplayer(args.base_url, speed=args.speed, max_concurrency=args.max_concurrency,
+                               metrics=metrics)
+    result = asyncio.run(replayer.run(load_capture(args.capture)))
+    print(f"回放结果: {result.summary()}")
+    if result.errors:
+        print(f"失败: {result.errors}")
+    print("接口耗时统计:\n" + metrics.format_report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,62 @@
 import pytest
-import yaml
 import os
+import itertools
 from src.client_use import ApiClient
+from src.config_loader import load_config, snapshot, install_snapshot
+from src.metrics import MetricsRecorder
+from src.login_cache import LoginKeyCache
+from src.mock_server import MockAdminServer
+from src.account_source import AccountSource
+from src.traffic_capture import TrafficRecorder
+from tests.testdata import get_account_source
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
 
-def load_config():
-    """
-    以utf-8编码打开文件
-    使用yaml.safe_load解析YAML文件为Python字典并返回。
-    """
-    path = os.path.join(ROOT, "config", "config.yaml")
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+def pytest_addoption(parser):
+    parser.addoption("--env", default=None, help="运行环境，覆盖 config.yaml 中的 env，例如 dev / mock")
+    parser.addoption("--record-traffic", default=None, help="把 api_client 发出的请求录制到指定文件，之后可回放")
+    parser.addoption("--run-load", action="store_true",
+                     help="允许对非 mock 环境执行压测用例（@pytest.mark.load），默认只在 --env mock 下执行")
+
+#pytest-xdist: 主进程把已解析好的配置快照随 workerinput 发给每个 worker，worker 收集用例时不再解析 YAML
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["config_snapshot"] = snapshot()
+
+def pytest_configure(config):
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput and "config_snapshot" in workerinput:
+        install_snapshot(workerinput["config_snapshot"])
+    config.addinivalue_line("markers", "accounts(name): 用账号数据源 name 里的每个账号参数化 account 参数")
+    config.addinivalue_line("markers", "load: 压测用例，会对目标环境持续发起登录/下单，默认只在 --env mock 下执行")
+
+#压测用例会在真实环境创建大量订单：不是 mock 环境、也没有显式传 --run-load 时跳过
+def pytest_collection_modifyitems(config, items):
+    env = config.getoption("--env") or load_config().get("env", "dev")
+    if env == "mock" or config.getoption("--run-load"):
+        return
+    skip_load = pytest.mark.skip(reason=f"压测用例默认不对 {env} 环境执行，使用 --env mock 或 --run-load")
+    for item in items:
+        if item.get_closest_marker("load"):
+            item.add_marker(skip_load)
+
+#@pytest.mark.accounts("valid_accounts")：只有被收集到的用例才读取对应的账号数据源（导入时不读）。
+#收集时流式读一遍，参数化只保存 (数据源名称, 账号位置) 和用例 id（按 userName，pytest 本身需要）；
+#执行时 account fixture 按位置直接读出这一个账号（文件源 seek 到对应字节），与用例执行顺序无关
+def pytest_generate_tests(metafunc):
+    marker = metafunc.definition.get_closest_marker("accounts")
+    if marker is None or "account" not in metafunc.fixturenames:
+        return
+    name = marker.kwargs.get("name", marker.args[0] if marker.args else "accounts")
+    params, ids = [], []
+    for offset, record in get_account_source(name).iter_offsets():
+        params.append((name, offset))
+        ids.append(AccountSource.record_id(record))
+    metafunc.parametrize("account", params, ids=ids, indirect=True)
+
+@pytest.fixture
+def account(request):
+    name, offset = request.param
+    return get_account_source(name).read_at(offset)
 
 #从文件加载配置，然后把配置保存一份到 pytest 的内部缓存里，方便其它pytest代码快速拿用，最后把配置给调用它的人。
 @pytest.fixture(scope="session")
@@ -22,18 +66,57 @@ def config(request):
     request.config._inicache['config_data'] = cfg
     return cfg
 
+#本次运行的环境：优先使用命令行 --env，其次从 config.yaml 里读取 env，如果没写 env 就默认用 dev
+@pytest.fixture(scope="session")
+def env(request, config):
+    return request.config.getoption("--env") or config.get("env","dev")
+
 @pytest.fixture(scope="session")
-def base_url(config):
-    #从 config.yaml 里读取 env，如果没写 env 就默认用 dev
-    env = config.get("env","dev")
+def base_url(request, config, env):
     #从 config.yaml 里读取 base_url 字段（它是个字典）
     base_url_dict = config.get("base_url",{})
     # 根据 env 取对应的 URL，比如 env 是 "dev"，就取 base_url_dict["dev"]
     url = base_url_dict.get(env)
     if not url:
         raise ValueError(f"Base URL not found for env:{env}")
+    if env == "mock":
+        #mock 环境：启动本地替身服务，xdist 每个 worker 用不同端口（gw0 -> 18080, gw1 -> 18081 ...）
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+        port = int(url.rsplit(":", 1)[1]) + int(worker.lstrip("gw") or 0)
+        accounts = itertools.chain(get_account_source("accounts"), get_account_source("valid_accounts"))
+        server = MockAdminServer.from_config(config, port=port, accounts=accounts)
+        url = server.start_in_thread()
+        request.addfinalizer(server.stop_thread)
     return url
 
+#整个测试会话共用一个指标记录器，会话结束时打印每个接口的延迟百分位数
+@pytest.fixture(scope="session")
+def metrics():
+    recorder = MetricsRecorder()
+    yield recorder
+    if recorder.endpoints:
+        print("\n接口耗时统计:\n" + recorder.format_report())
+
+#loginKey 缓存放在 pytest 的缓存目录(.pytest_cache)下，xdist 的多个 worker 和多次运行之间共享
+@pytest.fixture(scope="session")
+def login_cache(request, config):
+    ttl = config.get("login_cache", {}).get("ttl", 1800)
+    return LoginKeyCache(request.config.cache.mkdir("login_keys"), ttl=ttl)
+
+#--record-traffic traffic.jsonl：录制功能测试的全部请求（python -m src.traffic_capture 回放）
+@pytest.fixture(scope="session")
+def traffic_recorder(request):
+    path = request.config.getoption("--record-traffic")
+    if not path:
+        yield None
+        return
+    recorder = TrafficRecorder(path)
+    yield recorder
+    recorder.close()
+
+#录制时不使用 loginKey 缓存，保证录到登录请求，回放时才能替换成新的 loginKey
 @pytest.fixture
-def api_client(base_url):
-    return ApiClient(base_url)
+def api_client(base_url, metrics, login_cache, traffic_recorder):
+    if traffic_recorder is not None:
+        login_cache = None
+    return ApiClient(base_url, metrics=metrics, login_cache=login_cache, recorder=traffic_recorder)
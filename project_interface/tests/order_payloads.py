@@ -1,5 +1,7 @@
 # order_payloads.py
 
+from src.payload_template import PayloadTemplate
+
 base_order_payload = {
         "productsId": 97,
         "countryId": 233,
@@ -58,6 +60,24 @@ base_order_payload = {
         ]
     }
 
+# 按序号变化的字段，预编译成模板后每生成一单只需要拼接这几个值
+ORDER_SLOTS = ("productsId", "countryId", "userId")
+order_payload_template = PayloadTemplate(base_order_payload, ORDER_SLOTS)
+
+
+def get_order_body_by_index(idx) -> bytes:
+    """
+    生成订单请求体(bytes)，与 get_order_payload_by_index 内容相同，
+    但不做 deepcopy 也不重新编码整个 dict，可直接传给 create_order，适合高频下单。
+    """
+    return order_payload_template.render_offset(idx)
+
+
+def order_body_for_account(account) -> bytes:
+    """按账号的 order_index 生成请求体，模块级函数，可以传给多进程压测的子进程"""
+    return get_order_body_by_index(account["order_index"])
+
+
 def get_order_payload_by_index(idx):
     import copy
     order=copy.deepcopy(base_order_payload)
@@ -0,0 +1,46 @@
+import pytest
+
+from src.account_source import AccountSource, CsvAccountSource, JsonlAccountSource, YamlAccountSource
+
+
+def _check_random_access(source):
+    # 流式读一遍拿到位置，再倒序按位置读取，结果与顺序读取一致
+    pairs = list(source.iter_offsets())
+    assert [record for _, record in pairs] == list(source)
+    for offset, record in reversed(pairs):
+        assert source.read_at(offset) == record
+    return [record for _, record in pairs]
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        AccountSource()
+
+
+def test_csv_read_at_any_order(tmp_path):
+    path = tmp_path / "accounts.csv"
+    path.write_text('userName,passWord,order_index\r\n'
+                    'a,"p,1",1\r\n'
+                    '\r\n'
+                    'b,"多\r\n行",2\r\n'
+                    'c,p3,\r\n', encoding="utf-8")
+    records = _check_random_access(CsvAccountSource(str(path)))
+    assert [r["userName"] for r in records] == ["a", "b", "c"]
+    assert records[0] == {"userName": "a", "passWord": "p,1", "order_index": 1}
+    assert records[1]["passWord"] == "多\r\n行"
+    # 新实例没有缓存表头也能直接按位置读取
+    offset = list(CsvAccountSource(str(path)).iter_offsets())[2][0]
+    assert CsvAccountSource(str(path)).read_at(offset)["userName"] == "c"
+
+
+def test_jsonl_read_at_any_order(tmp_path):
+    path = tmp_path / "accounts.jsonl"
+    path.write_text('{"userName": "a"}\n\n{"userName": "中"}\n{"userName": "c"}\n', encoding="utf-8")
+    records = _check_random_access(JsonlAccountSource(str(path)))
+    assert [r["userName"] for r in records] == ["a", "中", "c"]
+
+
+def test_yaml_read_at_any_order():
+    # 用 config.yaml（xdist 下来自主进程快照），不在 worker 里额外解析 YAML
+    records = _check_random_access(YamlAccountSource("accounts"))
+    assert records
@@ -0,0 +1,34 @@
+import requests
+
+from src.client_use import ApiClient
+from src.login_cache import LoginKeyCache
+from src.mock_server import LOGIN_PATH, MockAdminServer
+
+ACCOUNT = {"userName": "relogin_user", "password": "p"}
+
+
+def test_create_orders_relogin_once_when_key_expires(tmp_path):
+    """
+    create_orders 的多个线程同时遇到 loginKey 失效：只重新登录一次，
+    每个订单都带着有效的 loginKey 重发成功
+    """
+    server = MockAdminServer([ACCOUNT])
+    base_url = server.start_in_thread()
+    client = ApiClient(base_url, login_cache=LoginKeyCache(str(tmp_path)), pool_maxsize=8)
+    try:
+        assert client.ensure_login(ACCOUNT["userName"], ACCOUNT["password"])
+        # 同一账号在别处登录，当前 loginKey 作废（mock 每个账号只保留一个 loginKey）
+        requests.post(base_url + LOGIN_PATH, json=ACCOUNT, timeout=5).raise_for_status()
+
+        logins = []
+        login = client.login
+        client.login = lambda *args: logins.append(args) or login(*args)
+        results = list(client.create_orders(({"index": i} for i in range(40)), concurrency=8))
+
+        assert [r.error for r in results if r.error] == []
+        assert all(r.inner_order_no for r in results)
+        assert len(logins) == 1
+        assert client.session.headers["loginKey"] == client.login_key
+    finally:
+        client.close()
+        server.stop_thread()
@@ -1,8 +1,9 @@
-import asyncio
 import pytest
-import httpx
+from src.client_use import AsyncApiClient, create_async_http_client
+from src.deadline import Deadline
+from src.account_source import for_each_account
 from .testdata import VALID_ACCOUNTS
-from .order_payloads import get_order_payload_by_index
+from .order_payloads import get_order_body_by_index
 
 # 异步版本的 API 基础 URL，从 pytest fixture 获取
 @pytest.fixture(scope="session")
@@ -13,41 +14,33 @@ def async_base_url(base_url):
     return base_url.rstrip("/")
 
 
-async def async_login_and_order(client: httpx.AsyncClient, base_url: str, account: dict):
+async def async_login_and_order(client: AsyncApiClient, account: dict, flow_deadline: float = None):
     """
     单个用户执行 登录 + 下单 的异步流程。
     参数:
-        client: 已创建的 httpx.AsyncClient 对象（支持复用 TCP 连接）
-        base_url: API 基础地址
+        client: 当前用户独享的 AsyncApiClient（底层共享同一个 httpx 连接池）
         account: dict，包含 userName, password, order_index 等信息
+        flow_deadline: 登录 + 下单 整个流程的时间预算（秒），None 表示不限制
     """
-    # 1. 登录接口
-    login_url = f"{base_url}/api/admin/admin-user/login"
-    login_payload = {
-        "userName": account["userName"],
-        "password": account["password"]
-    }
+    if flow_deadline is not None:
+        with Deadline(flow_deadline):
+            return await async_login_and_order(client, account)
 
-    resp_login = await client.post(login_url, json=login_payload)
-    assert resp_login.status_code == 200, f"{account['userName']} 登录HTTP状态码错误: {resp_login.status_code}"
-
-    login_json = resp_login.json()
-    assert login_json["code"] == account["expected_login_code"], f"{account['userName']} 登录返回code错误: {login_json}"
-    assert login_json["message"] == "请求成功", f"{account['userName']} 登录返回message错误: {login_json}"
-
-    login_key = login_json["data"]["loginKey"]
+    # 1. 登录（同一账号复用缓存的 loginKey，并发时共享同一次登录），成功后自动设置 loginKey
+    login_key = await client.ensure_login(account["userName"], account["password"])
+    if client.login_response is not None:
+        # 本次真正调用了登录接口（缓存未命中），校验登录返回
+        assert client.login_response["code"] == account["expected_login_code"], \
+            f"{account['userName']} 登录返回 code 不符合预期: {client.login_response}"
+        assert client.login_response["message"] == "请求成功", \
+            f"{account['userName']} 登录返回 message 不符合预期: {client.login_response}"
     assert login_key, f"{account['userName']} 登录成功但未返回 loginKey"
     print(f"{account['userName']} 登录成功，loginKey: {login_key}")
 
     # 2. 下单接口
-    order_url = f"{base_url}/api/admin/reserveOrder/create"
-    headers = {"loginKey": login_key}
-    order_data = get_order_payload_by_index(account["order_index"])
+    order_data = get_order_body_by_index(account["order_index"])
+    order_json = await client.create_order(order_data)
 
-    resp_order = await client.post(order_url, json=order_data, headers=headers)
-    assert resp_order.status_code == 200, f"{account['userName']} 下单HTTP状态码错误: {resp_order.status_code}"
-
-    order_json = resp_order.json()
     assert "data" in order_json, f"{account['userName']} 订单返回缺少data字段: {order_json}"
     reserve_order = order_json["data"]["reserveOrder"]
     assert reserve_order and reserve_order.get("innerOrderNo"), f"{account['userName']} 订单返回缺少innerOrderNo: {order_json}"
@@ -56,16 +49,21 @@ async def async_login_and_order(client: httpx.AsyncClient, base_url: str, accoun
 
 
 @pytest.mark.asyncio
-async def test_concurrent_orders(async_base_url):
+async def test_concurrent_orders(config, async_base_url, metrics, login_cache):
     """
     并发下单测试：
-    - 使用 config.yaml 中的 valid_accounts
-    - 每个用户同时执行 登录 + 下单 流程
-    - 使用 asyncio.gather 并发运行
+    - 使用 valid_accounts 数据源，边读账号边执行（async for），账号不需要全部读进内存
+    - 每个用户同时执行 登录 + 下单 流程，同时在途的用户数不超过 load.max_concurrency
+    - 所有用户共享一个 httpx.AsyncClient 连接池，各自持有自己的 loginKey
+    - 每个请求的耗时按接口记录到会话级 metrics，会话结束时统一输出
+    - 每个用户的 登录 + 下单 共用 config.yaml 中 load.flow_deadline 的时间预算
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        tasks = [
-            async_login_and_order(client, async_base_url, account)
-            for account in VALID_ACCOUNTS
-        ]
-        await asyncio.gather(*tasks)
+    load_cfg = config.get("load", {})
+    flow_deadline = load_cfg.get("flow_deadline")
+    async with create_async_http_client(timeout=10.0) as http_client:
+        async def run(account):
+            client = AsyncApiClient(async_base_url, client=http_client, metrics=metrics, login_cache=login_cache,
+                                    partial_decode=True)
+            await async_login_and_order(client, account, flow_deadline)
+
+        await for_each_account(VALID_ACCOUNTS, run, concurrency=load_cfg.get("max_concurrency", 100))
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from src import config_loader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# 参数化成多个用例，保证两个 worker 都会执行到
+@pytest.mark.parametrize("probe", range(4))
+def test_worker_did_not_parse_yaml(probe):
+    """在 xdist worker 中执行：配置来自主进程的快照，本进程不应解析过 YAML"""
+    if not os.environ.get("PYTEST_XDIST_WORKER"):
+        pytest.skip("只在 xdist worker 中检查")
+    config_loader.load_config()
+    assert config_loader.parse_count() == 0
+
+
+def test_xdist_workers_use_config_snapshot():
+    """用 -n 2 运行上面的检查，确认每个 worker 都没有自己解析 YAML"""
+    pytest.importorskip("xdist")
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        pytest.skip("已经在 worker 中，不再嵌套启动 xdist")
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-n", "2",
+         "tests/test_config_snapshot.py::test_worker_did_not_parse_yaml"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "4 passed" in result.stdout, result.stdout
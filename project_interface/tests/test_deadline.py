@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from src.client_use import AsyncApiClient
+from src.deadline import Deadline, DeadlineExceeded, request_timeout
+
+
+def test_budget_starts_on_enter():
+    deadline = Deadline(0.5)
+    time.sleep(0.2)
+    with deadline:
+        assert deadline.remaining() > 0.4
+        assert request_timeout(10.0) <= 0.5
+
+
+def test_nested_deadline_uses_earlier_expiry():
+    with Deadline(0.1):
+        with Deadline(5.0) as inner:
+            assert inner.remaining() <= 0.1
+
+
+@pytest.mark.asyncio
+async def test_async_request_bounded_by_total_budget():
+    """服务端每 50ms 返回一个字节：单次读取不会超时，但整个请求受剩余预算限制"""
+
+    async def drip(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 100\r\n\r\n")
+        try:
+            for _ in range(100):
+                writer.write(b" ")
+                await writer.drain()
+                await asyncio.sleep(0.05)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(drip, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = AsyncApiClient(f"http://127.0.0.1:{port}")
+    try:
+        start = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            with Deadline(0.3):
+                await client.get("/slow")
+        assert time.perf_counter() - start < 1.0
+        assert client.counters["deadlines_exceeded"] == 1
+    finally:
+        await client.aclose()
+        server.close()
+        await server.wait_closed()
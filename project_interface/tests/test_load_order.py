@@ -0,0 +1,109 @@
+import pytest
+from src.account_pool import AccountPool, LEASE_WAIT, THROTTLE_WAIT
+from src.client_use import create_async_http_client
+from src.load_engine import LoadEngine, login_and_order_scenario
+from src.multiproc_driver import MultiProcessLoadDriver
+from .testdata import get_accounts_list
+from .order_payloads import get_order_body_by_index, order_body_for_account
+
+# 压测用例：默认只在 --env mock 下执行，对其他环境需要显式传 --run-load
+pytestmark = pytest.mark.load
+
+
+@pytest.mark.asyncio
+async def test_load_login_and_order(config, base_url, metrics, login_cache):
+    """
+    开放模型压测：
+    - 按 config.yaml 中 load 的参数，以目标速率持续执行 登录 + 下单 流程
+    - 延迟从计划开始时间计算，后端变慢时排队时间也会体现在延迟里
+    """
+    load_cfg = config.get("load", {})
+    max_concurrency = load_cfg.get("max_concurrency", 50)
+
+    async with create_async_http_client(max_connections=max_concurrency) as http_client:
+        scenario = login_and_order_scenario(
+            base_url, http_client,
+            lambda account: get_order_body_by_index(account["order_index"]),
+            metrics=metrics,
+            login_cache=login_cache,
+            flow_deadline=load_cfg.get("flow_deadline"),
+        )
+        engine = LoadEngine(
+            scenario,
+            get_accounts_list("valid_accounts"),
+            target_rps=load_cfg.get("target_rps", 5),
+            ramp_up=load_cfg.get("ramp_up", 5),
+            duration=load_cfg.get("duration", 10),
+            max_concurrency=max_concurrency,
+        )
+        result = await engine.run()
+
+    summary = result.summary()
+    print(f"压测结果: {summary}")
+    assert result.failed == 0, f"压测中有失败请求: {result.errors}"
+
+
+@pytest.mark.asyncio
+async def test_pooled_load_login_and_order(config, base_url, metrics, login_cache):
+    """
+    账号池压测（长时间压测用有限账号）：
+    - 每个流程从账号池租用账号，单个账号的并发和请求速率按 load.account_pool 限制
+    - 等待租用和等待限速的时间单独统计，不计入接口延迟
+    """
+    load_cfg = config.get("load", {})
+    pool_cfg = load_cfg.get("account_pool", {})
+    pool = AccountPool(get_accounts_list("valid_accounts"), metrics=metrics, **pool_cfg)
+
+    async with create_async_http_client(max_connections=load_cfg.get("max_concurrency", 50)) as http_client:
+        scenario = login_and_order_scenario(
+            base_url, http_client,
+            lambda account: get_order_body_by_index(account["order_index"]),
+            metrics=metrics,
+            login_cache=login_cache,
+        )
+        engine = LoadEngine(
+            scenario,
+            pool,
+            target_rps=load_cfg.get("target_rps", 5),
+            ramp_up=load_cfg.get("ramp_up", 5),
+            duration=load_cfg.get("duration", 10),
+            max_concurrency=load_cfg.get("max_concurrency", 50),
+        )
+        result = await engine.run()
+
+    lease_wait = metrics.wait_histogram(LEASE_WAIT)
+    throttle_wait = metrics.wait_histogram(THROTTLE_WAIT)
+    print(f"账号池压测结果: {result.summary()}")
+    print(f"等待租用 p99={lease_wait.percentile(99) / 1000:.1f}ms，等待限速 p99={throttle_wait.percentile(99) / 1000:.1f}ms")
+    assert result.failed == 0, f"压测中有失败请求: {result.errors}"
+    assert all(n == 0 for n in pool.in_flight().values()), f"压测结束后仍有未归还的账号: {pool.in_flight()}"
+    # 等待时间单独统计，不出现在按接口的报告里
+    assert lease_wait.total > 0 and not {LEASE_WAIT, THROTTLE_WAIT} & set(metrics.report()), metrics.format_report()
+
+
+def test_multiprocess_load_login_and_order(config, base_url, login_cache):
+    """
+    多进程压测：
+    - 账号按进程分片，每个进程各自的事件循环和连接池，同时开始
+    - 结束后合并每个进程的延迟直方图和计数，输出一份报告
+    """
+    load_cfg = config.get("load", {})
+    driver = MultiProcessLoadDriver(
+        base_url,
+        get_accounts_list("valid_accounts"),
+        order_body_for_account,
+        target_rps=load_cfg.get("target_rps", 5),
+        ramp_up=load_cfg.get("ramp_up", 5),
+        duration=load_cfg.get("duration", 10),
+        max_concurrency=load_cfg.get("max_concurrency", 50),
+        processes=load_cfg.get("processes"),
+        flow_deadline=load_cfg.get("flow_deadline"),
+        login_cache_dir=login_cache.cache_dir,
+        login_cache_ttl=login_cache.ttl,
+        account_pool=load_cfg.get("account_pool"),
+    )
+    result, metrics = driver.run()
+
+    print(f"多进程压测结果: {result.summary()}")
+    print(f"多进程接口耗时统计:\n{metrics.format_report()}")
+    assert result.failed == 0, f"压测中有失败请求: {result.errors}"
@@ -1,17 +1,16 @@
 import pytest
-from tests.testdata import ACCOUNTS
 
 
-#把ACCOUNTS列表里的每个账号对象，依次传给测试函数的参数 account
-#ids 用来给每个测试用例命名，方便pytest报告中查看哪个账号失败
-@pytest.mark.parametrize("account", ACCOUNTS, ids=[a.get("userName") for a in ACCOUNTS])
+#把 accounts 数据源里的每个账号对象，依次传给测试函数的参数 account（见 conftest.py 的 pytest_generate_tests）
+#每个测试用例按 userName 命名，方便pytest报告中查看哪个账号失败
+@pytest.mark.accounts("accounts")
 def test_login(api_client, account):
     #调用登录接口，拿到响应数据字典
     resp = api_client.login(account["userName"], account["password"])
 
     json_data = resp.json()
     #HTTP 状态码断言
-    assert json_data["code"] == account["expected_login_code"],f"状态码错误:{json_data['code']} != {account["expected_login_code"]}"
+    assert json_data["code"] == account["expected_login_code"],f"状态码错误:{json_data['code']} != {account['expected_login_code']}"
     # 顶层message断言
     assert json_data["message"] == "请求成功", f"响应消息不符(顶层message):{json_data['message']}"
     # data.message断言，先确保data存在且有message字段
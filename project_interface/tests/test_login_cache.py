@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from src.login_cache import LoginKeyCache
+
+BASE_URL = "http://127.0.0.1:1"
+
+
+@pytest.mark.asyncio
+async def test_waiters_take_over_when_first_login_cancelled(tmp_path):
+    """第一个登录的协程被取消：等待者不会收到 CancelledError，由下一个等待者登录，其余共享它的结果"""
+    cache = LoginKeyCache(str(tmp_path))
+    started = asyncio.Event()
+    calls = []
+
+    async def slow_login():
+        calls.append("first")
+        started.set()
+        await asyncio.sleep(10)
+        return "never"
+
+    async def login():
+        calls.append("takeover")
+        await asyncio.sleep(0.01)
+        return "key-2"
+
+    first = asyncio.create_task(cache.aget_or_login(BASE_URL, "u", "p", slow_login))
+    await started.wait()
+    waiters = [asyncio.create_task(cache.aget_or_login(BASE_URL, "u", "p", login)) for _ in range(3)]
+    await asyncio.sleep(0)
+    first.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await asyncio.gather(*waiters) == ["key-2"] * 3
+    assert calls == ["first", "takeover"]
+    assert await cache.aget_or_login(BASE_URL, "u", "p", login) == "key-2"
+
+
+@pytest.mark.asyncio
+async def test_waiters_get_login_error(tmp_path):
+    """登录抛出的普通异常仍然传给所有等待者，不会重复登录"""
+    cache = LoginKeyCache(str(tmp_path))
+    calls = []
+
+    async def login():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("login failed")
+
+    results = await asyncio.gather(*(cache.aget_or_login(BASE_URL, "u", "p", login) for _ in range(3)),
+                                   return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(calls) == 1
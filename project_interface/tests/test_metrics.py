@@ -0,0 +1,21 @@
+from src.metrics import MetricsRecorder
+
+
+def test_histogram_of_unknown_endpoint_has_no_side_effect():
+    metrics = MetricsRecorder()
+    assert metrics.histogram("/missing").total == 0
+    assert metrics.wait_histogram("missing").total == 0
+    assert metrics.endpoints == {} and metrics.waits == {}
+    assert metrics.report() == {}
+
+
+def test_histogram_is_a_snapshot():
+    metrics = MetricsRecorder()
+    metrics.record("/a", 0.01)
+    metrics.record_wait("lease", 0.02)
+    hist, wait = metrics.histogram("/a"), metrics.wait_histogram("lease")
+    metrics.record("/a", 0.03)
+    metrics.record_wait("lease", 0.04)
+    assert (hist.total, hist.max) == (1, 10000)
+    assert (wait.total, wait.max) == (1, 20000)
+    assert metrics.histogram("/a").total == 2
@@ -0,0 +1,57 @@
+import json
+import socket
+
+import pytest
+import requests
+
+from src.mock_server import LOGIN_PATH, MockAdminServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = MockAdminServer([{"userName": "u", "password": "p"}])
+    server.start_in_thread()
+    yield server
+    server.stop_thread()
+
+
+def _raw(server, data: bytes) -> bytes:
+    """发送原始请求，读到服务端关闭连接为止"""
+    with socket.create_connection((server.host, server.port), timeout=5) as sock:
+        sock.sendall(data)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+@pytest.mark.parametrize("body", [b"[]", b'"x"', b"1", b"null"])
+def test_login_rejects_non_object_json(server, body):
+    resp = requests.post(server.base_url + LOGIN_PATH, data=body, timeout=5)
+    assert resp.status_code == 400
+    assert resp.json()["code"] == 400
+
+
+def test_login_rejects_invalid_json(server):
+    resp = requests.post(server.base_url + LOGIN_PATH, data=b"{", timeout=5)
+    assert resp.status_code == 400
+
+
+def test_login_ok_after_bad_requests(server):
+    resp = requests.post(server.base_url + LOGIN_PATH, json={"userName": "u", "password": "p"}, timeout=5)
+    assert resp.json()["data"]["loginKey"]
+
+
+def test_oversized_headers_return_431(server):
+    data = (b"POST " + LOGIN_PATH.encode() + b" HTTP/1.1\r\nHost: x\r\nX-Big: "
+            + b"a" * 70000 + b"\r\n\r\n")
+    resp = _raw(server, data)
+    assert resp.startswith(b"HTTP/1.1 431 ")
+    assert json.loads(resp.split(b"\r\n\r\n", 1)[1])["code"] == 431
+
+
+def test_malformed_request_line_returns_400(server):
+    resp = _raw(server, b"GARBAGE\r\n\r\n")
+    assert resp.startswith(b"HTTP/1.1 400 ")
@@ -0,0 +1,26 @@
+from src.multiproc_driver import MultiProcessLoadDriver
+
+
+ACCOUNTS = [{"userName": "a"}, {"userName": "b"}]
+
+
+def _driver(**kwargs):
+    return MultiProcessLoadDriver("http://127.0.0.1:18080", ACCOUNTS, dict, target_rps=40,
+                                  max_concurrency=40, processes=4, **kwargs)
+
+
+def test_processes_not_capped_by_accounts():
+    # 账号比进程少：每个进程共用全部账号，速率和并发按进程数平均分摊
+    plans = _driver().plans()
+    assert len(plans) == 4
+    assert all(plan.target_rps == 10 and plan.max_concurrency == 10 for plan in plans)
+    assert all(sorted(a["userName"] for a in plan.accounts) == ["a", "b"] for plan in plans)
+    # 各进程从不同的账号开始轮换
+    assert {plan.accounts[0]["userName"] for plan in plans} == {"a", "b"}
+
+
+def test_account_pool_shards_accounts_exclusively():
+    # 账号池模式：账号互不重叠，进程数不超过账号数
+    plans = _driver(account_pool={"max_concurrency_per_account": 1}).plans()
+    assert [[a["userName"] for a in plan.accounts] for plan in plans] == [["a"], ["b"]]
+    assert all(plan.target_rps == 20 for plan in plans)
@@ -2,46 +2,37 @@
 
 import pytest
 from src.client_use import ApiClient
-from .testdata import VALID_ACCOUNTS
-from .order_payloads import get_order_payload_by_index
+from .order_payloads import get_order_body_by_index
 
 
-# 用ids参数给每个账号的测试用例起名字，方便测试报告阅读
-@pytest.mark.parametrize(
-    "account",
-    VALID_ACCOUNTS,
-    ids=[acc.get("userName") for acc in VALID_ACCOUNTS]
-)
+# valid_accounts 数据源里的每个账号一个用例，用例按 userName 命名，方便测试报告阅读
+@pytest.mark.accounts("valid_accounts")
 def test_order_flow(api_client: ApiClient, account):
     """
     流程化测试用例：
-    1. 使用account登录，自动设置loginKey
+    1. 使用account登录（复用缓存的loginKey，未命中缓存时校验登录返回），自动设置loginKey
     2. 生成对应account['order_index']的订单数据，下单
     3. 验证订单返回包含innerOrderNo并打印
     """
 
     username = account["userName"]
     password = account["password"]
-    expected_code = account["expected_login_code"]
-    expected_msg = account["expected_data_message"]
 
-    # 登录接口，自动设置 loginKey
-    resp_login = api_client.login(username, password)
-    login_json = resp_login.json()
+    # 登录（优先复用缓存的 loginKey，登录接口本身由 test_login 覆盖），自动设置 loginKey
+    login_key = api_client.ensure_login(username, password)
 
-    # 断言登录 HTTP 状态码符合预期
-    assert login_json["code"] == account[
-        "expected_login_code"], f"状态码错误:{login_json['code']} != {account["expected_login_code"]}"
-
-    # 断言登录返回信息符合预期
-    assert login_json["message"] == "请求成功", f"{username} 登录返回消息不符"
+    # 本次真正调用了登录接口（缓存未命中）时，校验登录接口的返回
+    if api_client.login_response is not None:
+        login_json = api_client.login_response
+        assert login_json["code"] == account["expected_login_code"], f"{username} 登录返回 code 不符合预期: {login_json}"
+        assert login_json["message"] == "请求成功", f"{username} 登录返回 message 不符合预期: {login_json}"
 
     # 如果登录成功，loginKey 应该被设置
-    assert api_client.login_key is not None, f"{username} 登录成功但 loginKey 未设置"
+    assert login_key is not None and api_client.login_key is not None, f"{username} 登录成功但 loginKey 未设置"
     print(f"{username} 登录成功，loginKey: {api_client.login_key}")
 
     # 生成对应订单数据，动态调整产品、国家、用户ID
-    order_data = get_order_payload_by_index(account["order_index"])
+    order_data = get_order_body_by_index(account["order_index"])
     #print(f"{username} 生成的订单数据: {order_data}")
 
     # 创建订单
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import pytest
+from src.config_loader import ROOT
+from src.postman_runner import COLLECTION, PostmanRunner, load_collection, load_environment, load_iteration_data
+from .postman_scripts import SCRIPT_HASHES, SCRIPTS
+
+# data.csv 中 code 列为 loginKey 的行是正确账号，这些迭代的断言必须全部通过
+LOGIN_OK = "loginKey"
+
+
+def _collection_path(config, key):
+    return os.path.join(ROOT, config.get("postman", {})[key])
+
+
+def collection_script_hashes(path):
+    """集合里每段非空脚本的 sha256 前 16 位，键为 "请求名称:事件"（集合级脚本的名称为 COLLECTION）"""
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+
+    def walk(node, name):
+        for event in node.get("event", []):
+            source = "\n".join(line.rstrip("\r") for line in event.get("script", {}).get("exec", [])).strip()
+            if source:
+                yield f"{name}:{event['listen']}", hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        for item in node.get("item", []):
+            yield from walk(item, item["name"])
+
+    return dict(walk(collection, COLLECTION))
+
+
+def test_postman_scripts_in_sync(config):
+    """tests/postman_scripts.py 是手工移植的，集合里的脚本改了而这里没改时失败"""
+    assert collection_script_hashes(_collection_path(config, "collection")) == SCRIPT_HASHES, \
+        "Postman 集合的脚本已修改，请同步修改 tests/postman_scripts.py 并更新 SCRIPT_HASHES"
+
+
+@pytest.mark.asyncio
+async def test_postman_collection(env, config, metrics):
+    """
+    用 Python 运行器执行 project_postman 的集合（等价于 newman run -e environment.json -d data.csv）：
+    - data.csv 的每一行是一次迭代，迭代之间并发执行，共享一个连接池
+    - 每个请求的耗时记录到会话级 metrics，与其他接口测试一起输出
+    - 所有请求都要正常发出并收到响应；正确账号（code 列为 loginKey）的迭代断言必须全部通过，
+      错误账号的行后续请求没有 loginKey，断言失败属于预期
+    """
+    if env == "mock":
+        pytest.skip("本地替身服务不包含员工管理接口，Postman 集合只在真实环境运行")
+    postman_cfg = config.get("postman", {})
+
+    runner = PostmanRunner(
+        load_collection(_collection_path(config, "collection")),
+        load_environment(_collection_path(config, "environment")),
+        scripts=SCRIPTS,
+        metrics=metrics,
+    )
+    rows = load_iteration_data(_collection_path(config, "iteration_data"))
+    result = await runner.run(rows, concurrency=postman_cfg.get("concurrency", 5))
+
+    print(f"Postman 集合运行结果: {result.summary()}")
+    if result.failures:
+        print("失败的断言:\n" + result.format_failures())
+    assert result.summary()["failed_requests"] == 0, f"有请求未收到响应:\n{result.format_failures()}"
+    # 迭代序号从 1 开始，对应 data.csv 的第 iteration 行数据
+    expected_ok = [r for r in result.results if rows[r.iteration - 1].get("code") == LOGIN_OK]
+    assert expected_ok, "data.csv 中没有正确账号的行"
+    failed_assertions = [t for r in expected_ok for t in r.failed_tests]
+    assert not failed_assertions, f"正确账号的迭代有断言失败:\n{result.format_failures()}"
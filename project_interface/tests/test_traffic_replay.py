@@ -0,0 +1,61 @@
+import json
+import pytest
+from src.client_use import ApiClient, create_async_http_client
+from src.metrics import MetricsRecorder
+from src.traffic_capture import TrafficRecorder, TrafficReplayer, load_capture
+from .testdata import VALID_ACCOUNTS
+from .order_payloads import get_order_body_by_index
+
+LOGIN_PATH = "/api/admin/admin-user/login"
+ORDER_PATH = "/api/admin/reserveOrder/create"
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path, base_url):
+    """
+    录制 + 回放：
+    - 用 ApiClient 录制每个账号的 登录 + 下单 流程（不使用 loginKey 缓存，保证录到登录请求）
+    - 按 10 倍速回放，下单请求中的 loginKey 替换为回放时新登录拿到的值
+    - 回放的状态码与录制时一致，且响应体 code 为 200（loginKey 无效时接口仍返回 HTTP 200，只有 code 为 401）
+    - 回放用自己的 MetricsRecorder，不混进会话的接口耗时统计
+    """
+    capture = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(str(capture))
+    client = ApiClient(base_url, recorder=recorder)
+    try:
+        for account in VALID_ACCOUNTS:
+            client.login(account["userName"], account["password"])
+            client.create_order(get_order_body_by_index(account["order_index"]))
+    finally:
+        client.close()
+        recorder.close()
+
+    records = load_capture(str(capture))
+    assert len(records) == 2 * len(list(VALID_ACCOUNTS)), f"录制的请求数不对: {len(records)}"
+    recorded_keys = {r.headers.get("loginKey") for r in records if r.path == ORDER_PATH}
+
+    # 记下回放时的每个响应和它对应请求的 loginKey
+    responses = []
+
+    async def keep_response(resp):
+        await resp.aread()
+        responses.append((resp.request.url.path, resp.request.headers.get("loginKey"), json.loads(resp.content)))
+
+    http_client = create_async_http_client()
+    http_client.event_hooks["response"].append(keep_response)
+    replay_metrics = MetricsRecorder()
+    try:
+        replayer = TrafficReplayer(base_url, speed=10, metrics=replay_metrics, http_client=http_client)
+        result = await replayer.run(records)
+    finally:
+        await http_client.aclose()
+    print(f"回放结果: {result.summary()}")
+    assert result.failed == 0, f"回放中有失败请求: {result.errors}"
+
+    new_keys = {body["data"]["loginKey"] for path, _, body in responses if path == LOGIN_PATH}
+    orders = [(key, body) for path, key, body in responses if path == ORDER_PATH]
+    assert len(orders) == len(list(VALID_ACCOUNTS)), f"回放的下单请求数不对: {responses}"
+    for key, body in orders:
+        assert body["code"] == 200, f"回放的下单请求被拒绝: {body}"
+        assert key in new_keys and key not in recorded_keys, f"下单请求没有换成回放时登录拿到的 loginKey: {key}"
+    assert replay_metrics.report()[ORDER_PATH]["count"] == len(orders)
@@ -1,44 +1,42 @@
-import os
-import yaml
+from src.account_source import AccountSource, open_account_source
+from src.config_loader import load_config
 
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
-
-def load_config():
+def get_account_source(name: str = "accounts") -> AccountSource:
     """
-    加载 config/config.yaml 文件
-    返回的是解析后的Python字典，里面包含所有配置
+    根据名称返回账号数据源（流式读取，不会一次性把账号全部放进内存）。
+    config.yaml 的 account_sources 里可以把名称映射到 CSV / JSONL / YAML 文件，
+    没有配置时直接读取 config.yaml 中同名的账号列表。
+    例如：
+      - name="accounts" 对应 config.yaml 里 accounts 字段的列表
+      - name="valid_accounts" 对应 valid_accounts 列表
     """
+    spec = load_config().get("account_sources", {}).get(name, name)
+    return open_account_source(spec, key=name)
 
-    path = os.path.join(ROOT, "config", "config.yaml")
-    with open(path, "r", encoding="utf-8") as f:
-        # 使用yaml.safe_load解析YAML文件，返回字典
-        return yaml.safe_load(f)
-
-# 缓存变量，避免多次读文件
-_config_cache = None
 
 def get_accounts_list(key: str = "accounts"):
     """
     根据传入的key（账号列表的名称）返回对应的账号列表。
-    例如：
-      - key="accounts" 返回 config.yaml 里 accounts 字段的列表
-      - key="valid_accounts" 返回 valid_accounts 列表
     参数:
         key (str): 配置文件中账号列表字段名，默认为"accounts"
 
     返回:
         list: 账号列表（如果没有找到对应key，返回空列表）
 
-    这个函数会先缓存配置字典，避免多次读取文件，提高效率。
+    会把所有账号读进内存，账号数量很大时请直接迭代 get_account_source 返回的数据源。
     """
-    global _config_cache
-    if _config_cache is None:
-        # 第一次调用时加载配置文件，后续调用直接复用缓存
-        _config_cache = load_config()
-    # 从配置字典里获取key对应的账号列表，如果没有该key，返回空列表
-    return _config_cache.get(key, [])
-
-# 下面定义两个常用的模块级变量，方便测试代码直接导入使用：
-ACCOUNTS = get_accounts_list("accounts")
-VALID_ACCOUNTS = get_accounts_list("valid_accounts")
+    return list(get_account_source(key))
+
+# 两个常用的模块级数据源，方便测试代码直接导入：from .testdata import VALID_ACCOUNTS
+# 在第一次访问时才创建（读取 config.yaml）。conftest.py 导入本模块时 pytest_configure 还没执行，
+# 如果这里立即读取配置，xdist worker 会在装入主进程的配置快照之前自己解析一遍 YAML。
+_LAZY_SOURCES = {"ACCOUNTS": "accounts", "VALID_ACCOUNTS": "valid_accounts"}
+
+
+def __getattr__(name):
+    if name in _LAZY_SOURCES:
+        source = get_account_source(_LAZY_SOURCES[name])
+        globals()[name] = source
+        return source
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,22 +5,23 @@ import logging
 from  datetime import datetime
 
 from selenium.common import ElementClickInterceptedException
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementNotSelectableException
+from core.wait_engine import WaitEngine
+from core.network_waits import NetworkWaits
+from core.element_query import query_states
 from utils.config_manager import ConfigManager
 from utils.logger import get_logger
-import time
 
 
 class BasePage:
     """
     所有页面对象的基类，封装了基础操作：
-    -显示等待
+    -显示等待（WaitEngine）
     -点击
     -输入文本
     -获取文本
     -判断是否可见
+    -批量读取元素状态
     -滚动视图
     -错误时截图 + 日志
     """
@@ -36,11 +37,14 @@ class BasePage:
         #每个页面对象都有一个日志记录器，文件名自动按类名生成
         self.logger = get_logger(self.__class__.__name__)
 
-        #设置隐式等待(全局)，在定位元素时最多等待 2 秒
-        driver.implicitly_wait(2)
+        #不使用隐式等待：隐式等待和显式等待叠加，每次“元素不存在/不可见”的判断都会多等几秒
+        driver.implicitly_wait(0)
 
-        #设置显示等待(用于显示等待)
-        self.wait = WebDriverWait(driver,10)
+        #显式等待：页面内 MutationObserver 驱动，条件满足立即返回，最多等待 10 秒
+        self.waits = WaitEngine(driver,10)
+
+        #按网络请求等待（请求完成 / 网络空闲），代替固定 sleep
+        self.network = NetworkWaits(driver,10)
 
         #截图保留目录
         self.screenshots_dir = ConfigManager.get_screenshots_dir()
@@ -76,20 +80,34 @@ class BasePage:
         """
         try:
             # 1.尝试直接点击
-            element = self.wait.until(EC.element_to_be_clickable(locator))
+            element = self.waits.clickable(locator)
             try:
                 element.click()
                 self.logger.info(f"Click element：{self._format_element(locator,element_name)}")
             except ElementClickInterceptedException:
-                # 2.如果被遮挡或不可见，尝试到视野再用 JS 点击
-                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-                self.driver.execute_script("arguments[0].click();", element)
+                # 2.如果被遮挡或不可见，滚动到视野再用 JS 点击（一次脚本调用）
+                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", element)
                 self.logger.info(f"Click element(JS):{self._format_element(locator,element_name)}")
         except Exception as e:
             self.handle_error(f"Click Failed: {self._format_element(locator, element_name)}", e)
             raise
 
 
+    def query_states(self,locators):
+        """
+        一次脚本调用读取多个元素的状态（存在/可见/可用/文本/输入值/位置大小），代替逐个 find + is_displayed + ...
+        :param locators: {名称: 定位元组}
+        :return: {名称: ElementState}
+        """
+        try:
+            states = query_states(self.driver,locators)
+            self.logger.info("Element states: " + ", ".join(
+                f"{name}(found={st.found},visible={st.visible},enabled={st.enabled})" for name, st in states.items()))
+            return states
+        except Exception as e:
+            self.handle_error("Query States Failed",e)
+            raise
+
     def input_text(self,locator,text,element_name=""):
         """
         清空并向输入框中输入文本。
@@ -99,7 +117,7 @@ class BasePage:
         :return:
         """
         try:
-            element = self.wait.until(EC.visibility_of_element_located(locator))
+            element = self.waits.visible(locator)
             element.clear()
             element.send_keys(text)
             self.logger.info(f"Input '{text}' to:{self._format_element(locator,element_name)}")
@@ -112,7 +130,7 @@ class BasePage:
 
         #获取元素文本内容
         try:
-            element = self.wait.until(EC.visibility_of_element_located(locator))
+            element = self.waits.visible(locator)
             text = element.text
             self.logger.info(f"Retrieved text from {self._format_element(locator,element_name)}:'{text}'")
             return text
@@ -126,7 +144,7 @@ class BasePage:
         判断元素是否在页面中可见，返回布尔值
         """
         try:
-            self.wait.until(EC.visibility_of_element_located(locator))
+            self.waits.visible(locator)
             self.logger.info(f"Element is visible: {self._format_element(locator,element_name)}")
             return True
         except Exception as e:
@@ -139,7 +157,7 @@ class BasePage:
         将元素滚动可视页面中，使其可操作。
         """
         try:
-            element = self.wait.until(EC.presence_of_element_located(locator))
+            element = self.waits.present(locator)
             self.driver.execute_script("arguments[0].scrollIntoView(true)",element)
             self.logger.info(f"Scrolled into view: {self._format_element(locator,element_name)}")
         except Exception as e:
@@ -153,7 +171,7 @@ class BasePage:
         步骤：
         1. 等待输入框可点击
         2. 滚动到输入框
-        3. 等待下拉选项可见
+        3. 输入文字，等待下拉选项可点击
         4. JS 点击选项
         5. 日志记录
 
@@ -165,21 +183,19 @@ class BasePage:
         """
         try:
             # 1. 等待输入框可点击
-            input_element = self.wait.until(EC.element_to_be_clickable(input_locator))
+            input_element = self.waits.clickable(input_locator)
 
             # 2. 滚动到输入框可见
             self.scroll_into_view(input_locator, element_name)
             # 3. 输入文字
             input_element.send_keys(value)
             self.logger.info(f"输入 {element_name}: {value}")
-            # 4. 延迟 0.3 秒，等待下拉选项出现
-            time.sleep(0.3)
 
-            # 5. 等待下拉选项出现
+            # 4. 等待下拉选项出现（选项按文字定位，出现即返回，不再固定等待 0.3 秒）
             option_locator = option_locator_func(value)
-            target_option = self.wait.until(EC.element_to_be_clickable(option_locator))
+            target_option = self.waits.clickable(option_locator)
 
-            # 6. 用 JS 点击选项
+            # 5. 用 JS 点击选项
             self.driver.execute_script("arguments[0].click();", target_option)
             self.logger.info(f"选择 {element_name}: {value}")
 
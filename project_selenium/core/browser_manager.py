@@ -5,12 +5,61 @@ import tempfile
 import uuid
 import shutil
 import os
+import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from utils.config_manager import ConfigManager
+from utils.driver_resolver import resolve_chromedriver
+from core.profile_snapshot import GoldenProfile
+from core import network_waits
+
+# 运行模式
+PROFILE_HEADED = "headed"        # 有界面，最大化窗口（本地调试）
+PROFILE_HEADLESS = "headless"    # 无头，其他行为与 headed 一致
+PROFILE_FAST = "fast"            # 无头 + 固定窗口 + 关闭动画 + 屏蔽图片/字体/统计脚本 + 不降低后台页面优先级（CI）
+PROFILES = (PROFILE_HEADED, PROFILE_HEADLESS, PROFILE_FAST)
+
+# 环境变量优先于 config.ini，pytest --browser-profile 通过它传给 BrowserManager
+ENV_PROFILE = "BROWSER_PROFILE"
+
+# fast 模式默认屏蔽的地址（CDP Network.setBlockedURLs，支持 * 通配）
+DEFAULT_BLOCKED_URLS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*google-analytics.com*", "*googletagmanager.com*", "*hm.baidu.com*", "*cnzz.com*",
+)
+
+# fast 模式注入到每个页面的样式：关闭 CSS 动画和过渡，元素立即到达最终状态
+DISABLE_ANIMATIONS_JS = """
+(function () {
+    var css = '*, *::before, *::after { animation-duration: 0s !important; animation-delay: 0s !important;'
+        + ' transition-duration: 0s !important; transition-delay: 0s !important; scroll-behavior: auto !important; }';
+    function inject() {
+        var style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    }
+    if (document.documentElement) { inject(); } else { document.addEventListener('DOMContentLoaded', inject); }
+})();
+"""
+
+
+def resolve_profile(profile=None):
+    """
+    确定运行模式：参数 > 环境变量 BROWSER_PROFILE > config.ini [browser] profile。
+    没有配置 profile 时兼容旧的 headless 配置（true/yes/1 为 headless，其余为 headed）。
+    """
+    profile = profile or os.environ.get(ENV_PROFILE) or ConfigManager.get_from_config("browser", "profile")
+    if not profile:
+        raw_headless = (ConfigManager.get_from_config("browser", "headless") or "false").strip().lower()
+        return PROFILE_HEADLESS if raw_headless in ("true", "yes", "1") else PROFILE_HEADED
+    profile = profile.strip().lower()
+    if profile not in PROFILES:
+        raise ValueError(f"未知的运行模式: {profile}，可选值: {', '.join(PROFILES)}")
+    return profile
+
 
 class BrowserManager:
     """
@@ -20,27 +69,38 @@ class BrowserManager:
     - 并发执行模式（每个实例一个临时用户数据目录）
     """
 
-    def __init__(self,parallel=False):
+    def __init__(self,parallel=False,profile=None,user_data_dir=None):
         """
         :param parallel: True 表示并发执行（每个浏览器实例独立临时目录）
+        :param profile: 运行模式，不传时读取环境变量 BROWSER_PROFILE 或 config.ini
+        :param user_data_dir: 指定固定的用户数据目录（构建黄金快照时使用），不会被删除
         """
         self.driver = None
         self.wait = None
         self.logger = logging.getLogger(__name__)
         self.parallel = parallel
+        self.fixed_user_data_dir = user_data_dir
         self.user_data_dir = None
+        #最近一次启动各阶段耗时(秒)：user_data_dir / resolve_driver / spawn_service / create_session / cdp_setup / total
+        self.startup_phases = {}
 
-        #配置文件中是headless = False，需要转换
-        raw_headless = ConfigManager.get_from_config("browser", "headless") or False
-        self.headless_mode = False if raw_headless == "False" else True
+        #运行模式：headed / headless / fast，见 resolve_profile
+        self.profile = resolve_profile(profile)
+        self.headless_mode = self.profile != PROFILE_HEADED
 
 
     def _create_user_data_dir(self):
         """根据模式创建用户数据目录"""
         try:
-            if self.parallel:
-                # 每个实例用唯一目录
+            if self.fixed_user_data_dir:
+                self.user_data_dir = self.fixed_user_data_dir
+                os.makedirs(self.user_data_dir, exist_ok=True)
+            elif self.parallel:
+                # 每个实例用唯一目录；启用黄金快照时从快照复制，缓存是热的
                 self.user_data_dir = tempfile.mkdtemp(prefix=f"chrome_profile_{uuid.uuid4().hex}_")
+                golden = GoldenProfile.from_env()
+                if golden is not None:
+                    golden.clone(self.user_data_dir)
             else:
                 # 固定目录，模拟人工
                 self.user_data_dir = os.path.expanduser(os.path.join("~", ".selenium_chrome_profile"))
@@ -54,8 +114,24 @@ class BrowserManager:
         options = Options()
         options.add_argument(f"--user-data-dir={self.user_data_dir}")
 
-        #启动时最大化窗口
-        options.add_argument("--start-maximized")
+        if self.headless_mode:
+            #无头模式下最大化无效，固定分辨率，确保截图完整、布局一致
+            options.add_argument("--headless=new")
+            options.add_argument(f"--window-size={self._window_size()}")
+        else:
+            #启动时最大化窗口
+            options.add_argument("--start-maximized")
+
+        if self.profile == PROFILE_FAST:
+            #后台标签页/被遮挡窗口不降频，定时器不节流
+            options.add_argument("--disable-background-timer-throttling")
+            options.add_argument("--disable-backgrounding-occluded-windows")
+            options.add_argument("--disable-renderer-backgrounding")
+            #关闭首次运行、同步、翻译等与测试无关的后台功能
+            options.add_argument("--no-first-run")
+            options.add_argument("--disable-background-networking")
+            options.add_argument("--disable-sync")
+            options.add_argument("--disable-features=Translate,MediaRouter")
 
         ## UI 相关（更干净）
         #禁用浏览器拓展插件，防止某些插件干扰脚本（如广告拦截器、插件等）
@@ -71,35 +147,79 @@ class BrowserManager:
         #禁用Selenium加载的默认自动化拓展
         options.add_experimental_option('useAutomationExtension', False)
 
-        # 暂时不启用headless模式。
-        # # 启用无头模式（如果配置中设置为 true）
-        # if self.headless_mode:
-        #     self.options.add_argument("--headless=new")
-        #     self.options.add_argument("--disable-gpu")  # 避免某些图形渲染 bug
-        #     self.options.add_argument("--window-size=1920,1080")  # 设置默认分辨率，确保截图完整
-
         return options
 
+    @staticmethod
+    def _window_size():
+        return ConfigManager.get_from_config("browser", "window_size", "1920,1080")
+
+    @staticmethod
+    def _blocked_urls():
+        """config.ini [browser] blocked_urls（逗号分隔），未配置时用 DEFAULT_BLOCKED_URLS"""
+        raw = ConfigManager.get_from_config("browser", "blocked_urls")
+        if raw is None:
+            return list(DEFAULT_BLOCKED_URLS)
+        return [u.strip() for u in raw.split(",") if u.strip()]
+
+    def _apply_fast_profile(self, driver):
+        """fast 模式的 CDP 设置：屏蔽静态资源和统计脚本、关闭动画"""
+        blocked = self._blocked_urls()
+        if blocked:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked})
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": DISABLE_ANIMATIONS_JS})
+        #组件库（Element UI 等）按 prefers-reduced-motion 跳过的动画也一并关闭
+        driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+            "features": [{"name": "prefers-reduced-motion", "value": "reduce"}]
+        })
+
 
     def start_browser(self,browser_type="chrome"):
         """启动浏览器"""
         try:
+            t = time.perf_counter()
             self._create_user_data_dir()
+            profile_elapsed = time.perf_counter() - t
             options = self._setup_options()
 
-            self.logger.info(f"启动Chrome(自我驱动管理),用户数据目录:{self.user_data_dir}")
-            print(f"启动Chrome,用户数据目录:{self.user_data_dir}")
-            # print(f"无头模式状态: {self.headless_mode}")
+            self.logger.info(f"启动Chrome(自我驱动管理),运行模式:{self.profile},用户数据目录:{self.user_data_dir}")
+            print(f"启动Chrome,运行模式:{self.profile},用户数据目录:{self.user_data_dir}")
+
+            phases = {"user_data_dir": profile_elapsed}
+            begin = time.perf_counter()
+
+            # 1.解析 chromedriver 路径（锁文件缓存，同一进程只解析一次）
+            driver_path = resolve_chromedriver()
+            phases["resolve_driver"] = time.perf_counter() - begin
+
+            # 启动Chrome浏览器服务；包装 service.start 单独统计驱动进程的启动耗时
+            service = ChromeService(executable_path=driver_path)
+            start_service = service.start
+
+            def timed_start():
+                t = time.perf_counter()
+                start_service()
+                phases["spawn_service"] = time.perf_counter() - t
+            service.start = timed_start
 
-            # 启动Chrome浏览器服务
-            service = ChromeService(executable_path=ChromeDriverManager().install())
-            # 创建 webDriver 实例
+            # 2.创建 webDriver 实例（启动驱动进程 + 创建浏览器会话）
+            t = time.perf_counter()
             driver = webdriver.Chrome(service=service, options=options)
+            phases["create_session"] = time.perf_counter() - t - phases.get("spawn_service", 0.0)
 
-            # 注入 JS 脚本，将 navigator.webdriver 设置为 undefined
+            # 3.注入 JS 脚本，将 navigator.webdriver 设置为 undefined
+            t = time.perf_counter()
             driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
                 "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             })
+            #请求跟踪器，BasePage.network 按 XHR/fetch 请求等待
+            network_waits.install(driver)
+            if self.profile == PROFILE_FAST:
+                self._apply_fast_profile(driver)
+            phases["cdp_setup"] = time.perf_counter() - t
+            phases["total"] = time.perf_counter() - begin + profile_elapsed
+            self.startup_phases = phases
+            self.logger.info("Chrome启动耗时: " + " ".join(f"{k}={v * 1000:.0f}ms" for k, v in phases.items()))
 
             #把局部driver 赋值给self.driver
             self.driver = driver
@@ -127,8 +247,9 @@ class BrowserManager:
             self._cleanup_user_data_dir()
 
     def _cleanup_user_data_dir(self):
-        """仅在并发模式下删除临时目录"""
-        if self.parallel and self.user_data_dir and os.path.exists(self.user_data_dir):
+        """仅在并发模式下删除临时目录（指定的固定目录和黄金快照目录不删除）"""
+        if (self.parallel and not self.fixed_user_data_dir and self.user_data_dir
+                and os.path.exists(self.user_data_dir) and not self._is_golden_dir(self.user_data_dir)):
             try:
                 shutil.rmtree(self.user_data_dir)
                 self.logger.info(f"已删除临时用户数据目录: {self.user_data_dir}")
@@ -136,3 +257,7 @@ class BrowserManager:
                 self.logger.warning(f"删除临时目录失败: {e}",exc_info=True)
         self.user_data_dir = None
 
+    @staticmethod
+    def _is_golden_dir(path):
+        golden = GoldenProfile.from_env()
+        return golden is not None and os.path.realpath(path) == os.path.realpath(golden.path)
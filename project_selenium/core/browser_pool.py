@@ -0,0 +1,201 @@
+#browser_pool.py
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
+from core.browser_manager import BrowserManager
+from utils.config_manager import ConfigManager
+
+
+# 池中的空位：会话被回收后补充失败时放入，租用方拿到后现场启动
+VACANCY = None
+
+# 会话已不可用：chromedriver 进程退出时抛出的是 urllib3 的 MaxRetryError / 连接错误，而不是 WebDriverException
+SESSION_ERRORS = (WebDriverException, HTTPError, OSError)
+
+
+class PooledBrowser:
+    """池中的一个浏览器会话：BrowserManager + 已租用次数"""
+
+    def __init__(self, manager: BrowserManager):
+        self.manager = manager
+        self.uses = 0
+
+    @property
+    def driver(self):
+        return self.manager.driver
+
+
+class BrowserPool:
+    """
+    预热的浏览器池：提前启动 size 个 Chrome，测试时租用，用完归还，省掉每个测试类启动浏览器的几秒钟。
+    - 并发模式下每个会话使用独立的临时用户数据目录；非并发模式（单进程、池大小 1）使用固定目录，模拟人工操作
+    - 归还时通过 CDP 清理 cookie、localStorage/sessionStorage、多余标签页，下一个测试拿到的是干净状态
+    - 会话被租用 max_uses 次后，或者浏览器已经崩溃/断开时，关闭并重新启动一个补进池里
+    - 线程安全；pytest-xdist 下每个 worker 进程各自一个池（自动使用并发模式）
+    """
+
+    # 归还时清理的站点数据类型（CDP Storage.clearDataForOrigin）
+    STORAGE_TYPES = "cookies,local_storage,session_storage,indexeddb,websql,service_workers,cache_storage"
+
+    def __init__(self, size: int = 1, max_uses: int = 20, browser_type: str = "chrome", parallel: bool = True):
+        """
+        :param parallel: False 时使用 BrowserManager 的固定用户数据目录（只能有一个会话，size 必须为 1）
+        """
+        if not parallel and size > 1:
+            raise ValueError("非并发模式共用固定的用户数据目录，浏览器池大小只能为 1")
+        self.parallel = parallel
+        self.size = size
+        self.max_uses = max_uses
+        self.browser_type = browser_type
+        self.logger = logging.getLogger(__name__)
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 归还时需要清理的站点（被测系统的地址）
+        base_url = ConfigManager.get_from_config("urls", "base_url") or ""
+        parts = urlsplit(base_url)
+        self.origins = [f"{parts.scheme}://{parts.netloc}"] if parts.scheme and parts.netloc else []
+
+    @classmethod
+    def from_config(cls, browser_type: str = "chrome", parallel=None) -> "BrowserPool":
+        """
+        从 config.ini 的 [browser] pool_size / pool_max_uses 创建。
+        parallel 不传时：xdist worker 中或池大小大于 1 时为并发模式，否则使用固定用户数据目录
+        """
+        size = int(ConfigManager.get_from_config("browser", "pool_size", "1"))
+        max_uses = int(ConfigManager.get_from_config("browser", "pool_max_uses", "20"))
+        if parallel is None:
+            parallel = bool(os.environ.get("PYTEST_XDIST_WORKER")) or size > 1
+        return cls(size=size, max_uses=max_uses, browser_type=browser_type, parallel=parallel)
+
+    def _launch(self) -> PooledBrowser:
+        manager = BrowserManager(parallel=self.parallel)
+        manager.start_browser(browser_type=self.browser_type)
+        entry = PooledBrowser(manager)
+        with self._lock:
+            self._all.append(entry)
+        return entry
+
+    def start(self):
+        """并行启动 size 个浏览器"""
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="browser-pool") as executor:
+            for entry in executor.map(lambda _: self._launch(), range(self.size)):
+                self._idle.put(entry)
+        self.logger.info(f"浏览器池已启动: {self.size} 个会话")
+        return self
+
+    def _discard(self, entry: PooledBrowser):
+        """关闭会话（只关闭一次），关闭时报错只记录日志"""
+        with self._lock:
+            if entry not in self._all:
+                return
+            self._all.remove(entry)
+        try:
+            entry.manager.close_browser()
+        except Exception as e:
+            self.logger.warning(f"关闭浏览器会话失败: {e}")
+
+    def _is_alive(self, entry: PooledBrowser) -> bool:
+        try:
+            entry.driver.current_window_handle
+            return True
+        except SESSION_ERRORS:
+            return False
+
+    def reset(self, driver):
+        """清理会话状态：只保留一个标签页，清空存储和 cookie，回到空白页"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            # 先清当前页面所在站点的存储（被测系统之外的站点也能覆盖到）
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        except WebDriverException:
+            pass
+        for origin in self.origins:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                   {"origin": origin, "storageTypes": self.STORAGE_TYPES})
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+
+    def acquire(self, timeout: float = None):
+        """
+        租用一个浏览器，池中没有空闲会话时等待；拿到空位或已断开的会话时现场启动一个。
+        启动失败时把空位放回池中（池容量不变，下一次租用会再试），并把异常抛给租用方。
+        """
+        if self._closed:
+            raise RuntimeError("浏览器池已关闭")
+        entry = self._idle.get(timeout=timeout)
+        try:
+            if entry is not VACANCY and not self._is_alive(entry):
+                self.logger.warning("浏览器会话已断开，重新启动")
+                self._discard(entry)
+                entry = VACANCY
+            if entry is VACANCY:
+                self.logger.info("浏览器池有空位，启动新的会话")
+                entry = self._launch()
+        except BaseException:
+            if entry is not VACANCY:
+                self._discard(entry)
+            self._idle.put(VACANCY)
+            raise
+        entry.uses += 1
+        return entry
+
+    def release(self, entry: PooledBrowser):
+        """
+        归还浏览器：达到使用次数上限或清理失败时重启，否则清理状态后放回池中。
+        无论中间出什么错，最后都会放回一个会话或空位，池不会变小。
+        """
+        if self._closed:
+            self._discard(entry)
+            return
+        replacement = VACANCY
+        try:
+            if entry.uses < self.max_uses:
+                try:
+                    self.reset(entry.driver)
+                    replacement = entry
+                except SESSION_ERRORS as e:
+                    self.logger.warning(f"清理浏览器状态失败，重新启动: {e}")
+            if replacement is VACANCY:
+                self._discard(entry)
+                try:
+                    replacement = self._launch()
+                except Exception as e:
+                    # 补充失败时放回一个空位，下一次租用时再启动（失败会抛给租用方）
+                    self.logger.error(f"浏览器池补充会话失败，留下空位: {e}", exc_info=True)
+        finally:
+            if replacement is VACANCY:
+                self._discard(entry)
+            self._idle.put(replacement)
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """with pool.lease() as driver: ...  结束时自动归还"""
+        entry = self.acquire(timeout=timeout)
+        try:
+            yield entry.driver
+        finally:
+            self.release(entry)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            entries = list(self._all)
+            self._all.clear()
+        for entry in entries:
+            entry.manager.close_browser()
+        self.logger.info("浏览器池已关闭")
@@ -0,0 +1,58 @@
+#element_query.py
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from core.wait_engine import LOCATOR_JS
+
+
+"""
+批量读取元素状态：一次 execute_script 同时解析多个定位器，返回每个元素的
+是否存在 / 是否可见 / 是否可用 / 文本 / 输入值 / 位置大小。
+原来每个状态各是一次到 chromedriver 的 HTTP 请求（find + is_displayed + is_enabled + text ...），
+远程 driver 上往返次数是主要的延迟来源。
+"""
+
+# arguments = [[[using, value], ...]]
+QUERY_SCRIPT = LOCATOR_JS + """
+return arguments[0].map(function (locator) {
+    var el = findFirst(locator[0], locator[1]);
+    if (!el) return {found: false};
+    var visible = isShown(el), rect = el.getBoundingClientRect();
+    return {
+        found: true,
+        element: el,
+        visible: visible,
+        enabled: !el.disabled,
+        text: visible ? el.innerText.trim() : '',
+        value: 'value' in el ? String(el.value) : null,
+        rect: {x: rect.x, y: rect.y, width: rect.width, height: rect.height}
+    };
+});
+"""
+
+
+@dataclass
+class ElementState:
+    """一个定位器的查询结果；元素不存在时 found=False，其余字段为默认值"""
+    found: bool = False
+    visible: bool = False
+    enabled: bool = False
+    text: str = ""
+    value: Optional[str] = None
+    rect: Dict[str, float] = field(default_factory=dict)
+    element: object = None
+
+    @property
+    def clickable(self) -> bool:
+        """与 expected_conditions.element_to_be_clickable 一致：可见且可用"""
+        return self.visible and self.enabled
+
+
+def query_states(driver, locators) -> Dict[str, ElementState]:
+    """
+    :param locators: {名称: 定位元组}，例如 {"客户名称": (By.XPATH, "...")}
+    :return: {名称: ElementState}，顺序与传入一致
+    """
+    names = list(locators)
+    results = driver.execute_script(QUERY_SCRIPT, [list(locators[name]) for name in names])
+    return {name: ElementState(**result) for name, result in zip(names, results)}
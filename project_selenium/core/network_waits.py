@@ -0,0 +1,172 @@
+#network_waits.py
+
+import logging
+import time
+from selenium.common.exceptions import JavascriptException, TimeoutException
+from core.wait_engine import WAIT_STATS, ensure_script_timeout
+
+
+"""
+按网络请求等待，代替固定的 time.sleep：
+- 浏览器启动时通过 CDP Page.addScriptToEvaluateOnNewDocument 在每个页面装一个请求跟踪器，
+  包装 XMLHttpRequest 和 fetch，记录在途请求数和最近完成的请求（方法、地址、状态码）
+- request(...)：等到某个请求完成，例如“Excel 上传的 POST 完成”
+- idle(...)：等到没有在途请求并持续 idle_ms 毫秒
+- 和 WaitEngine 一样，一次 execute_async_script 完成一次等待，由页面内的事件触发，不轮询；耗时计入 WAIT_STATS
+用法：
+    seq = self.network.mark()            # 触发操作前记下序号
+    file_input.send_keys(path)
+    self.network.request(method="POST", since=seq)
+"""
+
+# 页面里的请求跟踪器（重复执行无副作用）
+TRACKER_JS = """
+(function () {
+    if (window.__netTracker) return;
+    var t = window.__netTracker = {inflight: 0, seq: 0, last: performance.now(), done: [], listeners: []};
+    function notify() {
+        t.last = performance.now();
+        t.listeners.slice().forEach(function (listener) { listener(); });
+    }
+    function start() { t.inflight++; notify(); }
+    function end(method, url, status) {
+        t.inflight = Math.max(0, t.inflight - 1);
+        t.seq++;
+        t.done.push({seq: t.seq, method: method, url: url, status: status});
+        if (t.done.length > 200) t.done.shift();
+        notify();
+    }
+
+    var open = XMLHttpRequest.prototype.open, send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__net = {method: String(method).toUpperCase(), url: String(url)};
+        return open.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function () {
+        var xhr = this, info = xhr.__net || {method: 'GET', url: ''};
+        start();
+        xhr.addEventListener('loadend', function () { end(info.method, xhr.responseURL || info.url, xhr.status); });
+        try {
+            return send.apply(this, arguments);
+        } catch (e) {
+            end(info.method, info.url, 0);
+            throw e;
+        }
+    };
+
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function (input, init) {
+            var method = String((init && init.method) || (input && input.method) || 'GET').toUpperCase();
+            var url = typeof input === 'string' ? input : (input && input.url) || String(input);
+            start();
+            return fetch.apply(this, arguments).then(
+                function (resp) { end(method, resp.url || url, resp.status); return resp; },
+                function (err) { end(method, url, 0); throw err; });
+        };
+    }
+})();
+"""
+
+# arguments = []
+MARK_SCRIPT = TRACKER_JS + "return window.__netTracker.seq;"
+
+# arguments = [kind, url_contains, method, since, idle_ms, timeout_ms, callback]
+WAIT_SCRIPT = TRACKER_JS + """
+var kind = arguments[0], pattern = arguments[1], method = arguments[2], since = arguments[3],
+    idle = arguments[4], timeout = arguments[5], done = arguments[arguments.length - 1];
+var t = window.__netTracker, start = performance.now(), finished = false, idleTimer = null;
+
+function matched() {
+    for (var i = 0; i < t.done.length; i++) {
+        var r = t.done[i];
+        if (r.seq > since && (!method || r.method === method) && (!pattern || r.url.indexOf(pattern) >= 0)) return r;
+    }
+    return null;
+}
+function finish(result) {
+    finished = true;
+    t.listeners.splice(t.listeners.indexOf(tick), 1);
+    clearTimeout(idleTimer);
+    clearTimeout(deadline);
+    result.elapsed = performance.now() - start;
+    result.inflight = t.inflight;
+    done(result);
+}
+function tick() {
+    if (finished) return;
+    if (kind === 'network_request') {
+        var r = matched();
+        if (r) finish({ok: true, request: r});
+        return;
+    }
+    if (kind !== 'network_idle') { finish({ok: false, error: 'unsupported wait kind: ' + kind}); return; }
+    clearTimeout(idleTimer);
+    if (t.inflight > 0) return;
+    var quiet = performance.now() - t.last;
+    if (quiet >= idle) finish({ok: true});
+    else idleTimer = setTimeout(tick, idle - quiet);
+}
+t.listeners.push(tick);
+var deadline = setTimeout(function () { if (!finished) finish({ok: false}); }, timeout);
+tick();
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def install(driver):
+    """在之后打开的每个页面里安装请求跟踪器（BrowserManager 启动浏览器时调用）"""
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": TRACKER_JS})
+
+
+class NetworkWaits:
+    """按 XHR/fetch 请求等待，超时抛出 TimeoutException"""
+
+    def __init__(self, driver, timeout=10, stats=WAIT_STATS):
+        self.driver = driver
+        self.timeout = timeout
+        self.stats = stats
+        ensure_script_timeout(driver, timeout)
+
+    def mark(self):
+        """返回当前已完成请求的序号，传给 request(since=...)，只匹配之后完成的请求"""
+        return self.driver.execute_script(MARK_SCRIPT)
+
+    def _wait(self, kind, stats_key, url_contains=None, method=None, since=0, idle_ms=0, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        ensure_script_timeout(self.driver, timeout)
+        begin = time.perf_counter()
+        try:
+            result = self.driver.execute_async_script(
+                WAIT_SCRIPT, kind, url_contains, method.upper() if method else None, since, idle_ms,
+                int(timeout * 1000))
+        except JavascriptException as e:
+            # 等待期间页面跳转，脚本被中断
+            result = {"ok": False, "error": str(e)}
+        elapsed = time.perf_counter() - begin
+        ok = bool(result and result.get("ok"))
+        self.stats.record(kind, stats_key, elapsed, ok)
+        if not ok:
+            detail = f"，在途请求 {result.get('inflight')}" if result and "inflight" in result else ""
+            if result and result.get("error"):
+                detail += f"，{result['error']}"
+            raise TimeoutException(f"等待 {kind} 超时({timeout}s): {stats_key[0]}={stats_key[1]}{detail}")
+        return result
+
+    def request(self, url_contains=None, method=None, since=0, timeout=None):
+        """
+        等待一个 since 之后完成的请求，返回 {"method", "url", "status"}
+        :param url_contains: 地址包含的字符串，不传时匹配任意地址
+        :param method: 请求方法，例如 "POST"
+        """
+        key = ("request", f"{method or '*'} {url_contains or '*'}")
+        request = self._wait("network_request", key, url_contains, method, since, timeout=timeout)["request"]
+        if request["status"] == 0 or request["status"] >= 400:
+            logger.warning(f"请求失败: {request['method']} {request['url']} -> {request['status']}")
+        return request
+
+    def idle(self, idle_ms=500, timeout=None):
+        """等待没有在途请求并持续 idle_ms 毫秒"""
+        self._wait("network_idle", ("idle", f"{idle_ms}ms"), idle_ms=idle_ms, timeout=timeout)
+        return True
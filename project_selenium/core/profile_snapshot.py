@@ -0,0 +1,173 @@
+#profile_snapshot.py
+
+import errno
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from utils.config_manager import ConfigManager
+
+
+"""
+Chrome 用户数据目录的“黄金快照”：
+- 每个测试会话只构建一次：用一个 Chrome 打开 base_url，完成首次运行初始化并预热 HTTP 缓存和 JS 代码缓存
+- 并发模式下每个浏览器实例拿到快照的一份副本，而不是空目录，省掉首次初始化，缓存是热的
+- 复制时优先用 reflink（写时复制，Linux btrfs/xfs 等支持 FICLONE 的文件系统），不支持时普通复制；
+  不使用硬链接（Chrome 会原地改写缓存文件，共享 inode 会把修改写回快照），副本里的修改不会影响快照
+- pytest-xdist 下由主进程通过环境变量指定快照目录，第一个需要的 worker 持锁构建，其余 worker 等待
+"""
+
+logger = logging.getLogger(__name__)
+
+# 主进程写入快照目录，xdist worker 继承
+ENV_GOLDEN_DIR = "SELENIUM_GOLDEN_PROFILE"
+
+# 构建完成的标记文件
+READY_MARKER = ".golden_ready"
+BUILD_LOCK = ".golden_building"
+
+# 不复制的文件：Chrome 实例锁、崩溃报告
+SKIP_NAMES = {"SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile", "Crashpad", "BrowserMetrics"}
+
+# Linux ioctl FICLONE
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dst) -> bool:
+    """reflink 复制；文件系统不支持时删除已创建的空目标文件，返回 False"""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+class CloneStats:
+    def __init__(self):
+        self.reflinked = 0
+        self.copied = 0
+
+    def __str__(self):
+        return f"reflink={self.reflinked} copy={self.copied}"
+
+
+def clone_tree(src, dst) -> CloneStats:
+    """复制快照目录：reflink（写时复制） > 普通复制"""
+    stats = CloneStats()
+    reflink_ok = True
+    for root, dirs, files in os.walk(src):
+        dirs[:] = [d for d in dirs if d not in SKIP_NAMES]
+        rel_root = os.path.relpath(root, src)
+        os.makedirs(os.path.join(dst, rel_root), exist_ok=True)
+        for name in files:
+            if name in SKIP_NAMES or name in (READY_MARKER, BUILD_LOCK):
+                continue
+            rel_path = os.path.normpath(os.path.join(rel_root, name))
+            source, target = os.path.join(src, rel_path), os.path.join(dst, rel_path)
+            if os.path.islink(source):
+                continue
+            # 第一次 reflink 失败说明文件系统不支持，之后不再尝试
+            if reflink_ok:
+                if _reflink(source, target):
+                    stats.reflinked += 1
+                    continue
+                reflink_ok = False
+            shutil.copy2(source, target)
+            stats.copied += 1
+    return stats
+
+
+class GoldenProfile:
+    """一个会话共用的快照目录"""
+
+    def __init__(self, path, build_timeout: float = 120):
+        self.path = path
+        self.build_timeout = build_timeout
+
+    @classmethod
+    def from_env(cls):
+        """返回环境变量指定的快照；未启用时返回 None"""
+        path = os.environ.get(ENV_GOLDEN_DIR)
+        return cls(path) if path else None
+
+    @staticmethod
+    def enabled() -> bool:
+        return (ConfigManager.get_from_config("browser", "golden_profile", "false") or "").strip().lower() in ("true", "yes", "1")
+
+    @staticmethod
+    def new_path():
+        return os.path.join(tempfile.gettempdir(), f"selenium_golden_{uuid.uuid4().hex}")
+
+    def is_ready(self) -> bool:
+        return os.path.exists(os.path.join(self.path, READY_MARKER))
+
+    def _build(self):
+        # 延迟导入，避免和 browser_manager 循环导入
+        from core.browser_manager import BrowserManager
+
+        begin = time.perf_counter()
+        manager = BrowserManager(parallel=False, user_data_dir=self.path)
+        driver = manager.start_browser()
+        try:
+            base_url = ConfigManager.get_from_config("urls", "base_url")
+            if base_url:
+                driver.get(base_url)
+                # 等页面资源加载完，让 HTTP 缓存和代码缓存落盘
+                driver.execute_async_script(
+                    "var done = arguments[0];"
+                    "if (document.readyState === 'complete') { setTimeout(done, 500); }"
+                    "else { window.addEventListener('load', function () { setTimeout(done, 500); }); }")
+        finally:
+            manager.close_browser()
+        with open(os.path.join(self.path, READY_MARKER), "w", encoding="utf-8") as f:
+            f.write(time.strftime("%Y-%m-%d %H:%M:%S"))
+        logger.info(f"黄金快照已构建: {self.path}，耗时 {time.perf_counter() - begin:.2f}s")
+
+    def ensure(self):
+        """快照不存在时构建；多个进程同时调用时只有一个构建，其余等待"""
+        if self.is_ready():
+            return self
+        os.makedirs(self.path, exist_ok=True)
+        lock = os.path.join(self.path, BUILD_LOCK)
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            deadline = time.monotonic() + self.build_timeout
+            while not self.is_ready():
+                if not os.path.exists(lock) and not self.is_ready():
+                    raise RuntimeError(f"黄金快照构建失败: {self.path}")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"等待黄金快照构建超时: {self.path}")
+                time.sleep(0.2)
+            return self
+        os.close(fd)
+        try:
+            self._build()
+        finally:
+            os.remove(lock)
+        return self
+
+    def clone(self, dst):
+        """把快照复制到 dst（dst 已存在时合并进去）"""
+        self.ensure()
+        begin = time.perf_counter()
+        stats = clone_tree(self.path, dst)
+        logger.info(f"复制黄金快照到 {dst}: {stats}，耗时 {(time.perf_counter() - begin) * 1000:.0f}ms")
+        return stats
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
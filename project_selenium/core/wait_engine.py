@@ -0,0 +1,202 @@
+#wait_engine.py
+
+import logging
+import threading
+import time
+from selenium.common.exceptions import JavascriptException, StaleElementReferenceException, TimeoutException
+
+
+"""
+事件驱动的等待：在页面里挂一个 MutationObserver，条件满足时立即返回，一次 execute_async_script 完成一次等待。
+- 不再每 500ms 发一次 WebDriver 请求轮询（WebDriverWait），也不和隐式等待叠加
+- 条件：present（存在）/ visible（可见）/ clickable（可见且可用）/ gone（不存在或不可见）/ text_equals（可见且文本等于）
+- 与 Selenium expected_conditions 一致，只看第一个匹配的元素
+- 每次等待的耗时按 条件 + 定位器 累计到 WAIT_STATS，会话结束时输出汇总（见 tests/conftest.py）
+"""
+
+# 页面里的公共函数：按 Selenium 定位策略查找第一个元素 / 判断元素是否可见（element_query.py 也使用）
+LOCATOR_JS = """
+function findFirst(using, value) {
+    switch (using) {
+        case 'css selector': return document.querySelector(value);
+        case 'xpath':
+            return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        case 'id': return document.getElementById(value);
+        case 'name': return document.getElementsByName(value)[0] || null;
+        case 'class name': return document.getElementsByClassName(value)[0] || null;
+        case 'tag name': return document.getElementsByTagName(value)[0] || null;
+        case 'link text':
+            return Array.prototype.find.call(document.links, function (a) { return a.innerText.trim() === value; }) || null;
+        case 'partial link text':
+            return Array.prototype.find.call(document.links, function (a) { return a.innerText.indexOf(value) >= 0; }) || null;
+    }
+    throw new Error('unsupported locator strategy: ' + using);
+}
+
+function isShown(el) {
+    if (!el.isConnected || el.getClientRects().length === 0) return false;
+    var style = getComputedStyle(el);
+    if (style.visibility === 'hidden' || style.visibility === 'collapse') return false;
+    for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+        if (getComputedStyle(node).opacity === '0') return false;
+    }
+    return true;
+}
+"""
+
+# 页面里执行的等待脚本：arguments = [using, value, kind, expected, timeout_ms, callback]
+WAIT_SCRIPT = LOCATOR_JS + """
+var using = arguments[0], value = arguments[1], kind = arguments[2], expected = arguments[3],
+    timeout = arguments[4], done = arguments[arguments.length - 1];
+
+function check() {
+    var el = findFirst(using, value);
+    switch (kind) {
+        case 'present': return el ? {el: el} : null;
+        case 'visible': return el && isShown(el) ? {el: el} : null;
+        case 'clickable': return el && isShown(el) && !el.disabled ? {el: el} : null;
+        case 'gone': return !el || !isShown(el) ? {el: null} : null;
+        case 'text_equals': return el && isShown(el) && el.innerText.trim() === expected ? {el: el} : null;
+    }
+    throw new Error('unsupported wait condition: ' + kind);
+}
+
+var hit = check();
+if (hit) { done({ok: true, el: hit.el, elapsed: 0}); return; }
+
+var start = performance.now(), finished = false;
+function finish(result) {
+    finished = true;
+    observer.disconnect();
+    clearInterval(timer);
+    clearTimeout(deadline);
+    result.elapsed = performance.now() - start;
+    done(result);
+}
+function tick() {
+    if (finished) return;
+    try {
+        var hit = check();
+        if (hit) finish({ok: true, el: hit.el});
+    } catch (e) {
+        finish({ok: false, error: String(e)});
+    }
+}
+var observer = new MutationObserver(tick);
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+// CSS 过渡/动画结束、窗口尺寸变化不会产生 DOM 变化，低频补查一次
+var timer = setInterval(tick, 250);
+var deadline = setTimeout(function () { if (!finished) finish({ok: false}); }, timeout);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class WaitStats:
+    """按 条件 + 定位器 累计等待次数、总耗时、最长耗时、超时次数（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, kind, locator, elapsed, ok):
+        key = (kind, f"{locator[0]}={locator[1]}")
+        with self._lock:
+            count, total, longest, timeouts = self._stats.get(key, (0, 0.0, 0.0, 0))
+            self._stats[key] = (count + 1, total + elapsed, max(longest, elapsed), timeouts + (0 if ok else 1))
+
+    def total(self):
+        with self._lock:
+            return sum(v[1] for v in self._stats.values())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def format_report(self, limit=20):
+        with self._lock:
+            rows = sorted(self._stats.items(), key=lambda kv: kv[1][1], reverse=True)
+        if not rows:
+            return ""
+        lines = [f"{'total(s)':>9} {'max(s)':>7} {'count':>6} {'timeout':>7}  condition"]
+        for (kind, locator), (count, total, longest, timeouts) in rows[:limit]:
+            lines.append(f"{total:9.2f} {longest:7.2f} {count:6d} {timeouts:7d}  {kind} {locator}")
+        return "\n".join(lines)
+
+
+# 进程内的等待统计
+WAIT_STATS = WaitStats()
+
+
+def ensure_script_timeout(driver, timeout):
+    """异步脚本超时要比等待超时长；同一个 driver 只在需要加长时设置一次"""
+    script_timeout = max(30, timeout + 5)
+    if getattr(driver, "_wait_engine_script_timeout", 0) < script_timeout:
+        driver.set_script_timeout(script_timeout)
+        driver._wait_engine_script_timeout = script_timeout
+
+
+class WaitEngine:
+    """
+    用法：
+        waits = WaitEngine(driver, timeout=10)
+        element = waits.clickable((By.ID, "submit"))
+        waits.gone((By.CLASS_NAME, "el-loading-mask"))
+    超时抛出 selenium 的 TimeoutException，和 WebDriverWait 一致。
+    """
+
+    # 页面跳转会中断正在执行的脚本，剩余时间内重试
+    RETRY_ERRORS = (JavascriptException, StaleElementReferenceException)
+
+    def __init__(self, driver, timeout=10, stats=WAIT_STATS):
+        self.driver = driver
+        self.timeout = timeout
+        self.stats = stats
+        ensure_script_timeout(driver, timeout)
+
+    def _wait(self, kind, locator, expected=None, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        begin = time.perf_counter()
+        deadline = begin + timeout
+        result = {"ok": False}
+        while True:
+            remaining = deadline - time.perf_counter()
+            try:
+                result = self.driver.execute_async_script(
+                    WAIT_SCRIPT, locator[0], locator[1], kind, expected, max(int(remaining * 1000), 0))
+                break
+            except self.RETRY_ERRORS as e:
+                if time.perf_counter() >= deadline:
+                    result = {"ok": False, "error": str(e)}
+                    break
+                time.sleep(0.05)
+
+        elapsed = time.perf_counter() - begin
+        ok = bool(result and result.get("ok"))
+        self.stats.record(kind, locator, elapsed, ok)
+        logger.debug(f"wait {kind} {locator}: {elapsed:.3f}s ok={ok}")
+        if not ok:
+            detail = f"，{result['error']}" if result and result.get("error") else ""
+            raise TimeoutException(f"等待 {kind} 超时({timeout}s): {locator[0]}={locator[1]}{detail}")
+        return result.get("el")
+
+    def present(self, locator, timeout=None):
+        """元素出现在 DOM 中，返回元素"""
+        return self._wait("present", locator, timeout=timeout)
+
+    def visible(self, locator, timeout=None):
+        """元素可见，返回元素"""
+        return self._wait("visible", locator, timeout=timeout)
+
+    def clickable(self, locator, timeout=None):
+        """元素可见且没有被禁用，返回元素"""
+        return self._wait("clickable", locator, timeout=timeout)
+
+    def gone(self, locator, timeout=None):
+        """元素不存在或不可见"""
+        self._wait("gone", locator, timeout=timeout)
+        return True
+
+    def text_equals(self, locator, text, timeout=None):
+        """元素可见且文本（去掉首尾空白）等于 text，返回元素"""
+        return self._wait("text_equals", locator, expected=text, timeout=timeout)
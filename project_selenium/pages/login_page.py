@@ -1,15 +1,15 @@
 #login_page.py
 
+import json
 from time import sleep
+from urllib.parse import urlsplit
 
 from selenium.common import TimeoutException
 
 from core.base_page import BasePage
 from selenium.webdriver.common.by import By
 from utils.config_manager import ConfigManager
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.support import expected_conditions as EC
 
 class LoginPage(BasePage):
 
@@ -38,7 +38,7 @@ class LoginPage(BasePage):
             self.click(self.LOGIN_BUTTON,"Login Button")
 
             # 显式等待 登录按钮消失，最多等10秒
-            WebDriverWait(self.driver, 10).until_not(EC.visibility_of_element_located(self.LOGIN_BUTTON))
+            self.waits.gone(self.LOGIN_BUTTON)
             self.logger.info(f"Login successful:{username}")
 
         except TimeoutException as e:
@@ -62,11 +62,54 @@ class LoginPage(BasePage):
         self._perform_login(username,password)
 
 
+    def login_with_session(self,login_key,target_url=None):
+        """
+        注入接口登录拿到的 loginKey，直接以已登录状态打开 target_url（默认 base_url）。
+        loginKey 写入位置见 config.ini [api_login] storage / storage_key：
+        - localStorage / sessionStorage：通过 CDP 在页面脚本执行前写入，首次打开页面时前端就能读到
+        - cookie：通过 CDP Network.setCookie 写入站点 cookie
+        """
+        base_url = ConfigManager.get_from_config("urls","base_url")
+        if not base_url:
+            raise ValueError("Base URL not found in config.ini")
+        target_url = target_url or base_url
+        storage = ConfigManager.get_from_config("api_login","storage","localStorage")
+        storage_key = ConfigManager.get_from_config("api_login","storage_key","loginKey")
+
+        script_id = None
+        try:
+            if storage == "cookie":
+                self.driver.execute_cdp_cmd("Network.setCookie", {
+                    "name": storage_key, "value": login_key, "url": target_url, "path": "/"
+                })
+            else:
+                # 只在目标站点写入；打开页面后移除脚本，避免之后每次导航都写回旧的 loginKey
+                origin = "{0.scheme}://{0.netloc}".format(urlsplit(target_url))
+                source = (f"if (location.origin === {json.dumps(origin)}) "
+                          f"{{ window.{storage}.setItem({json.dumps(storage_key)}, {json.dumps(login_key)}); }}")
+                script_id = self.driver.execute_cdp_cmd(
+                    "Page.addScriptToEvaluateOnNewDocument", {"source": source})["identifier"]
+            self.driver.get(target_url)
+            self.logger.info(f"Navigated to {target_url} with injected {storage}.{storage_key}")
+        finally:
+            if script_id is not None:
+                self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+
+        #前端路由是异步的（先请求接口校验 loginKey 再跳转），等请求停下来再判断，避免刚打开页面时误判
+        settle_idle_ms = int(ConfigManager.get_from_config("api_login","settle_idle_ms","500"))
+        try:
+            self.network.idle(idle_ms=settle_idle_ms)
+        except TimeoutException:
+            self.logger.warning(f"等待页面请求停止超时，直接检查是否停留在登录页: {target_url}")
+
+        #注入失效（过期/存放位置不对）时前端会停在登录页
+        #用 JS 直接查询，不受隐式等待影响（找不到元素时不会白等 2 秒）
+        if self.driver.execute_script("return !!document.querySelector('.login-button');"):
+            raise RuntimeError(f"loginKey 注入后仍停留在登录页: {target_url}")
+
     def is_welcome_shown(self,username):
         try:
-            element = WebDriverWait(self.driver, 10).until(
-                EC.visibility_of_element_located(self.WELCOME_MESSAGE)
-            )
+            element = self.waits.visible(self.WELCOME_MESSAGE)
 
             if element.is_displayed():
                 self.logger.info(f"登录成功 - 用户：{username}")
@@ -1,10 +1,9 @@
 #order_page.py
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.support.wait import WebDriverWait
 from core.base_page import BasePage
+from utils.config_manager import ConfigManager
 from datetime import datetime
 import time
 
@@ -27,10 +26,22 @@ class OrderPage(BasePage):
     LOADING_MASK = (By.CLASS_NAME, "el-loading-mask")
     ORDER_NUM = (By.XPATH,"// p[contains(text(), '客户单号为：')]")
 
+    # 上传 Excel 后等待 POST 完成 + 遮罩消失的总时间（秒，与原来等待遮罩的 10 秒相同）
+    UPLOAD_TIMEOUT = 10
+    # Excel 上传接口地址包含的片段（config.ini [order] upload_url_contains 可覆盖）
+    UPLOAD_URL_CONTAINS = "upload"
+    # 保存后网络持续空闲多久视为页面稳定（毫秒），最多等 SETTLE_TIMEOUT 秒（原来固定等 5 秒）
+    SETTLE_IDLE_MS = 500
+    SETTLE_TIMEOUT = 5
+
     def _timestamp(self):
         """生成时间戳"""
         return datetime.now().strftime("%Y%m%d_%H%M%S")
 
+    def _upload_url_contains(self):
+        """Excel 上传接口地址中的固定片段，避免其他 POST 请求提前满足等待"""
+        return ConfigManager.get_from_config("order", "upload_url_contains", self.UPLOAD_URL_CONTAINS)
+
     def _get_customer_option_locator(self, customer_name):
         """生成客户选项的动态定位符"""
         return By.XPATH, f"//div[@class='el-scrollbar']//span[text()='{customer_name}']"
@@ -58,34 +69,40 @@ class OrderPage(BasePage):
 
         # 3.点击上传按钮并上传文件
         try:
-            file_input = self.wait.until(EC.presence_of_element_located(self.EXCEL_UPLOAD))
+            file_input = self.waits.present(self.EXCEL_UPLOAD)
 
             # 如果 input 被隐藏，先通过 JS 显示
             self.driver.execute_script("arguments[0].style.display = 'block';", file_input)
 
+            upload_seq = self.network.mark()
             file_input.send_keys(file_path)
             self.logger.info(f"上传文件: {file_path}")
         except Exception as e:
             self.handle_error("上传文件失败", e)
             raise
 
-        # 等待遮罩完全消失(优化等待方式)
+        # 等待上传的 POST 请求完成，再等遮罩消失；两个等待分开处理，共用 UPLOAD_TIMEOUT 秒
+        deadline = time.monotonic() + self.UPLOAD_TIMEOUT
+        try:
+            upload = self.network.request(url_contains=self._upload_url_contains(), method="POST",
+                                          since=upload_seq, timeout=self.UPLOAD_TIMEOUT)
+            self.logger.info(f"文件上传完成: {upload['url']} -> {upload['status']}")
+        except TimeoutException:
+            self.logger.warning("等待文件上传请求超时，继续等待遮罩层消失")
         try:
-            self.wait.until(EC.invisibility_of_element_located(self.LOADING_MASK))
+            self.waits.gone(self.LOADING_MASK, timeout=max(deadline - time.monotonic(), 0.5))
             self.logger.info("文件解析完成，遮罩层已消失")
         except TimeoutException:
             self.logger.warning("等待遮罩层消失超时，可能页面卡住")
 
         # 4. 输入客户名称并选择
         try:
-            cus_name_input = self.wait.until(EC.visibility_of_element_located(self.CUS_NAME))
+            cus_name_input = self.waits.visible(self.CUS_NAME)
             cus_name_input.send_keys(customer_name)
             self.logger.info(f"输入客户名称: {customer_name}")
 
             # 2. 等待下拉选项出现
-            target_customer = self.wait.until(
-                EC.presence_of_element_located(self._get_customer_option_locator(customer_name))
-            )
+            target_customer = self.waits.present(self._get_customer_option_locator(customer_name))
 
             # 3. 用 JS 点击下拉选项，保证 Vue 状态更新
             self.driver.execute_script("arguments[0].click();", target_customer)
@@ -115,19 +132,34 @@ class OrderPage(BasePage):
             element_name="销售产品"
         )
 
-        # 6. 保存提交
+        # 6. 保存前一次性检查表单状态：客户、产品已选中，保存按钮可点击
+        form = self.query_states({"客户名称": self.CUS_NAME, "销售产品": self.PRODUCT, "保存": self.SAVE})
+        if form["客户名称"].value != customer_name or form["销售产品"].value != product_name:
+            self.logger.warning(f"表单选中值与预期不一致: 客户={form['客户名称'].value}，产品={form['销售产品'].value}")
+        if not form["保存"].clickable:
+            error = RuntimeError("保存按钮不可点击")
+            self.handle_error("保存提交", error)
+            raise error
+
+        # 7. 保存提交
         self.click(self.SAVE,"保存")
         try:
             # 等待弹窗出现并定位客户单号元素
-            order_element = self.wait.until(EC.visibility_of_element_located(self.ORDER_NUM))
+            order_element = self.waits.visible(self.ORDER_NUM)
             order_text = order_element.text
             self.logger.info(f"保存成功，客户单号为：{order_text}")
             print(f"保存成功，客户单号为：{order_text}")
-            time.sleep(5)
         except Exception as e:
             self.handle_error("保存提交", e)
             raise
 
+        # 等保存后的后续请求（列表刷新等）结束再进入下一条数据，代替固定等待 5 秒；
+        # 页面有后台轮询时可能一直不空闲，超时只记录日志，不算失败
+        try:
+            self.network.idle(idle_ms=self.SETTLE_IDLE_MS, timeout=self.SETTLE_TIMEOUT)
+        except TimeoutException:
+            self.logger.info(f"保存后 {self.SETTLE_TIMEOUT} 秒内页面请求未停止，继续下一步")
+
 
 
 
@@ -1,8 +1,16 @@
 import os
+import logging
 import pytest
 from xdist.plugin import worker_id
-from core.browser_manager import BrowserManager
+from core.browser_manager import BrowserManager, ENV_PROFILE, PROFILES
+from core.browser_pool import BrowserPool
+from core.profile_snapshot import GoldenProfile, ENV_GOLDEN_DIR
+from core.wait_engine import WAIT_STATS
+from utils.driver_resolver import resolve_chromedriver, use_resolved_path
+from utils import duration_scheduler
 from utils.csv_reader import load_csv_data
+from utils import api_login as api_login_utils
+from pages.login_page import LoginPage
 
 
 def pytest_addoption(parser):
@@ -12,16 +20,115 @@ def pytest_addoption(parser):
         default="chrome",
         help="Browser option: chrome, firefox, edge"
     )
+    parser.addoption("--refresh-driver", action="store_true", help="忽略锁文件，重新解析 chromedriver")
+    parser.addoption("--parallel", action="store_true", default=None,
+                     help="强制并发模式（每个浏览器独立临时目录）；xdist worker 中自动启用")
+    parser.addoption("--longest-first", action="store_true",
+                     help="按历史耗时从长到短执行（以类 / 模块为单位）；配合 -n 使用时空闲 worker 领取最长的组（LPT）")
+    parser.addoption("--shard", default=None, metavar="i/n",
+                     help="CI 分片：按历史耗时把用例（以类 / 模块为单位）均分成 n 份，只执行第 i 份")
+    parser.addoption("--browser-profile", choices=PROFILES, default=None,
+                     help="运行模式：headed / headless / fast，覆盖 config.ini [browser] profile")
 
-@pytest.fixture(scope="class")
-def browser(request):
+#pytest-xdist: 主进程解析一次 chromedriver 路径，随 workerinput 发给每个 worker
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["chromedriver_path"] = resolve_chromedriver()
+
+def pytest_configure(config):
+    #通过环境变量传给 BrowserManager（xdist worker 各自解析命令行，也会走到这里）
+    if config.getoption("--browser-profile"):
+        os.environ[ENV_PROFILE] = config.getoption("--browser-profile")
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput and "chromedriver_path" in workerinput:
+        use_resolved_path(workerinput["chromedriver_path"])
+    elif config.getoption("--refresh-driver"):
+        resolve_chromedriver(refresh=True)
+    #主进程指定本次会话的黄金快照目录（第一次启动并发浏览器时构建），worker 通过环境变量继承
+    if workerinput is None and GoldenProfile.enabled() and not os.environ.get(ENV_GOLDEN_DIR):
+        os.environ[ENV_GOLDEN_DIR] = GoldenProfile.new_path()
+        config._golden_profile_owner = True
+
+    #启用 --longest-first / --shard 时，主进程记录每个用例的耗时到 pytest 缓存（worker 的结果会汇总到主进程）
+    cache = getattr(config, "cache", None)
+    scheduling = config.getoption("--longest-first") or config.getoption("--shard")
+    if workerinput is None and scheduling and cache is not None:
+        config.pluginmanager.register(duration_scheduler.DurationRecorder(cache), "duration_recorder")
+    if config.getoption("--shard"):
+        try:
+            duration_scheduler.parse_shard(config.getoption("--shard"))
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+
+def pytest_collection_modifyitems(config, items):
+    shard = config.getoption("--shard")
+    if not shard and not config.getoption("--longest-first"):
+        return
+    durations = duration_scheduler.load_durations(getattr(config, "cache", None))
+    if shard:
+        index, count = duration_scheduler.parse_shard(shard)
+        selected, deselected = duration_scheduler.shard_items(items, durations, index, count)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+    if config.getoption("--longest-first"):
+        items[:] = duration_scheduler.order_longest_first(items, durations)
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if config.getoption("--longest-first") and config.getoption("dist") == "load":
+        return duration_scheduler.DurationScheduling(config, log)
+    return None
+
+#等待耗时汇总：按 条件 + 定位器 统计（xdist 下每个 worker 写入自己的日志）
+def pytest_terminal_summary(terminalreporter):
+    report = WAIT_STATS.format_report()
+    if report:
+        terminalreporter.write_sep("-", f"等待耗时 合计 {WAIT_STATS.total():.2f}s")
+        terminalreporter.write_line(report)
+
+@pytest.fixture(scope="session", autouse=True)
+def wait_stats_log():
+    yield
+    report = WAIT_STATS.format_report()
+    if report:
+        logging.getLogger("wait_engine").info(f"等待耗时汇总 合计 {WAIT_STATS.total():.2f}s\n{report}")
+
+def pytest_unconfigure(config):
+    if getattr(config, "_golden_profile_owner", False):
+        GoldenProfile.from_env().remove()
+        os.environ.pop(ENV_GOLDEN_DIR, None)
+
+#整个会话（xdist 下每个 worker）共用一个预热的浏览器池，大小和复用次数见 config.ini 的 [browser]
+#xdist worker 中（PYTEST_XDIST_WORKER）或传了 --parallel 时自动使用并发模式，各 worker 的用户数据目录互不冲突
+@pytest.fixture(scope="session")
+def browser_pool(request):
     browser_name = request.config.getoption("--browser")
-    manager = BrowserManager(parallel=False)
-    driver = manager.start_browser(browser_type=browser_name)
-    request.cls.driver = driver
-    yield driver
-    manager.close_browser()
+    pool = BrowserPool.from_config(browser_type=browser_name,
+                                   parallel=request.config.getoption("--parallel")).start()
+    yield pool
+    pool.close()
 
+#每个测试类从池中租用一个浏览器，结束时清理 cookie/存储/标签页后归还，不再每次重新启动 Chrome
+@pytest.fixture(scope="class")
+def browser(request, browser_pool):
+    with browser_pool.lease() as driver:
+        if request.cls is not None:
+            request.cls.driver = driver
+        yield driver
+
+#接口登录后注入 loginKey，直接以已登录状态打开页面：api_login(username, password, target_url=None)
+#用于非登录类 UI 测试；注入后仍停在登录页时作废缓存的 loginKey 重新登录一次
+@pytest.fixture
+def api_login(browser):
+    def login(username, password, target_url=None):
+        login_page = LoginPage(browser)
+        try:
+            login_page.login_with_session(api_login_utils.api_login(username, password), target_url)
+        except RuntimeError:
+            login_page.login_with_session(api_login_utils.api_login(username, password, refresh=True), target_url)
+        return login_page
+    return login
 
 # @pytest.fixture(scope="class")
 # def setup(request):
@@ -30,31 +137,3 @@ def browser(request):
 #     request.cls.driver = driver
 #     yield
 #     driver.quit()
-
-
-
-
-
-
-# 并发用
-# @pytest.fixture
-# def browser(request):
-#     #用户手动传 --parallel 则优先启用并发模式
-#     parallel = request.config.getoption("--parallel")
-#
-#     #如果 pytest-xdist运行时，worker 数 > 1 才自动启用并发模式
-#     worker_id = os.environ.get("PYTEST_XDIST_WORKER")
-#     total_workers = os.environ.get("PYTEST_XDIST_WORKER_COUNT")
-#
-#     # 2. 如果没传 --parallel，但 pytest-xdist 在运行（说明是 -n 并发），也自动启用并发模式
-#     #if not parallel and os.environ.get("PYTEST_XDIST_WORKER"):
-#     if not parallel and worker_id and total_workers and int(total_workers)>1:
-#         parallel = True
-#
-#     manager = BrowserManager(parallel=parallel)
-#     driver = manager.start_browser()
-#     yield driver
-#     manager.close_browser()
-#
-# def pytest_addoption(parser):
-#     parser.addoption("--parallel", action="store_true", help="启用并发模式")
@@ -0,0 +1,101 @@
+import pytest
+
+from core.browser_pool import BrowserPool, PooledBrowser
+
+
+# 不启动浏览器：用假的 BrowserManager 检查池的容量管理
+class FakeDriver:
+    current_window_handle = "main"
+
+
+class DeadDriver:
+    """chromedriver 进程已退出：任何调用都抛出连接错误（不是 WebDriverException）"""
+
+    @property
+    def current_window_handle(self):
+        raise ConnectionRefusedError("chromedriver 已退出")
+
+    @property
+    def window_handles(self):
+        raise ConnectionRefusedError("chromedriver 已退出")
+
+
+class FakeManager:
+    def __init__(self, driver=None, quit_error=None):
+        self.driver = driver or FakeDriver()
+        self.quit_error = quit_error
+        self.closed = False
+
+    def close_browser(self):
+        self.closed = True
+        if self.quit_error is not None:
+            raise self.quit_error
+
+
+class FlakyPool(BrowserPool):
+    """_launch 按 failures 列表依次决定成功/失败"""
+
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = list(failures)
+
+    def _launch(self):
+        if self.failures and self.failures.pop(0):
+            raise RuntimeError("Chrome 启动失败")
+        entry = PooledBrowser(FakeManager())
+        with self._lock:
+            self._all.append(entry)
+        return entry
+
+
+def test_failed_relaunch_keeps_capacity():
+    # 启动成功 -> 回收后补充失败 -> 租用时再次失败（抛出而不是卡住） -> 下一次租用成功
+    pool = FlakyPool([False, True, True, False], size=1, max_uses=1).start()
+    entry = pool.acquire(timeout=1)
+    pool.release(entry)
+    assert entry.manager.closed
+
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=1)
+    entry = pool.acquire(timeout=1)
+    assert entry.uses == 1
+    pool.close()
+
+
+def _dead_entry(pool):
+    entry = PooledBrowser(FakeManager(DeadDriver(), quit_error=ConnectionResetError("quit 失败")))
+    with pool._lock:
+        pool._all.append(entry)
+    return entry
+
+
+def test_dead_session_is_replaced_on_acquire():
+    # 池里的会话已断开，探活和关闭都抛连接错误：租用时换一个新的，不会卡住
+    pool = FlakyPool([], size=1, max_uses=1)
+    pool._idle.put(_dead_entry(pool))
+    entry = pool.acquire(timeout=1)
+    assert isinstance(entry.driver, FakeDriver)
+    pool.release(entry)
+    assert isinstance(pool.acquire(timeout=1).driver, FakeDriver)
+    pool.close()
+
+
+def test_dead_session_is_replaced_on_release():
+    # 归还时清理状态抛连接错误、关闭也失败：补一个新会话放回池中
+    pool = FlakyPool([], size=1)
+    dead = _dead_entry(pool)
+    pool.release(dead)
+    assert dead.manager.closed
+    entry = pool.acquire(timeout=1)
+    assert isinstance(entry.driver, FakeDriver)
+    pool.close()
+
+
+def test_release_keeps_vacancy_when_relaunch_fails_after_dead_session():
+    # 归还时补充失败 -> 租用时再次失败 -> 下一次租用成功
+    pool = FlakyPool([True, True, False], size=1)
+    pool.release(_dead_entry(pool))
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=1)
+    assert isinstance(pool.acquire(timeout=1).driver, FakeDriver)
+    pool.close()
@@ -0,0 +1,100 @@
+import os
+import types
+
+import pytest
+
+from utils import csv_reader
+from utils.csv_reader import index_by, iter_data, load_data
+
+
+# 不启动浏览器：用 tmp_path 下的临时数据文件检查读取、缓存和索引
+def _write_csv(path, rows):
+    path.write_text("username,order_count\n" + "".join(f"{u},{n}\n" for u, n in rows), encoding="utf-8")
+    return path
+
+
+def _bump_mtime(path):
+    # 同一时刻内连续写入时 mtime 可能不变，显式往后调一秒
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    csv_reader._rows_cache.clear()
+    csv_reader._index_cache.clear()
+    yield
+    csv_reader._rows_cache.clear()
+    csv_reader._index_cache.clear()
+
+
+def test_iter_csv_streams_and_converts(tmp_path):
+    path = _write_csv(tmp_path / "users.csv", [("a", 1), ("b", 2)])
+    rows = iter_data(str(path), types={"order_count": int})
+    assert isinstance(rows, types.GeneratorType)
+    assert next(rows) == {"username": "a", "order_count": 1}
+    assert list(rows) == [{"username": "b", "order_count": 2}]
+
+
+def test_iter_xlsx_streams_and_skips_empty_rows(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "users.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "data"
+    sheet.append([" username ", "order_count"])
+    sheet.append(["a", "1"])
+    sheet.append([None, None])
+    sheet.append(["b", "2"])
+    workbook.save(path)
+
+    rows = iter_data(str(path), types={"order_count": int}, sheet="data")
+    assert isinstance(rows, types.GeneratorType)
+    assert list(rows) == [{"username": "a", "order_count": 1}, {"username": "b", "order_count": 2}]
+    # CSV 和 XLSX 读出的结构一致
+    csv_path = _write_csv(tmp_path / "users.csv", [("a", 1), ("b", 2)])
+    assert list(iter_data(str(csv_path), types={"order_count": int})) == load_data(str(path), {"order_count": int}, "data")
+
+
+def test_load_data_cache_hit(tmp_path):
+    path = _write_csv(tmp_path / "users.csv", [("a", 1)])
+    first = load_data(str(path))
+    assert load_data(str(path)) is first
+    # 列类型不同时是另一份缓存
+    assert load_data(str(path), types={"order_count": int}) is not first
+
+
+def test_load_data_reloads_after_mtime_change(tmp_path):
+    path = _write_csv(tmp_path / "users.csv", [("a", 1)])
+    first = load_data(str(path))
+    # 内容长度不变，只有修改时间变化
+    _write_csv(path, [("b", 2)])
+    _bump_mtime(path)
+    second = load_data(str(path))
+    assert second is not first
+    assert second == [{"username": "b", "order_count": "2"}]
+
+
+def test_load_data_reloads_after_size_change(tmp_path):
+    path = _write_csv(tmp_path / "users.csv", [("a", 1)])
+    first = load_data(str(path))
+    st = os.stat(path)
+    _write_csv(path, [("a", 1), ("b", 2)])
+    # 修改时间保持不变，只有文件大小变化
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    second = load_data(str(path))
+    assert second is not first
+    assert [row["username"] for row in second] == ["a", "b"]
+
+
+def test_index_by_keeps_last_duplicate(tmp_path):
+    path = _write_csv(tmp_path / "users.csv", [("a", 1), ("b", 2), ("a", 3)])
+    index = index_by(str(path), "username", types={"order_count": int})
+    assert set(index) == {"a", "b"}
+    assert index["a"]["order_count"] == 3
+    assert index_by(str(path), "username", types={"order_count": int}) is index
+    # 文件修改后索引重新建立
+    _write_csv(path, [("a", 4), ("b", 2), ("c", 5)])
+    _bump_mtime(path)
+    index = index_by(str(path), "username", types={"order_count": int})
+    assert index["a"]["order_count"] == 4 and "c" in index
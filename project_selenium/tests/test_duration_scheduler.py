@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from utils.duration_scheduler import DurationScheduling, order_longest_first, scope_of, shard_items
+
+ITEMS = [
+    "tests/test_order.py::TestOrder::test_a",
+    "tests/test_order.py::TestOrder::test_b",
+    "tests/test_order.py::TestOrder::test_c",
+    "tests/test_login.py::TestLogin::test_x[a::b]",
+    "tests/test_login.py::TestLogin::test_y",
+    "tests/test_workflow.py::test_flow",
+]
+# 单个用例最长的是 test_flow，但 TestOrder 整组最长
+DURATIONS = {
+    "tests/test_order.py::TestOrder::test_a": 3.0,
+    "tests/test_order.py::TestOrder::test_b": 3.0,
+    "tests/test_order.py::TestOrder::test_c": 3.0,
+    "tests/test_login.py::TestLogin::test_x[a::b]": 1.0,
+    "tests/test_login.py::TestLogin::test_y": 1.0,
+    "tests/test_workflow.py::test_flow": 5.0,
+}
+
+
+def _items(nodeids):
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+def _ids(items):
+    return [item.nodeid for item in items]
+
+
+def test_scope_of():
+    assert scope_of("tests/test_order.py::TestOrder::test_a") == "tests/test_order.py::TestOrder"
+    assert scope_of("tests/test_login.py::TestLogin::test_x[a::b]") == "tests/test_login.py::TestLogin"
+    assert scope_of("tests/test_workflow.py::test_flow") == "tests/test_workflow.py"
+
+
+def test_order_keeps_classes_contiguous():
+    ordered = _ids(order_longest_first(_items(ITEMS), DURATIONS))
+    assert ordered == ITEMS[:3] + ITEMS[5:] + ITEMS[3:5]
+
+
+def test_shard_assigns_whole_classes():
+    shards = [_ids(shard_items(_items(ITEMS), DURATIONS, index, 2)[0]) for index in (1, 2)]
+    assert shards == [ITEMS[:3], ITEMS[5:] + ITEMS[3:5]]
+
+
+class FakeNode:
+    def __init__(self, name):
+        self.gateway = SimpleNamespace(id=name)
+        self.shutting_down = False
+        self.sent = []
+
+    def send_runtest_some(self, indexes):
+        self.sent.append(indexes)
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+def test_scheduler_sends_whole_classes_longest_first():
+    config = SimpleNamespace(getvalue=lambda name: ["2*popen"])
+    sched = DurationScheduling(config)
+    collection = _ids(order_longest_first(_items(ITEMS), DURATIONS))
+    nodes = [FakeNode("gw0"), FakeNode("gw1")]
+    for node in nodes:
+        sched.add_node(node)
+        sched.add_node_collection(node, collection)
+    sched.schedule()
+    # 队首（最长）的两组分给两个 worker，不按用例数重排，组不被拆开
+    assert [[collection[i] for i in batch] for batch in nodes[0].sent] == [ITEMS[:3]]
+    assert [[collection[i] for i in batch] for batch in nodes[1].sent] == [ITEMS[5:]]
+    # gw1 的组执行完后领取剩下的 TestLogin
+    sched.mark_test_complete(nodes[1], collection.index(ITEMS[5]))
+    assert [collection[i] for i in nodes[1].sent[-1]] == ITEMS[3:5]
+    assert not sched.workqueue
@@ -0,0 +1,68 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from core.network_waits import NetworkWaits
+
+
+# 不启动浏览器：用 node 执行 NetworkWaits 发出的脚本，页面里的 fetch 用定时返回的桩代替
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="需要 node 执行页面脚本")
+
+PAGE_JS = """
+globalThis.window = globalThis;
+globalThis.XMLHttpRequest = function () {};
+XMLHttpRequest.prototype.open = function () {};
+XMLHttpRequest.prototype.send = function () {};
+XMLHttpRequest.prototype.addEventListener = function () {};
+globalThis.fetch = function (url, init) {
+    return new Promise(function (resolve) { setTimeout(function () { resolve({url: url, status: 200}); }, 50); });
+};
+"""
+
+
+class NodeDriver:
+    """只实现 NetworkWaits 用到的方法；actions 是等待脚本开始后页面里发生的请求 [(延迟毫秒, url, method)]"""
+
+    def __init__(self, actions=()):
+        self.actions = list(actions)
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def _run(self, body):
+        result = subprocess.run(["node", "-e", PAGE_JS + body], capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout)
+
+    def execute_script(self, script, *args):
+        return self._run(f"console.log(JSON.stringify(new Function({json.dumps(script)})()));")
+
+    def execute_async_script(self, script, *args):
+        actions = "".join(
+            f"setTimeout(function () {{ fetch({json.dumps(url)}, {{method: {json.dumps(method)}}}); }}, {delay});"
+            for delay, url, method in self.actions)
+        return self._run(
+            f"new Function({json.dumps(script)}).apply(null, {json.dumps(list(args))}.concat("
+            f"[function (r) {{ console.log(JSON.stringify(r)); }}]));" + actions)
+
+
+def test_request_waits_for_matching_post():
+    driver = NodeDriver([(10, "/api/other", "POST"), (100, "/api/order/upload", "POST")])
+    request = NetworkWaits(driver, timeout=5).request(url_contains="upload", method="POST", since=0)
+    assert request["url"] == "/api/order/upload"
+    assert request["method"] == "POST"
+    assert request["status"] == 200
+
+
+def test_request_times_out_without_match():
+    driver = NodeDriver([(10, "/api/list", "GET")])
+    with pytest.raises(TimeoutException):
+        NetworkWaits(driver, timeout=0.5).request(url_contains="upload", method="POST")
+
+
+def test_idle_waits_for_inflight_requests():
+    driver = NodeDriver([(10, "/api/list", "GET")])
+    assert NetworkWaits(driver, timeout=5).idle(idle_ms=100)
@@ -4,7 +4,6 @@ import allure
 import os
 
 from utils.csv_reader import load_csv_data
-from pages.login_page import LoginPage
 from pages.order_page import OrderPage
 from utils.config_manager import ConfigManager
 
@@ -15,7 +14,7 @@ class TestOrder:
 
     @allure.story("创建订单")  # 小场景分类
     @pytest.mark.parametrize("user", load_csv_data("users.csv"))
-    def test_create_order(self, user):
+    def test_create_order(self, user, api_login):
         """
         多用户创建预报单测试，使用 CSV 中的数据驱动。
         user 是字典，包含 username、password、customer_name、product_name
@@ -24,13 +23,12 @@ class TestOrder:
         allure.dynamic.title(f"创建订单 - {user['username']}")
 
         # 初始化页面对象
-        login_page = LoginPage(self.driver)
         order_page = OrderPage(self.driver)
 
-        # ================= 登录步骤 =================
+        # ================= 登录步骤（接口登录后注入 loginKey，页面登录流程见 test_login.py） =================
         with allure.step(f"用户 {user['username']} 登录"):
             start_time = time.time()
-            login_page.login_with_credentials(user["username"], user["password"])
+            login_page = api_login(user["username"], user["password"])
             login_elapsed = time.time() - start_time
 
             login_ok = login_page.is_welcome_shown(user["username"])
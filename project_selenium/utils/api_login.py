@@ -0,0 +1,55 @@
+#api_login.py
+
+import threading
+
+import requests
+
+from utils.config_manager import ConfigManager
+
+
+"""
+通过接口登录（直接用 requests 调用登录接口，不依赖 project_interface），拿到 loginKey 后注入浏览器：
+- 非登录类的 UI 测试不再走 输入用户名/密码/点击/等待 的页面登录流程
+- 同一进程内相同账号的 loginKey 只请求一次（失效时调用 invalidate 后重新登录）
+- 页面登录流程只保留在 test_login.py 中测试
+配置见 config.ini [api_login]
+"""
+
+LOGIN_PATH = "/api/admin/admin-user/login"
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def api_base_url():
+    base_url = ConfigManager.get_from_config("api_login", "api_base_url")
+    if not base_url:
+        raise ValueError("api_base_url not found in config.ini [api_login]")
+    return base_url
+
+
+def api_login(username, password, refresh=False):
+    """调用登录接口，返回 loginKey；登录失败抛出 RuntimeError"""
+    key = (api_base_url(), username, password)
+    with _lock:
+        if not refresh and key in _cache:
+            return _cache[key]
+
+    timeout = float(ConfigManager.get_from_config("api_login", "timeout", "10"))
+    resp = requests.post(f"{api_base_url().rstrip('/')}{LOGIN_PATH}",
+                         json={"userName": username, "password": password}, timeout=timeout)
+    resp.raise_for_status()
+    login_key = ((resp.json() or {}).get("data") or {}).get("loginKey")
+    if not login_key:
+        raise RuntimeError(f"接口登录失败，未返回 loginKey: {username}, 返回内容: {resp.text[:200]}")
+
+    with _lock:
+        _cache[key] = login_key
+    return login_key
+
+
+def invalidate(username):
+    """作废某个账号缓存的 loginKey（例如注入后页面仍然跳回登录页）"""
+    with _lock:
+        for key in [k for k in _cache if k[1] == username]:
+            del _cache[key]
@@ -2,35 +2,129 @@
 
 from pathlib import Path
 import csv
+import os
 import pytest
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from utils.config_manager import ConfigManager
 
 
+# 列类型转换：列名 -> 转换函数，例如 {"order_count": int, "weight": float}
+ColumnTypes = Dict[str, Callable[[Any], Any]]
+
+# 会话内缓存：(文件路径, 修改时间, 文件大小, sheet, 列类型) -> 解析结果，同一个文件只解析一次
+_rows_cache: Dict[tuple, List[dict]] = {}
+_index_cache: Dict[tuple, Dict[Any, dict]] = {}
+
+
+def _data_path(filename: str) -> Path:
+    """相对路径以 tests 目录为根，绝对路径原样使用"""
+    path = Path(filename)
+    if path.is_absolute():
+        return path
+    return Path(ConfigManager.get_project_dir()) / "tests" / filename
+
+
+def _cache_key(path: Path, sheet: Optional[str], types: Optional[ColumnTypes]) -> tuple:
+    st = os.stat(path)
+    return str(path), st.st_mtime_ns, st.st_size, sheet, tuple(sorted((types or {}).items()))
+
+
+def _convert(row: dict, types: Optional[ColumnTypes]) -> dict:
+    if types:
+        for name, convert in types.items():
+            if row.get(name) not in (None, ""):
+                row[name] = convert(row[name])
+    return row
+
+
+def _iter_csv(path: Path, encoding: str) -> Iterator[dict]:
+    '''
+    不指定 newline=""，Python 的 open() 会先把 Windows的\r\n 转换成 \n，
+    导致 csv.reader() 再处理一次换行符，最终就会出现多一行空行。
+    '''
+    with open(path, newline="", encoding=encoding) as csvfile:
+        yield from csv.DictReader(csvfile)
+
+
+def _iter_xlsx(path: Path, sheet: Optional[str]) -> Iterator[dict]:
+    """只读模式逐行读取，第一行为表头；整行为空的行跳过"""
+    from openpyxl import load_workbook  # 只有读取 xlsx 时才需要安装 openpyxl
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_data(filename: str, types: Optional[ColumnTypes] = None, sheet: Optional[str] = None,
+              encoding: str = "utf-8") -> Iterator[dict]:
+    """
+    逐行读取 tests 目录下的 CSV / XLSX 数据文件（不缓存、不一次性读入内存），适合几万行以上的大文件。
+    :param filename: 文件名（.csv / .xlsx）
+    :param types: 列类型转换，例如 {"order_count": int}
+    :param sheet: xlsx 的工作表名，默认第一个
+    :param encoding: CSV 文件编码
+    :return: 每行数据为一个 dict
+    """
+    path = _data_path(filename)
+    if path.suffix.lower() == ".xlsx":
+        rows = _iter_xlsx(path, sheet)
+    else:
+        rows = _iter_csv(path, encoding)
+    for row in rows:
+        yield _convert(row, types)
+
+
+def load_data(filename: str, types: Optional[ColumnTypes] = None, sheet: Optional[str] = None,
+              encoding: str = "utf-8") -> List[dict]:
+    """
+    加载数据文件的全部行，按 文件路径 + 修改时间 缓存：
+    同一个会话里多个测试模块参数化同一个文件时只解析一次，文件被修改后自动重新读取。
+    返回的列表在调用方之间共享，只读使用，不要修改。
+    """
+    path = _data_path(filename)
+    key = _cache_key(path, sheet, types)
+    rows = _rows_cache.get(key)
+    if rows is None:
+        rows = _rows_cache[key] = list(iter_data(filename, types=types, sheet=sheet, encoding=encoding))
+    return rows
+
+
+def index_by(filename: str, key_column: str = "username", types: Optional[ColumnTypes] = None,
+             sheet: Optional[str] = None, encoding: str = "utf-8") -> Dict[Any, dict]:
+    """
+    按某一列建立索引（例如 username -> 整行数据），用于按账号查找数据，与 load_data 共用缓存。
+    列值重复时保留最后一行。
+    """
+    path = _data_path(filename)
+    key = _cache_key(path, sheet, types) + (key_column,)
+    index = _index_cache.get(key)
+    if index is None:
+        rows = load_data(filename, types=types, sheet=sheet, encoding=encoding)
+        index = _index_cache[key] = {row.get(key_column): row for row in rows}
+    return index
+
+
 # 读取 CSV 数据
-def load_csv_data(filename:str, encoding="utf-8") -> list[dict]:
+def load_csv_data(filename:str, encoding="utf-8", types: Optional[ColumnTypes] = None) -> list[dict]:
     """
     从tests 目录下加载指定的CSV文件，并以字典形式返回数据列表。
+    同一个文件在一次测试会话中只解析一次（见 load_data）。
     :param filename: CSV文件名
     :param encoding: 文件编码
+    :param types: 列类型转换，例如 {"order_count": int}，不传时所有列都是字符串
     :return: List[Dict] 每行数据为一个 dict
     """
-
-    project_dir = Path(ConfigManager.get_project_dir())
-    csv_path = project_dir / "tests" / filename
-
-
     try:
-        '''
-        不指定 newline=""，Python 的 open() 会先把 Windows的\r\n 转换成 \n，
-        导致 csv.reader() 再处理一次换行符，最终就会出现多一行空行。
-        '''
-        with open(csv_path,newline="",encoding=encoding) as csvfile:
-            reader = csv.DictReader(csvfile)
-            return  list(reader)
-
+        return load_data(filename, types=types, encoding=encoding)
     except FileNotFoundError:
-        pytest.fail(f"CSV文件{csv_path}不存在")
+        pytest.fail(f"CSV文件{_data_path(filename)}不存在")
     except Exception as e:
         pytest.fail(f"加载CSV文件失败:{e}")
-
-
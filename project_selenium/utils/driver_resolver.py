@@ -0,0 +1,147 @@
+#driver_resolver.py
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+
+"""
+chromedriver 路径解析（带锁文件，可离线）：
+- 第一次解析时用 ChromeDriverManager 下载/查找驱动，把路径和对应的 Chrome 版本写入用户缓存目录的锁文件
+  （Linux/macOS: $XDG_CACHE_HOME 或 ~/.cache，Windows: %LOCALAPPDATA%，下的 project_selenium/chromedriver.lock.json）；
+  锁文件里是本机路径，不放在项目目录里，避免被提交
+- 之后只要本机 Chrome 的主版本没变、驱动文件还在，就直接用锁文件里的路径，不再访问网络
+- 同一进程只解析一次；pytest-xdist 下由主进程解析后通过 workerinput 传给各个 worker
+- 升级 Chrome 或驱动损坏时执行：python -m utils.driver_resolver --refresh（或 pytest --refresh-driver）
+"""
+
+logger = logging.getLogger(__name__)
+
+# 环境变量里指定了驱动路径时直接使用，不做任何解析
+ENV_DRIVER_PATH = "CHROMEDRIVER_PATH"
+
+# 本进程已解析出的路径
+_resolved_path = None
+
+
+def _cache_dir() -> str:
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "project_selenium")
+
+
+def _lock_file() -> str:
+    return os.path.join(_cache_dir(), "chromedriver.lock.json")
+
+
+def _major(version):
+    return version.split(".", 1)[0] if version else None
+
+
+def detect_chrome_version():
+    """读取本机安装的 Chrome 版本（例如 126.0.6478.127），找不到时返回 None"""
+    try:
+        if sys.platform.startswith("win"):
+            import winreg
+            for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(root, r"Software\Google\Chrome\BLBeacon") as key:
+                        return winreg.QueryValueEx(key, "version")[0]
+                except OSError:
+                    continue
+            return None
+        if sys.platform == "darwin":
+            candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+        else:
+            candidates = [shutil.which(name) for name in
+                          ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")]
+        for binary in filter(None, candidates):
+            if os.path.exists(binary):
+                output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+                match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+                if match:
+                    return match.group(1)
+    except Exception as e:
+        logger.warning(f"读取 Chrome 版本失败: {e}")
+    return None
+
+
+def read_lock():
+    try:
+        with open(_lock_file(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_lock(data):
+    path = _lock_file()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _install_driver() -> str:
+    # 只有需要下载/查找驱动时才导入 webdriver_manager
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+def resolve_chromedriver(refresh: bool = False) -> str:
+    """
+    返回 chromedriver 路径。
+    :param refresh: True 时忽略锁文件，重新用 ChromeDriverManager 解析并更新锁文件
+    """
+    global _resolved_path
+    if os.environ.get(ENV_DRIVER_PATH):
+        return os.environ[ENV_DRIVER_PATH]
+    if _resolved_path and not refresh:
+        return _resolved_path
+
+    chrome_version = detect_chrome_version()
+    lock = None if refresh else read_lock()
+    if lock and os.path.exists(lock.get("driver_path", "")):
+        # 读不到 Chrome 版本（例如离线的精简环境）时信任锁文件
+        if chrome_version is None or _major(chrome_version) == lock.get("chrome_major"):
+            _resolved_path = lock["driver_path"]
+            return _resolved_path
+        logger.info(f"Chrome 版本已变化: {lock.get('chrome_version')} -> {chrome_version}，重新解析驱动")
+
+    driver_path = _install_driver()
+    _write_lock({
+        "chrome_version": chrome_version,
+        "chrome_major": _major(chrome_version),
+        "driver_path": driver_path,
+        "resolved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    logger.info(f"chromedriver 已解析并写入锁文件: {driver_path}")
+    _resolved_path = driver_path
+    return driver_path
+
+
+def use_resolved_path(path: str):
+    """装入主进程解析好的路径（xdist worker 使用）"""
+    global _resolved_path
+    _resolved_path = path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析 chromedriver 路径并写入锁文件")
+    parser.add_argument("--refresh", action="store_true", help="忽略锁文件，重新解析")
+    args = parser.parse_args()
+    print(resolve_chromedriver(refresh=args.refresh))
+    print(f"锁文件: {_lock_file()}")
+
+
+if __name__ == "__main__":
+    main()
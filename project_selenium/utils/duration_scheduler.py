@@ -0,0 +1,136 @@
+#duration_scheduler.py
+
+import statistics
+from xdist.scheduler import LoadScopeScheduling
+
+
+"""
+按历史耗时调度测试用例：
+- DurationRecorder 记录每个用例的耗时（setup + call + teardown），会话结束时合并写入 pytest 缓存（.pytest_cache，
+  config.cache 的 duration_scheduler/durations），只在启用 --longest-first / --shard 时记录，不改动项目文件
+- 调度以作用域为单位（与 --dist loadscope 相同：类里的用例为一组，模块级函数按模块为一组），组的耗时为组内用例之和，
+  同一个类的用例不会被拆到不同 worker / 分片，也不会和其他类交错执行，类级别的浏览器 fixture 只建一次
+- order_longest_first：按组的预计耗时从长到短排序，组内保持收集顺序（没有记录的用例按已知耗时的中位数估计）
+- DurationScheduling：pytest-xdist 调度器，空闲的 worker 领取当前最长的组，
+  即“最长处理时间优先”（LPT）的贪心调度，总耗时接近最优，不会出现一个 worker 最后还拖着一大段用例
+- shard_items：CI 多机分片（--shard i/n），按同样的贪心规则把组分成 n 份，每份的预计耗时接近
+"""
+
+CACHE_KEY = "duration_scheduler/durations"
+
+# 新耗时在合并时的权重（指数滑动平均），避免一次偶然的慢运行打乱排序
+SMOOTHING = 0.5
+
+# 没有任何历史记录时每个用例的估计耗时（秒）
+DEFAULT_DURATION = 1.0
+
+
+def load_durations(cache):
+    """从 pytest 缓存读取历史耗时；禁用了 cacheprovider（-p no:cacheprovider）时返回空"""
+    if cache is None:
+        return {}
+    durations = cache.get(CACHE_KEY, {})
+    return durations if isinstance(durations, dict) else {}
+
+
+def save_durations(cache, observed):
+    """把本次观测到的耗时合并到历史记录（只更新本次运行过的用例）"""
+    merged = load_durations(cache)
+    for nodeid, duration in observed.items():
+        old = merged.get(nodeid)
+        merged[nodeid] = duration if old is None else old * (1 - SMOOTHING) + duration * SMOOTHING
+    cache.set(CACHE_KEY, dict(sorted(merged.items())))
+
+
+def estimate(durations):
+    """返回 nodeid -> 预计耗时 的函数，没有记录的用例用中位数"""
+    default = statistics.median(durations.values()) if durations else DEFAULT_DURATION
+    return lambda nodeid: durations.get(nodeid, default)
+
+
+def scope_of(nodeid):
+    """
+    用例所属的调度组，与 LoadScopeScheduling 一致：
+    tests/test_order.py::TestOrder::test_a -> tests/test_order.py::TestOrder，tests/test_login.py::test_a -> tests/test_login.py
+    （先去掉参数化部分，参数 id 里可能带有 ::）
+    """
+    return nodeid.split("[", 1)[0].rsplit("::", 1)[0]
+
+
+def scope_groups(items, durations):
+    """按组的预计总耗时从长到短返回 [(耗时, [用例, ...]), ...]；耗时相同时按组名，保证每个 worker 的顺序一致"""
+    cost = estimate(durations)
+    groups = {}
+    for item in items:
+        groups.setdefault(scope_of(item.nodeid), []).append(item)
+    totals = {scope: sum(cost(item.nodeid) for item in group) for scope, group in groups.items()}
+    return [(totals[scope], groups[scope]) for scope in sorted(groups, key=lambda scope: (-totals[scope], scope))]
+
+
+def order_longest_first(items, durations):
+    """按组的预计耗时从长到短排序，同一组的用例连续排列并保持收集顺序"""
+    return [item for _, group in scope_groups(items, durations) for item in group]
+
+
+def parse_shard(value):
+    """'2/4' -> (2, 4)，序号从 1 开始"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard 格式应为 i/n，例如 1/4: {value}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"--shard 序号超出范围: {value}")
+    return index, count
+
+
+def shard_items(items, durations, index, count):
+    """
+    把用例分成 count 份，返回第 index 份（从 1 开始）和其余的用例：
+    按组的耗时从长到短，整组放进当前预计总耗时最小的一份
+    """
+    loads = [0.0] * count
+    selected, deselected = [], []
+    for total, group in scope_groups(items, durations):
+        shard = min(range(count), key=lambda i: (loads[i], i))
+        loads[shard] += total
+        (selected if shard == index - 1 else deselected).extend(group)
+    return selected, deselected
+
+
+class DurationRecorder:
+    """pytest 插件：在主进程（或不用 xdist 时的唯一进程）记录每个用例的耗时"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.observed = {}
+
+    def pytest_runtest_logreport(self, report):
+        self.observed[report.nodeid] = self.observed.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        if self.observed:
+            save_durations(self.cache, self.observed)
+
+
+class DurationScheduling(LoadScopeScheduling):
+    """
+    按组（类 / 模块）分配，与 LoadScopeScheduling 相同：一个组整体交给一个 worker，连续执行。
+    收集顺序已经是按组从长到短（order_longest_first），这里按这个顺序建工作队列，
+    而不是 LoadScopeScheduling 默认的按用例数重排；空闲（剩余用例不超过 2 个）的 worker 领取队首的组。
+    """
+
+    def _split_scope(self, nodeid):
+        return scope_of(nodeid)
+
+    def schedule(self):
+        assert self.collection_is_completed
+        if self.collection is None:
+            if not self._check_nodes_have_same_collection():
+                self.log("**Different tests collected, aborting run**")
+                return
+            self.collection = list(next(iter(self.registered_collections.values())))
+            for nodeid in self.collection:
+                self.workqueue.setdefault(self._split_scope(nodeid), {})[nodeid] = False
+        # 首次分配和有新 worker 加入都一样：每个 worker 领取队首的组，组比 worker 少时多出的 worker 直接关闭
+        for node in self.nodes:
+            self._reschedule(node)